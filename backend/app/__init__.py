@@ -18,7 +18,12 @@ def create_app(config_name='default'):
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
-    CORS(app)
+    CORS(app, expose_headers=['Server-Timing'])
+    
+    # Mesures SQL par requête (en-tête Server-Timing, journal, budgets)
+    if app.config['SQL_INSTRUMENTATION']:
+        from .utils.instrumentation import init_instrumentation
+        init_instrumentation(app)
     
     # Register blueprints
     from .routes.auth_routes import auth_bp
@@ -30,6 +35,10 @@ def create_app(config_name='default'):
     from .routes.service_routes import service_bp
     from .routes.equipment_rental_routes import rental_bp
     from .routes.dashboard_routes import dashboard_bp
+    from .routes.report_routes import report_bp
+    from .routes.analytics_routes import analytics_bp
+    from .routes.billing_routes import billing_bp
+    from .routes.claim_routes import claim_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(patient_bp, url_prefix='/api/patients')
@@ -40,6 +49,31 @@ def create_app(config_name='default'):
     app.register_blueprint(service_bp, url_prefix='/api/services')
     app.register_blueprint(rental_bp, url_prefix='/api/rentals')
     app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+    app.register_blueprint(report_bp, url_prefix='/api/reports')
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    app.register_blueprint(billing_bp, url_prefix='/api/billing')
+    app.register_blueprint(claim_bp, url_prefix='/api/claims')
+    
+    # Écouteurs ORM : versions des tables, compteurs du tableau de bord (et
+    # leur diffusion en direct), cumul journalier du chiffre d'affaires
+    from .utils import versioning, dashboard_counters, live_dashboard, revenue_rollup  # noqa: F401
+    
+    # Compilation des sérialiseurs des listes les plus sollicitées
+    from .utils.serializers import serializer_for
+    from .schemas import patients_schema, interventions_schema, invoices_schema
+    for schema in (patients_schema, interventions_schema, invoices_schema):
+        serializer_for(schema)
+    
+    # Tâches planifiées : le fil démarre à la première requête de chaque
+    # processus (jamais pour les commandes CLI), l'élection en base désigne
+    # le seul processus qui les exécute
+    from .utils import worklists  # noqa: F401
+    if app.config['SCHEDULER_ENABLED']:
+        from .utils.scheduler import scheduler
+        
+        @app.before_request
+        def start_scheduler():
+            scheduler.ensure_started(app)
     
     @app.route('/api/health')
     def health_check():
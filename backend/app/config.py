@@ -6,6 +6,24 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt_dev_key')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1) 
+    # Flux SSE du tableau de bord : recalcul périodique et maintien de connexion (secondes)
+    DASHBOARD_STREAM_REFRESH = int(os.environ.get('DASHBOARD_STREAM_REFRESH', 30))
+    DASHBOARD_STREAM_HEARTBEAT = int(os.environ.get('DASHBOARD_STREAM_HEARTBEAT', 15))
+    # Planificateur en processus : activation, période de la boucle et des
+    # listes de travail précalculées (secondes)
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    SCHEDULER_TICK = int(os.environ.get('SCHEDULER_TICK', 30))
+    WORKLIST_REFRESH = int(os.environ.get('WORKLIST_REFRESH', 300))
+    # Instrumentation SQL par requête : requêtes lentes retenues, répétitions
+    # d'une même requête tolérées (au-delà : N+1 suspecté), requête lente (ms)
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', 'true').lower() == 'true'
+    SQL_SLOWEST_STATEMENTS = int(os.environ.get('SQL_SLOWEST_STATEMENTS', 3))
+    SQL_MAX_REPEATS = int(os.environ.get('SQL_MAX_REPEATS', 10))
+    SQL_SLOW_REQUEST_MS = int(os.environ.get('SQL_SLOW_REQUEST_MS', 500))
+    # Documents de facture : stockage par empreinte (défaut : instance/factures)
+    # et processus de rendu en parallèle
+    INVOICE_PDF_DIR = os.environ.get('INVOICE_PDF_DIR')
+    INVOICE_PDF_WORKERS = int(os.environ.get('INVOICE_PDF_WORKERS', os.cpu_count() or 2))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -13,8 +31,13 @@ class DevelopmentConfig(Config):
 
 class TestingConfig(Config):
     TESTING = True
+    SCHEDULER_ENABLED = False
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test.db'
 
+class QueryPlanConfig(TestingConfig):
+    # Base jetable pour le contrôle des plans d'exécution (SQLite en mémoire par défaut)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('QUERY_PLAN_DATABASE_URI', 'sqlite://')
+
 class ProductionConfig(Config):
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI')
@@ -23,5 +46,6 @@ config = {
     'development': DevelopmentConfig,
     'testing': TestingConfig,
     'production': ProductionConfig,
+    'query-plans': QueryPlanConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
@@ -4,7 +4,15 @@ from app.models.equipment import Equipment
 from app.models.intervention import Intervention
 from app.models.medical_record import MedicalRecord
 from app.models.insurance import Insurance, PatientInsurance
-from app.models.invoice import Invoice, InvoiceItem
+from app.models.invoice import Invoice, InvoiceItem, InvoicePayment
 from app.models.service import Service,ServiceIntervention
 from app.models.equipment_rental import EquipmentRental
 
+from app.models.table_version import TableVersion
+from app.models.dashboard_counter import DashboardCounter
+from app.models.revenue_daily import RevenueDaily
+from app.models.scheduled_job import SchedulerLease, ScheduledJob
+from app.models.worklist import OverdueInterventionSnapshot, MaintenanceDueSnapshot
+from app.models.billing import BillingRun, RentalBilling
+from app.models.invoice_counter import InvoiceCounter, InvoiceNumberReserve
+from app.models.claim import ClaimSubmission, SubmittedClaim
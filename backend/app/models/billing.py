@@ -0,0 +1,45 @@
+from app import db
+from datetime import datetime
+
+class BillingRun(db.Model):
+    __tablename__ = 'billing_runs'
+    
+    # Une campagne par période (« 2026-10 »), reprise là où elle s'est arrêtée
+    periode = db.Column(db.String(7), primary_key=True)
+    statut = db.Column(db.String(20), nullable=False)  # en cours, terminée, en échec
+    date_debut = db.Column(db.DateTime, default=datetime.utcnow)
+    date_fin = db.Column(db.DateTime)
+    # Progression, mise à jour à chaque lot validé
+    date_maj = db.Column(db.DateTime, default=datetime.utcnow)
+    dernier_patient_id = db.Column(db.Integer)
+    factures = db.Column(db.Integer, nullable=False, default=0)
+    locations = db.Column(db.Integer, nullable=False, default=0)
+    montant_ht = db.Column(db.Float, nullable=False, default=0)
+    erreur = db.Column(db.Text)
+    
+    def __repr__(self):
+        return f'<BillingRun {self.periode} {self.statut}>'
+
+class RentalBilling(db.Model):
+    __tablename__ = 'rental_billings'
+    __table_args__ = (
+        # Garantie d'idempotence : une location n'est facturée qu'une fois par période
+        db.UniqueConstraint('rental_id', 'periode', name='uq_rental_billings_rental_periode'),
+        db.Index('ix_rental_billings_periode_patient', 'periode', 'patient_id'),
+        db.Index('ix_rental_billings_facture_id', 'facture_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    rental_id = db.Column(db.Integer, db.ForeignKey('equipment_rentals.id'), nullable=False)
+    periode = db.Column(db.String(7), nullable=False)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
+    facture_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False)
+    
+    # Détail du calcul
+    date_debut = db.Column(db.Date, nullable=False)
+    date_fin = db.Column(db.Date, nullable=False)
+    jours = db.Column(db.Integer, nullable=False)
+    montant_ht = db.Column(db.Float, nullable=False)
+    
+    def __repr__(self):
+        return f'<RentalBilling {self.rental_id} {self.periode}>'
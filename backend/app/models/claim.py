@@ -0,0 +1,48 @@
+from app import db
+from datetime import datetime
+
+class ClaimSubmission(db.Model):
+    __tablename__ = 'claim_submissions'
+    __table_args__ = (
+        db.Index('ix_claim_submissions_assurance_periode', 'assurance_id', 'periode'),
+    )
+    
+    # Bordereau de demandes de remboursement transmis à un organisme payeur
+    id = db.Column(db.Integer, primary_key=True)
+    assurance_id = db.Column(db.Integer, db.ForeignKey('insurances.id'), nullable=False)
+    periode = db.Column(db.String(7), nullable=False)
+    format = db.Column(db.String(20), nullable=False)  # csv, largeur_fixe, xml
+    date_creation = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Totaux, connus avant l'écriture du fichier
+    factures = db.Column(db.Integer, nullable=False, default=0)
+    montant_ttc = db.Column(db.Float, nullable=False, default=0)
+    montant_prise_en_charge = db.Column(db.Float, nullable=False, default=0)
+    
+    # Relations
+    assurance = db.relationship('Insurance')
+    demandes = db.relationship('SubmittedClaim', back_populates='soumission', cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return f'<ClaimSubmission {self.assurance_id} {self.periode} #{self.id}>'
+
+class SubmittedClaim(db.Model):
+    __tablename__ = 'submitted_claims'
+    __table_args__ = (
+        # Une facture n'est transmise qu'une fois : les exports suivants
+        # n'émettent que les factures absentes de ce journal
+        db.UniqueConstraint('facture_id', name='uq_submitted_claims_facture_id'),
+        db.Index('ix_submitted_claims_soumission_id', 'soumission_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    soumission_id = db.Column(db.Integer, db.ForeignKey('claim_submissions.id'), nullable=False)
+    facture_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False)
+    # Part demandée à l'organisme au moment de la transmission
+    montant_prise_en_charge = db.Column(db.Float, nullable=False)
+    
+    # Relations
+    soumission = db.relationship('ClaimSubmission', back_populates='demandes')
+    
+    def __repr__(self):
+        return f'<SubmittedClaim {self.facture_id} #{self.soumission_id}>'
@@ -0,0 +1,15 @@
+from app import db
+
+class DashboardCounter(db.Model):
+    __tablename__ = 'dashboard_counters'
+    
+    # Compteur agrégé (« equipment_status ») ou membre d'un regroupement
+    # (« equipment_status:disponible »)
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Float, nullable=False, default=0)
+    # Date du dernier recalcul complet, portée par la ligne agrégée ;
+    # NULL lorsque le compteur doit être recalculé
+    valid_on = db.Column(db.Date)
+    
+    def __repr__(self):
+        return f'<DashboardCounter {self.name}={self.value}>'
@@ -3,6 +3,13 @@ from datetime import datetime
 
 class Equipment(db.Model):
     __tablename__ = 'equipments'
+    __table_args__ = (
+        db.Index('ix_equipments_type_numero_serie', 'type_equipement', 'numero_serie'),
+        db.Index('ix_equipments_statut_type_numero_serie', 'statut', 'type_equipement', 'numero_serie'),
+        db.Index('ix_equipments_date_prochaine_maintenance', 'date_prochaine_maintenance'),
+        db.Index('ix_equipments_date_derniere_maintenance', 'date_derniere_maintenance'),
+        db.Index('ix_equipments_patient_id', 'patient_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     numero_serie = db.Column(db.String(50), unique=True, nullable=False)
@@ -3,6 +3,12 @@ from datetime import datetime
 
 class EquipmentRental(db.Model):
     __tablename__ = 'equipment_rentals'
+    __table_args__ = (
+        db.Index('ix_equipment_rentals_date_debut', 'date_debut', 'id'),
+        db.Index('ix_equipment_rentals_actif_date_fin', 'actif', 'date_fin'),
+        db.Index('ix_equipment_rentals_patient_date_debut', 'patient_id', 'date_debut'),
+        db.Index('ix_equipment_rentals_equipment_date_debut', 'equipment_id', 'date_debut'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
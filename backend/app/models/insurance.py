@@ -23,6 +23,8 @@ class Insurance(db.Model):
     
     # Informations de paiement
     delai_paiement = db.Column(db.Integer, default=30)  # en jours
+    # Format des bordereaux de remboursement attendu par l'organisme
+    format_bordereau = db.Column(db.String(20), default='csv')  # csv, largeur_fixe, xml
     
     # Métadonnées
     actif = db.Column(db.Boolean, default=True)
@@ -40,6 +42,9 @@ class Insurance(db.Model):
 
 class PatientInsurance(db.Model):
     __tablename__ = 'patient_insurances'
+    __table_args__ = (
+        db.Index('ix_patient_insurances_patient_id', 'patient_id', 'actif'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
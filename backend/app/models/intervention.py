@@ -3,6 +3,13 @@ from datetime import datetime
 
 class Intervention(db.Model):
     __tablename__ = 'interventions'
+    __table_args__ = (
+        db.Index('ix_interventions_date_planifiee', 'date_planifiee', 'id'),
+        db.Index('ix_interventions_statut_date_planifiee', 'statut', 'date_planifiee'),
+        db.Index('ix_interventions_technicien_date_planifiee', 'technicien_id', 'date_planifiee'),
+        db.Index('ix_interventions_patient_date_planifiee', 'patient_id', 'date_planifiee'),
+        db.Index('ix_interventions_equipement_date_planifiee', 'equipement_id', 'date_planifiee'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     type_intervention = db.Column(db.String(50), nullable=False)  # installation, maintenance, réparation, etc.
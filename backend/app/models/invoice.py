@@ -3,6 +3,17 @@ from datetime import datetime
 
 class Invoice(db.Model):
     __tablename__ = 'invoices'
+    __table_args__ = (
+        db.Index('ix_invoices_date_emission', 'date_emission', 'id'),
+        db.Index('ix_invoices_statut_date_echeance', 'statut', 'date_echeance'),
+        # Couvrant pour la balance âgée : lecture de l'index seul, déjà
+        # ordonnée par patient pour le regroupement
+        db.Index('ix_invoices_aging', 'statut', 'patient_id', 'date_echeance', 'assurance_id',
+                 'montant_ttc', 'montant_prise_en_charge', 'reste_a_charge'),
+        db.Index('ix_invoices_statut_date_emission', 'statut', 'date_emission'),
+        db.Index('ix_invoices_date_emission_assurance', 'date_emission', 'assurance_id'),
+        db.Index('ix_invoices_patient_date_emission', 'patient_id', 'date_emission'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     numero_facture = db.Column(db.String(50), unique=True, nullable=False)
@@ -24,6 +35,8 @@ class Invoice(db.Model):
     date_paiement = db.Column(db.Date)
     methode_paiement = db.Column(db.String(50))
     reference_paiement = db.Column(db.String(100))
+    # Cumul des règlements reçus (paiements partiels compris)
+    montant_regle = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
     
     # Assurance et prise en charge
     assurance_id = db.Column(db.Integer, db.ForeignKey('insurances.id'))
@@ -44,6 +57,7 @@ class Invoice(db.Model):
     patient = db.relationship('Patient', back_populates='factures')
     assurance = db.relationship('Insurance', back_populates='factures')
     items = db.relationship('InvoiceItem', back_populates='facture', cascade='all, delete-orphan')
+    paiements = db.relationship('InvoicePayment', back_populates='facture', cascade='all, delete-orphan')
     locations = db.relationship('EquipmentRental', back_populates='facture')
     
     def __repr__(self):
@@ -60,6 +74,10 @@ class Invoice(db.Model):
 
 class InvoiceItem(db.Model):
     __tablename__ = 'invoice_items'
+    __table_args__ = (
+        db.Index('ix_invoice_items_facture_id', 'facture_id'),
+        db.Index('ix_invoice_items_intervention_id', 'intervention_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     facture_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False)
@@ -84,3 +102,27 @@ class InvoiceItem(db.Model):
     def __repr__(self):
         return f'<InvoiceItem {self.description}>'
 
+
+class InvoicePayment(db.Model):
+    __tablename__ = 'invoice_payments'
+    __table_args__ = (
+        db.Index('ix_invoice_payments_facture_id', 'facture_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    facture_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False)
+    
+    montant = db.Column(db.Float, nullable=False)
+    date_paiement = db.Column(db.Date, nullable=False)
+    methode_paiement = db.Column(db.String(50))
+    # Identifiant de l'opération bancaire : un relevé réimporté n'est pas
+    # appliqué deux fois
+    reference_bancaire = db.Column(db.String(100), unique=True)
+    libelle = db.Column(db.String(500))
+    date_creation = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relations
+    facture = db.relationship('Invoice', back_populates='paiements')
+    
+    def __repr__(self):
+        return f'<InvoicePayment {self.facture_id} {self.montant}>'
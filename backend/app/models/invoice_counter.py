@@ -0,0 +1,22 @@
+from app import db
+
+class InvoiceCounter(db.Model):
+    __tablename__ = 'invoice_counters'
+    
+    # Un compteur par mois d'émission (« 202610 ») : dernier numéro attribué
+    mois = db.Column(db.String(6), primary_key=True)
+    dernier = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<InvoiceCounter {self.mois}={self.dernier}>'
+
+class InvoiceNumberReserve(db.Model):
+    __tablename__ = 'invoice_number_reserve'
+    
+    # Numéros réservés au compteur et pas encore attribués : pris (DELETE)
+    # dans la transaction de l'appelant, ils y reviennent si elle est annulée
+    mois = db.Column(db.String(6), primary_key=True)
+    sequence = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    
+    def __repr__(self):
+        return f'<InvoiceNumberReserve {self.mois}-{self.sequence}>'
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class MedicalRecord(db.Model):
     __tablename__ = 'medical_records'
+    __table_args__ = (
+        db.Index('ix_medical_records_date_creation', 'date_creation', 'id'),
+        db.Index('ix_medical_records_patient_date_creation', 'patient_id', 'date_creation'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
@@ -36,7 +40,7 @@ class MedicalRecord(db.Model):
     
     # Métadonnées
     actif = db.Column(db.Boolean, default=True)
-    date_creation = db.Column(db.DateTime, default=datetime.utcnow)
+    date_creation = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     date_modification = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relations
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Patient(db.Model):
     __tablename__ = 'patients'
+    __table_args__ = (
+        db.Index('ix_patients_nom_prenom', 'nom', 'prenom', 'id'),
+        db.Index('ix_patients_actif_nom_prenom', 'actif', 'nom', 'prenom'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nom = db.Column(db.String(100), nullable=False)
@@ -0,0 +1,13 @@
+from app import db
+
+class RevenueDaily(db.Model):
+    __tablename__ = 'revenue_daily'
+    
+    # Chiffre d'affaires encaissé, agrégé par date d'émission des factures payées
+    jour = db.Column(db.Date, primary_key=True)
+    montant_ht = db.Column(db.Float, nullable=False, default=0)
+    montant_ttc = db.Column(db.Float, nullable=False, default=0)
+    nombre_factures = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<RevenueDaily {self.jour} {self.montant_ttc}>'
@@ -0,0 +1,27 @@
+from app import db
+
+class SchedulerLease(db.Model):
+    __tablename__ = 'scheduler_leases'
+    
+    # Bail du planificateur : le processus qui le détient (et le renouvelle
+    # avant expiration) est le seul à exécuter les tâches
+    name = db.Column(db.String(64), primary_key=True)
+    owner = db.Column(db.String(128), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<SchedulerLease {self.name} {self.owner}>'
+
+class ScheduledJob(db.Model):
+    __tablename__ = 'scheduled_jobs'
+    
+    name = db.Column(db.String(64), primary_key=True)
+    # Début (UTC) de la dernière exécution réussie et jour (local) couvert
+    last_run_at = db.Column(db.DateTime)
+    valid_on = db.Column(db.Date)
+    # Dernière tentative, réussie ou non
+    last_attempt_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    
+    def __repr__(self):
+        return f'<ScheduledJob {self.name}>'
@@ -32,6 +32,9 @@ class Service(db.Model):
 
 class ServiceIntervention(db.Model):
     __tablename__ = 'service_interventions'
+    __table_args__ = (
+        db.Index('ix_service_interventions_intervention_id', 'intervention_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     intervention_id = db.Column(db.Integer, db.ForeignKey('interventions.id'), nullable=False)
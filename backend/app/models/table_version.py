@@ -0,0 +1,11 @@
+from app import db
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+    
+    # Compteur monotone incrémenté à chaque écriture sur la table
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<TableVersion {self.table_name} v{self.version}>'
@@ -0,0 +1,27 @@
+from app import db
+
+class OverdueInterventionSnapshot(db.Model):
+    __tablename__ = 'overdue_interventions_snapshot'
+    __table_args__ = (
+        db.Index('ix_overdue_interventions_snapshot_date_planifiee', 'date_planifiee'),
+    )
+    
+    # Interventions planifiées dont la date était passée lors du dernier calcul
+    intervention_id = db.Column(db.Integer, db.ForeignKey('interventions.id', ondelete='CASCADE'), primary_key=True)
+    date_planifiee = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<OverdueInterventionSnapshot {self.intervention_id}>'
+
+class MaintenanceDueSnapshot(db.Model):
+    __tablename__ = 'maintenance_due_snapshot'
+    __table_args__ = (
+        db.Index('ix_maintenance_due_snapshot_date_prochaine_maintenance', 'date_prochaine_maintenance'),
+    )
+    
+    # Équipements dont la maintenance était due (ou proche) lors du dernier calcul
+    equipment_id = db.Column(db.Integer, db.ForeignKey('equipments.id', ondelete='CASCADE'), primary_key=True)
+    date_prochaine_maintenance = db.Column(db.Date)
+    
+    def __repr__(self):
+        return f'<MaintenanceDueSnapshot {self.equipment_id}>'
@@ -0,0 +1,60 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app.models.equipment import Equipment
+from app.models.equipment_rental import EquipmentRental
+from app.models.intervention import Intervention
+from app.models.patient import Patient
+from app.services.analytics_service import AnalyticsService
+from app.utils.versioning import etag_headers, make_etag, not_modified
+from datetime import datetime
+
+analytics_bp = Blueprint('analytics', __name__)
+
+@analytics_bp.route('/utilization', methods=['GET'])
+@jwt_required()
+def get_utilization():
+    """Get rented, assigned, maintenance and idle days of the fleet"""
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end_date = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+    except ValueError:
+        return jsonify({"error": "Dates must use the YYYY-MM-DD format"}), 400
+    
+    # Revalidation : les périodes par défaut dépendent de la date du jour
+    etag = make_etag(
+        [Equipment.__tablename__, EquipmentRental.__tablename__, Intervention.__tablename__],
+        datetime.now().date()
+    )
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    try:
+        utilization = AnalyticsService.get_utilization(
+            start_date, end_date, request.args.get('group_by', 'type_equipement')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(utilization), 200, etag_headers(etag)
+
+@analytics_bp.route('/maintenance-forecast', methods=['GET'])
+@jwt_required()
+def get_maintenance_forecast():
+    """Get the weekly maintenance visit forecast by equipment type and city"""
+    try:
+        weeks = int(request.args.get('weeks', 26))
+    except ValueError:
+        return jsonify({"error": "weeks must be an integer"}), 400
+    
+    etag = make_etag([Equipment.__tablename__, Patient.__tablename__], datetime.now().date())
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    try:
+        forecast = AnalyticsService.get_maintenance_forecast(weeks)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(forecast), 200, etag_headers(etag)
@@ -0,0 +1,57 @@
+import threading
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+from app import db
+from app.schemas import billing_run_schema
+from app.services.billing_service import BillingService
+
+billing_bp = Blueprint('billing', __name__)
+
+def _process_run(app, period):
+    # Campagne hors requête : sa propre session, l'état est suivi en base
+    with app.app_context():
+        try:
+            BillingService.process_run(period)
+        except Exception:
+            app.logger.exception('Facturation de la période %s en échec', period)
+        finally:
+            db.session.remove()
+
+@billing_bp.route('/runs', methods=['POST'])
+@jwt_required()
+def start_run():
+    """Start (or resume) the month-end billing run of a period"""
+    data = request.get_json() or {}
+    period = data.get('period')
+    
+    try:
+        BillingService.get_run(period)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Une seule campagne par période à la fois
+    try:
+        BillingService.claim_run(period)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 409
+    
+    threading.Thread(
+        target=_process_run, args=(current_app._get_current_object(), period),
+        name=f'billing-{period}', daemon=True
+    ).start()
+    
+    return jsonify(billing_run_schema.dump(BillingService.get_run(period))), 202
+
+@billing_bp.route('/runs/<period>', methods=['GET'])
+@jwt_required()
+def get_run(period):
+    """Get the progress of the billing run of a period"""
+    try:
+        run = BillingService.get_run(period)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if run is None:
+        return jsonify({"error": "Billing run not found"}), 404
+    
+    return jsonify(billing_run_schema.dump(run)), 200
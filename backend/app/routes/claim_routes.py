@@ -0,0 +1,50 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app.schemas import claim_submission_schema
+from app.services.claim_service import ClaimService
+from app.utils.streaming import stream_text
+
+claim_bp = Blueprint('claims', __name__)
+
+@claim_bp.route('/submissions', methods=['POST'])
+@jwt_required()
+def create_submission():
+    """Create a claim submission with the insurer's invoices not yet submitted"""
+    data = request.get_json() or {}
+    if not data.get('assurance_id'):
+        return jsonify({"error": "assurance_id is required"}), 400
+    
+    try:
+        submission = ClaimService.create_submission(data['assurance_id'], data.get('period'), data.get('format'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if submission is None:
+        return jsonify({"message": "No new invoice to submit"}), 200
+    return jsonify(claim_submission_schema.dump(submission)), 201
+
+@claim_bp.route('/submissions/<int:id>', methods=['GET'])
+@jwt_required()
+def get_submission(id):
+    """Get a claim submission"""
+    submission = ClaimService.get_submission(id)
+    if submission is None:
+        return jsonify({"error": "Claim submission not found"}), 404
+    
+    return jsonify(claim_submission_schema.dump(submission)), 200
+
+@claim_bp.route('/submissions/<int:id>/file', methods=['GET'])
+@jwt_required()
+def get_submission_file(id):
+    """Stream the claim file of a submission in the insurer's format"""
+    submission = ClaimService.get_submission(id)
+    if submission is None:
+        return jsonify({"error": "Claim submission not found"}), 404
+    
+    try:
+        writer, chunks = ClaimService.export_submission(submission)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    filename = f'bordereau_{submission.assurance_id}_{submission.periode}_{submission.id}.{writer.extension}'
+    return stream_text(chunks, writer.mimetype, filename)
@@ -1,11 +1,14 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
 from flask_jwt_extended import jwt_required
 from app.models.patient import Patient
 from app.models.equipment import Equipment
 from app.models.intervention import Intervention
 from app.models.invoice import Invoice
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from app.models.revenue_daily import RevenueDaily
+from app.services.dashboard_service import DashboardService
+from app.utils.live_dashboard import broker, event_stream
+from app.utils.versioning import etag_headers, make_etag, not_modified
+from datetime import datetime
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -13,55 +16,65 @@ dashboard_bp = Blueprint('dashboard', __name__)
 @jwt_required()
 def get_dashboard_stats():
     """Get statistical data for the dashboard"""
-    # Statistiques de base
-    total_patients = Patient.query.filter_by(actif=True).count()
-    total_equipments = Equipment.query.count()
-    
-    # Équipements par statut
-    equipment_by_status = db.session.query(
-        Equipment.statut, func.count(Equipment.id)
-    ).group_by(Equipment.statut).all()
-    equipment_status_stats = {status: count for status, count in equipment_by_status}
-    
-    # Interventions à venir
+    # Revalidation : les statistiques relatives dépendent aussi de la date
     today = datetime.now().date()
-    next_week = today + timedelta(days=7)
-    upcoming_interventions = Intervention.query.filter(
-        Intervention.date_planifiee >= today,
-        Intervention.date_planifiee <= next_week,
-        Intervention.statut == 'planifiée'
-    ).count()
-    
-    # Interventions par statut
-    intervention_by_status = db.session.query(
-        Intervention.statut, func.count(Intervention.id)
-    ).group_by(Intervention.statut).all()
-    intervention_status_stats = {status: count for status, count in intervention_by_status}
+    etag = make_etag(
+        [Patient.__tablename__, Equipment.__tablename__, Intervention.__tablename__, Invoice.__tablename__],
+        today
+    )
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
     
-    # Factures impayées
-    unpaid_invoices = Invoice.query.filter(
-        Invoice.statut == 'en attente',
-        Invoice.date_echeance < today
-    ).count()
-    
-    # Chiffre d'affaires du mois en cours
-    current_month_start = datetime(today.year, today.month, 1).date()
-    next_month_start = (current_month_start + timedelta(days=32)).replace(day=1)
-    current_month_revenue = db.session.query(func.sum(Invoice.montant_ttc)).filter(
-        Invoice.date_emission >= current_month_start,
-        Invoice.date_emission < next_month_start,
-        Invoice.statut == 'payée'
-    ).scalar() or 0
+    summary = DashboardService.get_stats_summary()
     
     # Assemblage des statistiques
     stats = {
-        "total_patients": total_patients,
-        "total_equipments": total_equipments,
-        "equipment_by_status": equipment_status_stats,
-        "upcoming_interventions": upcoming_interventions,
-        "intervention_by_status": intervention_status_stats,
-        "unpaid_invoices": unpaid_invoices,
-        "current_month_revenue": float(current_month_revenue)
+        "total_patients": summary["patients_count"],
+        "total_equipments": summary["equipments_count"],
+        "equipment_by_status": summary["equipment_status"],
+        "upcoming_interventions": summary["upcoming_interventions"],
+        "intervention_by_status": summary["intervention_status"],
+        "unpaid_invoices": summary["unpaid_invoices"],
+        "current_month_revenue": summary["current_month_revenue"]
     }
     
-    return jsonify(stats), 200
+    return jsonify(stats), 200, etag_headers(etag)
+
+@dashboard_bp.route('/revenue', methods=['GET'])
+@jwt_required()
+def get_revenue():
+    """Get revenue between two dates, bucketed by day, week, month or quarter"""
+    try:
+        today = datetime.now().date()
+        start = request.args.get('start')
+        end = request.args.get('end')
+        end_date = datetime.strptime(end, '%Y-%m-%d').date() if end else today
+        start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else end_date.replace(day=1)
+    except ValueError:
+        return jsonify({"error": "Dates must use the YYYY-MM-DD format"}), 400
+    
+    # Revalidation : le cumul ne change qu'avec les factures (ou un recalcul)
+    etag = make_etag([Invoice.__tablename__, RevenueDaily.__tablename__], today)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    try:
+        revenue = DashboardService.get_revenue_series(start_date, end_date, request.args.get('bucket', 'day'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(revenue), 200, etag_headers(etag)
+
+@dashboard_bp.route('/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_dashboard():
+    """Stream dashboard counter changes as server-sent events"""
+    # EventSource ne permet pas d'en-tête : le jeton peut passer en ?jwt=
+    app = current_app._get_current_object()
+    subscriber, snapshot = broker.subscribe(app)
+    
+    return Response(
+        event_stream(subscriber, snapshot, app.config['DASHBOARD_STREAM_HEARTBEAT']),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -4,11 +4,19 @@ from marshmallow import ValidationError
 from app.models.equipment_rental import EquipmentRental
 from app.schemas.equipment_rental_schema import equipment_rental_schema, equipment_rentals_schema
 from app import db
+from app.utils.eager_loading import loader_options
+from app.utils.fieldsets import get_requested_fields, restrict_columns, select_schema
+from app.utils.pagination import get_pagination_args, paginate
+from app.utils.serializers import serializer_for
+from app.utils.streaming import stream_json_array, wants_stream
+from app.utils.instrumentation import query_budget
+from app.utils.versioning import collection_etag, etag_headers, not_modified
 
 rental_bp = Blueprint('rentals', __name__)
 
 @rental_bp.route('', methods=['GET'])
 @jwt_required()
+@query_budget(max_queries=4)
 def get_rentals():
     """Get all equipment rentals with filtering options"""
     # Extraction des paramètres de requête pour le filtrage
@@ -29,23 +37,60 @@ def get_rentals():
         query = query.filter(EquipmentRental.actif == actif_bool)
     
     # Ordonnancement
-    query = query.order_by(EquipmentRental.date_debut.desc())
+    order = [EquipmentRental.date_debut, EquipmentRental.id]
     
-    # Exécution de la requête
-    rentals = query.all()
+    # Champs demandés (?fields=), appliqués au schéma et aux colonnes SQL
+    try:
+        schema = select_schema(equipment_rentals_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    query = restrict_columns(query, EquipmentRental, schema, order)
+    query = query.options(*loader_options(EquipmentRental, schema))
+    
+    # Revalidation : 304 sans requête de données ni sérialisation si rien n'a changé
+    etag = collection_etag(EquipmentRental, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
     
-    return jsonify(equipment_rentals_schema.dump(rentals)), 200
+    # Mode flux : tableau JSON complet, sérialisé par lots
+    if wants_stream():
+        response = stream_json_array(query.order_by(*[c.desc() for c in order]), schema)
+        response.headers.update(etag_headers(etag))
+        return response
+    
+    # Pagination par curseur (keyset)
+    try:
+        limit, cursor = get_pagination_args()
+        rentals, next_cursor = paginate(query, order, limit, cursor, descending=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "items": serializer_for(schema).dump(rentals),
+        "next_cursor": next_cursor
+    }), 200, etag_headers(etag)
 
 @rental_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_rental(id):
     """Get a specific equipment rental by ID"""
-    rental = EquipmentRental.query.get(id)
+    try:
+        schema = select_schema(equipment_rental_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    etag = collection_etag(EquipmentRental, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    rental = restrict_columns(EquipmentRental.query, EquipmentRental, schema).options(
+        *loader_options(EquipmentRental, schema)
+    ).get(id)
     
     if not rental:
         return jsonify({"error": "Equipment rental not found"}), 404
     
-    return jsonify(equipment_rental_schema.dump(rental)), 200
+    return jsonify(schema.dump(rental)), 200, etag_headers(etag)
 
 @rental_bp.route('', methods=['POST'])
 @jwt_required()
@@ -4,11 +4,19 @@ from marshmallow import ValidationError
 from app.models.equipment import Equipment
 from app.schemas.equipment_schema import equipment_schema, equipments_schema
 from app import db
+from app.utils.eager_loading import loader_options
+from app.utils.fieldsets import get_requested_fields, restrict_columns, select_schema
+from app.utils.pagination import get_pagination_args, paginate
+from app.utils.serializers import serializer_for
+from app.utils.streaming import stream_json_array, wants_stream
+from app.utils.instrumentation import query_budget
+from app.utils.versioning import collection_etag, etag_headers, not_modified
 
 equipment_bp = Blueprint('equipments', __name__)
 
 @equipment_bp.route('', methods=['GET'])
 @jwt_required()
+@query_budget(max_queries=4)
 def get_equipments():
     """Get all equipments with filtering options"""
     # Extraction des paramètres de requête pour le filtrage
@@ -28,23 +36,60 @@ def get_equipments():
         query = query.filter(Equipment.patient_id == patient_id)
     
     # Ordonnancement
-    query = query.order_by(Equipment.type_equipement, Equipment.numero_serie)
+    order = [Equipment.type_equipement, Equipment.numero_serie, Equipment.id]
     
-    # Exécution de la requête
-    equipments = query.all()
+    # Champs demandés (?fields=), appliqués au schéma et aux colonnes SQL
+    try:
+        schema = select_schema(equipments_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    query = restrict_columns(query, Equipment, schema, order)
+    query = query.options(*loader_options(Equipment, schema))
+    
+    # Revalidation : 304 sans requête de données ni sérialisation si rien n'a changé
+    etag = collection_etag(Equipment, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
     
-    return jsonify(equipments_schema.dump(equipments)), 200
+    # Mode flux : tableau JSON complet, sérialisé par lots
+    if wants_stream():
+        response = stream_json_array(query.order_by(*order), schema)
+        response.headers.update(etag_headers(etag))
+        return response
+    
+    # Pagination par curseur (keyset)
+    try:
+        limit, cursor = get_pagination_args()
+        equipments, next_cursor = paginate(query, order, limit, cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "items": serializer_for(schema).dump(equipments),
+        "next_cursor": next_cursor
+    }), 200, etag_headers(etag)
 
 @equipment_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_equipment(id):
     """Get a specific equipment by ID"""
-    equipment = Equipment.query.get(id)
+    try:
+        schema = select_schema(equipment_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    etag = collection_etag(Equipment, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    equipment = restrict_columns(Equipment.query, Equipment, schema).options(
+        *loader_options(Equipment, schema)
+    ).get(id)
     
     if not equipment:
         return jsonify({"error": "Equipment not found"}), 404
     
-    return jsonify(equipment_schema.dump(equipment)), 200
+    return jsonify(schema.dump(equipment)), 200, etag_headers(etag)
 
 @equipment_bp.route('', methods=['POST'])
 @jwt_required()
@@ -3,15 +3,25 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
 from app.models.intervention import Intervention
 from app.models.service import ServiceIntervention
+from app.services.intervention_service import InterventionService
 from app.schemas.intervention_schema import intervention_schema, interventions_schema
 from app.schemas.service_schema import service_intervention_schema, service_interventions_schema
 from app import db
-from datetime import datetime
+from app.utils.eager_loading import loader_options
+from app.utils.fieldsets import get_requested_fields, restrict_columns, select_schema
+from app.utils.pagination import get_pagination_args, paginate
+from app.utils.serializers import serializer_for
+from app.utils.streaming import stream_json_array, wants_stream
+from app.utils.instrumentation import query_budget
+from app.utils.versioning import collection_etag, etag_headers, not_modified
+from app.utils.collection_sync import sync_children
+from datetime import datetime, timedelta
 
 intervention_bp = Blueprint('interventions', __name__)
 
 @intervention_bp.route('', methods=['GET'])
 @jwt_required()
+@query_budget(max_queries=4)
 def get_interventions():
     """Get all interventions with filtering options"""
     # Extraction des paramètres de requête pour le filtrage
@@ -46,23 +56,80 @@ def get_interventions():
             pass  # Ignorer les filtres de date si le format est incorrect
     
     # Ordonnancement
-    query = query.order_by(Intervention.date_planifiee)
+    order = [Intervention.date_planifiee, Intervention.id]
     
-    # Exécution de la requête
-    interventions = query.all()
+    # Champs demandés (?fields=), appliqués au schéma et aux colonnes SQL
+    try:
+        schema = select_schema(interventions_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    query = restrict_columns(query, Intervention, schema, order)
+    query = query.options(*loader_options(Intervention, schema))
+    
+    # Revalidation : 304 sans requête de données ni sérialisation si rien n'a changé
+    etag = collection_etag(Intervention, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    # Mode flux : tableau JSON complet, sérialisé par lots
+    if wants_stream():
+        response = stream_json_array(query.order_by(*order), schema)
+        response.headers.update(etag_headers(etag))
+        return response
+    
+    # Pagination par curseur (keyset)
+    try:
+        limit, cursor = get_pagination_args()
+        interventions, next_cursor = paginate(query, order, limit, cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "items": serializer_for(schema).dump(interventions),
+        "next_cursor": next_cursor
+    }), 200, etag_headers(etag)
+
+@intervention_bp.route('/workload', methods=['GET'])
+@jwt_required()
+def get_workload():
+    """Get the technician x day workload matrix for a date window"""
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else datetime.now().date()
+        end_date = datetime.strptime(end, '%Y-%m-%d').date() if end else start_date + timedelta(days=13)
+    except ValueError:
+        return jsonify({"error": "Dates must use the YYYY-MM-DD format"}), 400
+    
+    try:
+        workload = InterventionService.get_workload_matrix(start_date, end_date)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    return jsonify(interventions_schema.dump(interventions)), 200
+    # Le résultat est mis en cache côté serveur : pas de cache client
+    return jsonify(workload), 200, {'Cache-Control': 'no-cache'}
 
 @intervention_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_intervention(id):
     """Get a specific intervention by ID"""
-    intervention = Intervention.query.get(id)
+    try:
+        schema = select_schema(intervention_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    etag = collection_etag(Intervention, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    intervention = restrict_columns(Intervention.query, Intervention, schema).options(
+        *loader_options(Intervention, schema)
+    ).get(id)
     
     if not intervention:
         return jsonify({"error": "Intervention not found"}), 404
     
-    return jsonify(intervention_schema.dump(intervention)), 200
+    return jsonify(schema.dump(intervention)), 200, etag_headers(etag)
 
 @intervention_bp.route('', methods=['POST'])
 @jwt_required()
@@ -127,14 +194,8 @@ def update_intervention(id):
         
         # Gestion des services associés si fournis
         if services_data is not None:
-            # Supprimer les services existants
-            ServiceIntervention.query.filter_by(intervention_id=intervention.id).delete()
-            
-            # Ajouter les nouveaux services
-            for service_data in services_data:
-                service_data['intervention_id'] = intervention.id
-                service_intervention = ServiceIntervention(**service_data)
-                db.session.add(service_intervention)
+            # Seules les lignes ajoutées, modifiées ou retirées sont écrites
+            sync_children(ServiceIntervention, 'intervention_id', intervention.id, services_data)
         
         db.session.commit()
         
@@ -1,14 +1,25 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_file
 from flask_jwt_extended import jwt_required
 from marshmallow import ValidationError
 from app.models.invoice import Invoice, InvoiceItem
 from app.schemas.invoice_schema import invoice_schema, invoices_schema, invoice_item_schema
 from app import db
+from app.services.invoice_service import InvoiceService
+from app.services.reconciliation_service import ReconciliationService
+from app.utils.eager_loading import loader_options
+from app.utils.collection_sync import sync_children
+from app.utils.fieldsets import get_requested_fields, restrict_columns, select_schema
+from app.utils.pagination import get_pagination_args, paginate
+from app.utils.serializers import serializer_for
+from app.utils.streaming import stream_json_array, wants_stream
+from app.utils.instrumentation import query_budget
+from app.utils.versioning import collection_etag, etag_headers, not_modified
 
 invoice_bp = Blueprint('invoices', __name__)
 
 @invoice_bp.route('', methods=['GET'])
 @jwt_required()
+@query_budget(max_queries=4)
 def get_invoices():
     """Get all invoices with filtering options"""
     # Extraction des paramètres de requête pour le filtrage
@@ -25,23 +36,94 @@ def get_invoices():
         query = query.filter(Invoice.statut == statut)
     
     # Ordonnancement
-    query = query.order_by(Invoice.date_emission.desc())
+    order = [Invoice.date_emission, Invoice.id]
     
-    # Exécution de la requête
-    invoices = query.all()
+    # Champs demandés (?fields=), appliqués au schéma et aux colonnes SQL
+    try:
+        schema = select_schema(invoices_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    query = restrict_columns(query, Invoice, schema, order)
+    query = query.options(*loader_options(Invoice, schema))
+    
+    # Revalidation : 304 sans requête de données ni sérialisation si rien n'a changé
+    etag = collection_etag(Invoice, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    # Mode flux : tableau JSON complet, sérialisé par lots
+    if wants_stream():
+        response = stream_json_array(query.order_by(*[c.desc() for c in order]), schema)
+        response.headers.update(etag_headers(etag))
+        return response
+    
+    # Pagination par curseur (keyset)
+    try:
+        limit, cursor = get_pagination_args()
+        invoices, next_cursor = paginate(query, order, limit, cursor, descending=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "items": serializer_for(schema).dump(invoices),
+        "next_cursor": next_cursor
+    }), 200, etag_headers(etag)
+
+@invoice_bp.route('/reconcile', methods=['POST'])
+@jwt_required()
+def reconcile_payments():
+    """Reconcile a bank statement (CSV or CAMT.053) against pending invoices"""
+    statement = request.files.get('file')
+    if statement is None:
+        return jsonify({"error": "No statement file provided"}), 400
+    
+    # Relevé lu au fil du téléversement, rapproché par lots
+    try:
+        report = ReconciliationService.reconcile_statement(
+            statement.stream,
+            statement_format=request.form.get('format') or request.args.get('format'),
+            filename=statement.filename,
+            encoding=request.form.get('encoding') or request.args.get('encoding', 'utf-8-sig'),
+            dry_run=(request.form.get('dry_run') or request.args.get('dry_run', '')).lower() == 'true'
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    return jsonify(invoices_schema.dump(invoices)), 200
+    return jsonify(report), 200
 
 @invoice_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_invoice(id):
     """Get a specific invoice by ID"""
-    invoice = Invoice.query.get(id)
+    try:
+        schema = select_schema(invoice_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    etag = collection_etag(Invoice, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    invoice = restrict_columns(Invoice.query, Invoice, schema).options(
+        *loader_options(Invoice, schema)
+    ).get(id)
     
     if not invoice:
         return jsonify({"error": "Invoice not found"}), 404
     
-    return jsonify(invoice_schema.dump(invoice)), 200
+    return jsonify(schema.dump(invoice)), 200, etag_headers(etag)
+
+@invoice_bp.route('/<int:id>/pdf', methods=['GET'])
+@jwt_required()
+def get_invoice_pdf(id):
+    """Download the PDF document of an invoice"""
+    try:
+        path = InvoiceService.get_invoice_document(id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    
+    # Document nommé par son empreinte : l'ETag du fichier suit son contenu
+    return send_file(path, mimetype='application/pdf', download_name=f'facture-{id}.pdf', conditional=True)
 
 @invoice_bp.route('', methods=['POST'])
 @jwt_required()
@@ -59,6 +141,10 @@ def create_invoice():
         # Validation via Marshmallow
         invoice_data = invoice_schema.load(invoice_data)
         
+        # Numéro attribué par le compteur mensuel si non fourni
+        if not invoice_data.get('numero_facture'):
+            invoice_data['numero_facture'] = InvoiceService.generate_invoice_number(invoice_data['date_emission'])
+        
         # Création de la facture
         invoice = Invoice(**invoice_data)
         db.session.add(invoice)
@@ -106,14 +192,8 @@ def update_invoice(id):
         
         # Gestion des items s'ils sont fournis
         if items_data is not None:
-            # Supprimer les items existants
-            InvoiceItem.query.filter_by(facture_id=invoice.id).delete()
-            
-            # Ajouter les nouveaux items
-            for item_data in items_data:
-                item_data['facture_id'] = invoice.id
-                invoice_item = InvoiceItem(**item_data)
-                db.session.add(invoice_item)
+            # Seules les lignes ajoutées, modifiées ou retirées sont écrites
+            sync_children(InvoiceItem, 'facture_id', invoice.id, items_data)
         
         db.session.commit()
         
@@ -4,11 +4,19 @@ from marshmallow import ValidationError
 from app.models.medical_record import MedicalRecord
 from app.schemas.medical_record_schema import medical_record_schema, medical_records_schema
 from app import db
+from app.utils.eager_loading import loader_options
+from app.utils.fieldsets import get_requested_fields, restrict_columns, select_schema
+from app.utils.pagination import get_pagination_args, paginate
+from app.utils.serializers import serializer_for
+from app.utils.streaming import stream_json_array, wants_stream
+from app.utils.instrumentation import query_budget
+from app.utils.versioning import collection_etag, etag_headers, not_modified
 
 medical_record_bp = Blueprint('medical_records', __name__)
 
 @medical_record_bp.route('', methods=['GET'])
 @jwt_required()
+@query_budget(max_queries=4)
 def get_medical_records():
     """Get all medical records with filtering options"""
     # Extraction des paramètres de requête pour le filtrage
@@ -26,23 +34,60 @@ def get_medical_records():
         query = query.filter(MedicalRecord.actif == actif_bool)
     
     # Ordonnancement
-    query = query.order_by(MedicalRecord.date_creation.desc())
+    order = [MedicalRecord.date_creation, MedicalRecord.id]
     
-    # Exécution de la requête
-    records = query.all()
+    # Champs demandés (?fields=), appliqués au schéma et aux colonnes SQL
+    try:
+        schema = select_schema(medical_records_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    query = restrict_columns(query, MedicalRecord, schema, order)
+    query = query.options(*loader_options(MedicalRecord, schema))
+    
+    # Revalidation : 304 sans requête de données ni sérialisation si rien n'a changé
+    etag = collection_etag(MedicalRecord, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
     
-    return jsonify(medical_records_schema.dump(records)), 200
+    # Mode flux : tableau JSON complet, sérialisé par lots
+    if wants_stream():
+        response = stream_json_array(query.order_by(*[c.desc() for c in order]), schema)
+        response.headers.update(etag_headers(etag))
+        return response
+    
+    # Pagination par curseur (keyset)
+    try:
+        limit, cursor = get_pagination_args()
+        records, next_cursor = paginate(query, order, limit, cursor, descending=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "items": serializer_for(schema).dump(records),
+        "next_cursor": next_cursor
+    }), 200, etag_headers(etag)
 
 @medical_record_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_medical_record(id):
     """Get a specific medical record by ID"""
-    record = MedicalRecord.query.get(id)
+    try:
+        schema = select_schema(medical_record_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    etag = collection_etag(MedicalRecord, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    record = restrict_columns(MedicalRecord.query, MedicalRecord, schema).options(
+        *loader_options(MedicalRecord, schema)
+    ).get(id)
     
     if not record:
         return jsonify({"error": "Medical record not found"}), 404
     
-    return jsonify(medical_record_schema.dump(record)), 200
+    return jsonify(schema.dump(record)), 200, etag_headers(etag)
 
 @medical_record_bp.route('', methods=['POST'])
 @jwt_required()
@@ -3,12 +3,44 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
 from app.models.patient import Patient
 from app.schemas.patient_schema import patient_schema, patients_schema
+from app.schemas import (
+    equipments_schema, equipment_rentals_schema, interventions_schema,
+    invoices_schema, medical_records_schema
+)
+from app.services.patient_service import OVERVIEW_COLLECTIONS, OVERVIEW_LIMIT, PatientService
 from app import db
+from app.utils.eager_loading import loader_options
+from app.utils.fieldsets import get_requested_fields, restrict_columns, select_schema
+from app.utils.pagination import get_pagination_args, paginate, parse_limit
+from app.utils.serializers import serializer_for
+from app.utils.streaming import stream_json_array, wants_stream
+from app.utils.instrumentation import query_budget
+from app.utils.versioning import collection_etag, etag_headers, make_etag, not_modified, tables_for
+from app.utils.patient_search import search_filter
 
 patient_bp = Blueprint('patients', __name__)
 
+def _without_patient(schema):
+    # Le patient est déjà en tête de la vue d'ensemble
+    return select_schema(schema, tuple(name for name in schema.dump_fields if name != 'patient'))
+
+OVERVIEW_SCHEMAS = {
+    'equipements': _without_patient(equipments_schema),
+    'locations': _without_patient(equipment_rentals_schema),
+    'interventions': _without_patient(interventions_schema),
+    'factures': _without_patient(invoices_schema),
+    'dossiers_medicaux': _without_patient(medical_records_schema),
+}
+
+def _overview_etag(collections):
+    tables = {Patient.__tablename__}
+    for name in collections:
+        tables.update(tables_for(OVERVIEW_COLLECTIONS[name][0], OVERVIEW_SCHEMAS[name]))
+    return make_etag(tables)
+
 @patient_bp.route('', methods=['GET'])
 @jwt_required()
+@query_budget(max_queries=4)
 def get_patients():
     """Get all patients with filtering options"""
     # Extraction des paramètres de requête pour le filtrage
@@ -21,31 +53,126 @@ def get_patients():
     
     # Application des filtres
     if nom:
-        query = query.filter(Patient.nom.ilike(f'%{nom}%'))
+        query = query.filter(search_filter(nom, columns=('nom',)))
     if prenom:
-        query = query.filter(Patient.prenom.ilike(f'%{prenom}%'))
+        query = query.filter(search_filter(prenom, columns=('prenom',)))
     if actif is not None:
         actif_bool = actif.lower() == 'true'
         query = query.filter(Patient.actif == actif_bool)
     
     # Ordonnancement
-    query = query.order_by(Patient.nom, Patient.prenom)
+    order = [Patient.nom, Patient.prenom, Patient.id]
     
-    # Exécution de la requête
-    patients = query.all()
+    # Champs demandés (?fields=), appliqués au schéma et aux colonnes SQL
+    try:
+        schema = select_schema(patients_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    query = restrict_columns(query, Patient, schema, order)
+    query = query.options(*loader_options(Patient, schema))
     
-    return jsonify(patients_schema.dump(patients)), 200
+    # Revalidation : 304 sans requête de données ni sérialisation si rien n'a changé
+    etag = collection_etag(Patient, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    # Mode flux : tableau JSON complet, sérialisé par lots
+    if wants_stream():
+        response = stream_json_array(query.order_by(*order), schema)
+        response.headers.update(etag_headers(etag))
+        return response
+    
+    # Pagination par curseur (keyset)
+    try:
+        limit, cursor = get_pagination_args()
+        patients, next_cursor = paginate(query, order, limit, cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "items": serializer_for(schema).dump(patients),
+        "next_cursor": next_cursor
+    }), 200, etag_headers(etag)
 
 @patient_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_patient(id):
     """Get a specific patient by ID"""
-    patient = Patient.query.get(id)
+    try:
+        schema = select_schema(patient_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    etag = collection_etag(Patient, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    patient = restrict_columns(Patient.query, Patient, schema).options(
+        *loader_options(Patient, schema)
+    ).get(id)
     
     if not patient:
         return jsonify({"error": "Patient not found"}), 404
     
-    return jsonify(patient_schema.dump(patient)), 200
+    return jsonify(schema.dump(patient)), 200, etag_headers(etag)
+
+@patient_bp.route('/<int:id>/overview', methods=['GET'])
+@jwt_required()
+@query_budget(max_queries=10)
+def get_patient_overview(id):
+    """Get a patient with the first page of each related collection"""
+    # Taille de page commune (?limit=) ou propre à une collection (?interventions_limit=)
+    try:
+        default = request.args.get('limit', OVERVIEW_LIMIT)
+        limits = {
+            name: parse_limit(request.args.get(f'{name}_limit', default))
+            for name in OVERVIEW_COLLECTIONS
+        }
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    etag = _overview_etag(OVERVIEW_COLLECTIONS)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    patient = Patient.query.get(id)
+    if not patient:
+        return jsonify({"error": "Patient not found"}), 404
+    
+    overview = {"patient": patient_schema.dump(patient)}
+    for name, schema in OVERVIEW_SCHEMAS.items():
+        items, next_cursor = PatientService.get_overview_page(id, name, schema, limits[name])
+        overview[name] = {
+            "items": serializer_for(schema).dump(items),
+            "next_cursor": next_cursor
+        }
+    
+    return jsonify(overview), 200, etag_headers(etag)
+
+@patient_bp.route('/<int:id>/overview/<collection>', methods=['GET'])
+@jwt_required()
+def get_patient_overview_page(id, collection):
+    """Get the next page of one collection of the patient overview"""
+    if collection not in OVERVIEW_COLLECTIONS:
+        return jsonify({"error": "Collection not found"}), 404
+    schema = OVERVIEW_SCHEMAS[collection]
+    
+    etag = _overview_etag([collection])
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    try:
+        limit = parse_limit(request.args.get('limit', OVERVIEW_LIMIT))
+        items, next_cursor = PatientService.get_overview_page(
+            id, collection, schema, limit, request.args.get('cursor') or None
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "items": serializer_for(schema).dump(items),
+        "next_cursor": next_cursor
+    }), 200, etag_headers(etag)
 
 @patient_bp.route('', methods=['POST'])
 @jwt_required()
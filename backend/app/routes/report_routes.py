@@ -0,0 +1,46 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app.models.invoice import Invoice
+from app.models.patient import Patient
+from app.models.insurance import Insurance
+from app.services.report_service import AGING_AMOUNTS, AGING_BUCKETS, ReportService
+from app.utils.streaming import stream_csv
+from app.utils.versioning import etag_headers, make_etag, not_modified
+from datetime import datetime
+
+report_bp = Blueprint('reports', __name__)
+
+@report_bp.route('/aging', methods=['GET'])
+@jwt_required()
+def get_aging_report():
+    """Get aged receivables of pending invoices, by patient or by insurer"""
+    group_by = request.args.get('group_by', 'patient')
+    as_of = request.args.get('as_of')
+    try:
+        as_of = datetime.strptime(as_of, '%Y-%m-%d').date() if as_of else datetime.now().date()
+    except ValueError:
+        return jsonify({"error": "as_of must use the YYYY-MM-DD format"}), 400
+    
+    # Revalidation : la balance dépend des factures, des libellés et de la date
+    etag = make_etag([Invoice.__tablename__, Patient.__tablename__, Insurance.__tablename__], as_of)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    try:
+        if request.args.get('format') == 'csv':
+            # Validation du regroupement avant l'envoi des premiers octets
+            ReportService.aging_query(group_by, as_of)
+            columns = ['group_id', 'nom'] + (['prenom'] if group_by == 'patient' else [])
+            columns += [f'{bucket}_{name}' for bucket, _, _ in AGING_BUCKETS for name in AGING_AMOUNTS + ('count',)]
+            response = stream_csv(
+                columns, ReportService.aging_rows(group_by, as_of),
+                f'balance_agee_{group_by}_{as_of.isoformat()}.csv'
+            )
+            response.headers.update(etag_headers(etag))
+            return response
+        
+        report = ReportService.get_aging_report(group_by, as_of)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(report), 200, etag_headers(etag)
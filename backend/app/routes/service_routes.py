@@ -4,6 +4,12 @@ from marshmallow import ValidationError
 from app.models.service import Service
 from app.schemas.service_schema import service_schema, services_schema
 from app import db
+from app.utils.eager_loading import loader_options
+from app.utils.fieldsets import get_requested_fields, restrict_columns, select_schema
+from app.utils.pagination import get_pagination_args, paginate
+from app.utils.serializers import serializer_for
+from app.utils.streaming import stream_json_array, wants_stream
+from app.utils.versioning import collection_etag, etag_headers, not_modified
 
 service_bp = Blueprint('services', __name__)
 
@@ -26,23 +32,60 @@ def get_services():
         query = query.filter(Service.actif == actif_bool)
     
     # Ordonnancement
-    query = query.order_by(Service.type, Service.nom)
+    order = [Service.type, Service.nom, Service.id]
     
-    # Exécution de la requête
-    services = query.all()
+    # Champs demandés (?fields=), appliqués au schéma et aux colonnes SQL
+    try:
+        schema = select_schema(services_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    query = restrict_columns(query, Service, schema, order)
+    query = query.options(*loader_options(Service, schema))
+    
+    # Revalidation : 304 sans requête de données ni sérialisation si rien n'a changé
+    etag = collection_etag(Service, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
     
-    return jsonify(services_schema.dump(services)), 200
+    # Mode flux : tableau JSON complet, sérialisé par lots
+    if wants_stream():
+        response = stream_json_array(query.order_by(*order), schema)
+        response.headers.update(etag_headers(etag))
+        return response
+    
+    # Pagination par curseur (keyset)
+    try:
+        limit, cursor = get_pagination_args()
+        services, next_cursor = paginate(query, order, limit, cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "items": serializer_for(schema).dump(services),
+        "next_cursor": next_cursor
+    }), 200, etag_headers(etag)
 
 @service_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_service(id):
     """Get a specific service by ID"""
-    service = Service.query.get(id)
+    try:
+        schema = select_schema(service_schema, get_requested_fields())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    etag = collection_etag(Service, schema)
+    if not_modified(etag):
+        return '', 304, etag_headers(etag)
+    
+    service = restrict_columns(Service.query, Service, schema).options(
+        *loader_options(Service, schema)
+    ).get(id)
     
     if not service:
         return jsonify({"error": "Service not found"}), 404
     
-    return jsonify(service_schema.dump(service)), 200
+    return jsonify(schema.dump(service)), 200, etag_headers(etag)
 
 @service_bp.route('', methods=['POST'])
 @jwt_required()
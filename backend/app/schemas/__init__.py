@@ -6,4 +6,6 @@ from app.schemas.medical_record_schema import medical_record_schema, medical_rec
 from app.schemas.insurance_schema import insurance_schema, insurances_schema, patient_insurance_schema, patient_insurances_schema
 from app.schemas.invoice_schema import invoice_schema, invoices_schema, invoice_item_schema, invoice_items_schema
 from app.schemas.service_schema import service_schema, services_schema, service_intervention_schema, service_interventions_schema
-from app.schemas.equipment_rental_schema import equipment_rental_schema, equipment_rentals_schema
\ No newline at end of file
+from app.schemas.equipment_rental_schema import equipment_rental_schema, equipment_rentals_schema
+from app.schemas.billing_schema import billing_run_schema
+from app.schemas.claim_schema import claim_submission_schema
\ No newline at end of file
@@ -0,0 +1,19 @@
+from marshmallow import Schema, fields
+from app.models.billing import BillingRun
+
+class BillingRunSchema(Schema):
+    periode = fields.Str(dump_only=True)
+    statut = fields.Str(dump_only=True)
+    
+    date_debut = fields.DateTime(dump_only=True)
+    date_fin = fields.DateTime(dump_only=True)
+    date_maj = fields.DateTime(dump_only=True)
+    
+    # Progression
+    dernier_patient_id = fields.Int(dump_only=True)
+    factures = fields.Int(dump_only=True)
+    locations = fields.Int(dump_only=True)
+    montant_ht = fields.Float(dump_only=True)
+    erreur = fields.Str(dump_only=True)
+
+billing_run_schema = BillingRunSchema()
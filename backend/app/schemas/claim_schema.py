@@ -0,0 +1,18 @@
+from marshmallow import Schema, fields
+from app.models.claim import ClaimSubmission
+
+class ClaimSubmissionSchema(Schema):
+    id = fields.Int(dump_only=True)
+    assurance_id = fields.Int(dump_only=True)
+    periode = fields.Str(dump_only=True)
+    format = fields.Str(dump_only=True)
+    date_creation = fields.DateTime(dump_only=True)
+    
+    # Totaux du bordereau
+    factures = fields.Int(dump_only=True)
+    montant_ttc = fields.Float(dump_only=True)
+    montant_prise_en_charge = fields.Float(dump_only=True)
+    
+    assurance = fields.Nested('InsuranceSchema', only=('id', 'nom'), dump_only=True)
+
+claim_submission_schema = ClaimSubmissionSchema()
@@ -25,7 +25,7 @@ invoice_items_schema = InvoiceItemSchema(many=True)
 
 class InvoiceSchema(Schema):
     id = fields.Int(dump_only=True)
-    numero_facture = fields.Str(required=True)
+    numero_facture = fields.Str()  # Attribué par le compteur mensuel si absent
     patient_id = fields.Int(required=True)
     
     date_emission = fields.Date(required=True)
@@ -41,6 +41,7 @@ class InvoiceSchema(Schema):
     date_paiement = fields.Date(allow_none=True)
     methode_paiement = fields.Str(allow_none=True)
     reference_paiement = fields.Str(allow_none=True)
+    montant_regle = fields.Float(dump_only=True)
     
     assurance_id = fields.Int(allow_none=True)
     numero_dossier_assurance = fields.Str(allow_none=True)
@@ -0,0 +1,241 @@
+import numpy as np
+from app.models.equipment import Equipment
+from app.models.equipment_rental import EquipmentRental
+from app.models.intervention import Intervention
+from app.models.patient import Patient
+from sqlalchemy import func, or_, select
+from app import db
+from app.utils.intervals import EPOCH, covered_days, day_number, load_columns, to_day
+from app.utils.worklists import MAINTENANCE_PERIOD_DAYS
+from datetime import datetime, timedelta
+
+UTILIZATION_GROUPS = ('equipment', 'type_equipement', 'modele', 'fabricant')
+MAINTENANCE_TYPES = ('maintenance', 'réparation')
+MAX_FORECAST_WEEKS = 104
+# Jour absent (colonne NULL) dans les tableaux de jours
+NO_DAY = -(2 ** 31)
+
+
+class AnalyticsService:
+    @staticmethod
+    def _load_fleet(end):
+        """
+        Charge le parc : tableaux d'identifiants, d'acquisition et
+        d'attribution (en jours), triés par identifiant
+        """
+        last = to_day(end)
+        connection = db.session.connection()
+        ids, acquisition, attribution, fin_attribution = load_columns(connection, select(
+            Equipment.id,
+            day_number(Equipment.date_acquisition),
+            func.coalesce(day_number(Equipment.date_attribution), last),
+            func.coalesce(day_number(Equipment.date_fin_attribution), last)
+        ).where(Equipment.date_acquisition < end).order_by(Equipment.id), 4)
+        return {
+            'id': ids,
+            'acquisition': acquisition,
+            'attribution': attribution,
+            'fin_attribution': fin_attribution,
+        }
+    
+    @staticmethod
+    def _load_labels(end, group_by):
+        """
+        Libellés des équipements du parc, dans l'ordre de `_load_fleet`
+        """
+        columns = [Equipment.id, Equipment.numero_serie, Equipment.type_equipement] if group_by == 'equipment' \
+            else [getattr(Equipment, group_by)]
+        return db.session.execute(
+            select(*columns).where(Equipment.date_acquisition < end).order_by(Equipment.id)
+        ).all()
+    
+    @staticmethod
+    def _load_rentals(start, end):
+        """
+        Locations chevauchant la période : (equipment_id, début, fin) en jours
+        """
+        # Location en cours : jusqu'à la fin de la période ; date de fin incluse
+        return load_columns(db.session.connection(), select(
+            EquipmentRental.equipment_id,
+            day_number(EquipmentRental.date_debut),
+            func.coalesce(day_number(EquipmentRental.date_fin) + 1, to_day(end))
+        ).where(
+            EquipmentRental.date_debut < end,
+            or_(EquipmentRental.date_fin == None, EquipmentRental.date_fin >= start)
+        ), 3)
+    
+    @staticmethod
+    def _load_maintenance(start, end):
+        """
+        Interventions de maintenance chevauchant la période : jours touchés
+        """
+        begin = func.coalesce(Intervention.date_debut, Intervention.date_planifiee)
+        # Sans date de fin, l'intervention occupe son jour de début
+        return load_columns(db.session.connection(), select(
+            Intervention.equipement_id,
+            day_number(begin),
+            func.coalesce(day_number(Intervention.date_fin), day_number(begin)) + 1
+        ).where(
+            Intervention.type_intervention.in_(MAINTENANCE_TYPES),
+            Intervention.statut != 'annulée',
+            Intervention.equipement_id != None,
+            begin < end,
+            or_(Intervention.date_fin == None, Intervention.date_fin >= start)
+        ), 3)
+    
+    @staticmethod
+    def get_utilization(start_date=None, end_date=None, group_by='type_equipement'):
+        """
+        Répartition des jours du parc entre location, attribution,
+        maintenance et inactivité, par équipement ou par regroupement.
+        
+        Chaque jour d'un équipement (à partir de son acquisition) reçoit une
+        seule catégorie, par priorité : loué, attribué, en maintenance, inactif.
+        Les unions successives sont calculées par balayage vectorisé
+        (`covered_days`), sans parcours ligne à ligne.
+        """
+        if group_by not in UTILIZATION_GROUPS:
+            raise ValueError(f"Regroupement invalide : {group_by} (attendu : {', '.join(UTILIZATION_GROUPS)})")
+        end_date = end_date or datetime.now().date()
+        start_date = start_date or end_date - timedelta(days=365)
+        if start_date > end_date:
+            raise ValueError("La date de début doit précéder la date de fin")
+        
+        # Période [start, end) en jours ; la date de fin est incluse
+        end = end_date + timedelta(days=1)
+        first, last = to_day(start_date), to_day(end)
+        
+        fleet = AnalyticsService._load_fleet(end)
+        size = len(fleet['id'])
+        lower = np.maximum(fleet['acquisition'], first)
+        
+        def intervals(owners, starts, ends):
+            # Identifiant -> rang dans le parc, puis bornage à la période utile
+            if not size:
+                return np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+            index = np.minimum(np.searchsorted(fleet['id'], owners), size - 1)
+            # Équipements acquis après la période : hors du parc étudié
+            known = fleet['id'][index] == owners
+            index, starts, ends = index[known], starts[known], ends[known]
+            return index, np.maximum(starts, lower[index]), np.minimum(ends, last)
+        
+        rentals = intervals(*AnalyticsService._load_rentals(start_date, end))
+        assignments = intervals(fleet['id'], fleet['attribution'], fleet['fin_attribution'])
+        maintenance = intervals(*AnalyticsService._load_maintenance(start_date, end))
+        
+        def union(*parts):
+            return covered_days(*(np.concatenate(column) for column in zip(*parts)), size)
+        
+        available = np.maximum(last - lower, 0)
+        rented = union(rentals)
+        rented_or_assigned = union(rentals, assignments)
+        occupied = union(rentals, assignments, maintenance)
+        
+        days = {
+            'jours_disponibles': available,
+            'jours_loues': rented,
+            'jours_attribues': rented_or_assigned - rented,
+            'jours_maintenance': occupied - rented_or_assigned,
+            'jours_inactifs': available - occupied,
+        }
+        
+        rows = AnalyticsService._load_labels(end, group_by)
+        if group_by == 'equipment':
+            keys, inverse = fleet['id'], np.arange(size)
+            labels = [{"id": i, "numero_serie": s, "type_equipement": t} for i, s, t in rows]
+        else:
+            keys, inverse = np.unique(np.array([r[0] for r in rows], dtype=str), return_inverse=True)
+            labels = [{group_by: str(k)} for k in keys]
+        
+        # Agrégation par groupe : une somme pondérée par catégorie
+        totals = {
+            name: np.bincount(inverse, weights=values, minlength=len(keys)).astype(np.int64)
+            for name, values in days.items()
+        }
+        counts = np.bincount(inverse, minlength=len(keys))
+        
+        groups = []
+        for position, label in enumerate(labels):
+            group = dict(label)
+            group["equipements"] = int(counts[position])
+            for name, values in totals.items():
+                group[name] = int(values[position])
+            disponibles = group['jours_disponibles']
+            utilises = group['jours_loues'] + group['jours_attribues']
+            group["taux_utilisation"] = round(utilises / disponibles, 4) if disponibles else None
+            groups.append(group)
+        
+        return {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "group_by": group_by,
+            "groups": groups
+        }
+    
+    @staticmethod
+    def get_maintenance_forecast(weeks=26, start_date=None):
+        """
+        Prévision des visites de maintenance par semaine, type d'équipement
+        et ville du patient, pour le parc non réformé.
+        
+        Chaque équipement est dû à sa date de prochaine maintenance (à défaut,
+        un cycle après sa dernière maintenance ou son acquisition), puis à
+        chaque cycle suivant, comme le replanifie `complete_intervention`.
+        Une échéance déjà passée compte dans la première semaine. Toutes les
+        dates sont projetées d'un bloc (tableau équipements × cycles).
+        """
+        if not 1 <= weeks <= MAX_FORECAST_WEEKS:
+            raise ValueError(f"Le nombre de semaines doit être compris entre 1 et {MAX_FORECAST_WEEKS}")
+        start_date = start_date or datetime.now().date()
+        # Semaines du lundi au dimanche, à partir de la semaine en cours
+        start_date -= timedelta(days=start_date.weekday())
+        first, last = to_day(start_date), to_day(start_date) + 7 * weeks
+        
+        rows = db.session.execute(select(
+            func.coalesce(day_number(Equipment.date_prochaine_maintenance), NO_DAY),
+            func.coalesce(day_number(Equipment.date_derniere_maintenance), NO_DAY),
+            day_number(Equipment.date_acquisition),
+            Equipment.type_equipement,
+            Patient.ville
+        ).outerjoin(Patient, Patient.id == Equipment.patient_id).where(Equipment.statut != 'réformé')).all()
+        
+        def column(position):
+            return np.fromiter((row[position] for row in rows), dtype=np.int64, count=len(rows))
+        
+        prochaine, derniere, acquisition = column(0), column(1), column(2)
+        due = np.where(
+            prochaine != NO_DAY, prochaine,
+            np.where(derniere != NO_DAY, derniere, acquisition) + MAINTENANCE_PERIOD_DAYS
+        )
+        # Arriéré : rattrapé dès la première semaine, le cycle repart de là
+        due = np.maximum(due, first)
+        
+        # Regroupement (type, ville) : un indice entier par équipement
+        keys = {}
+        group = np.fromiter(
+            (keys.setdefault((row[3], row[4]), len(keys)) for row in rows),
+            dtype=np.int64, count=len(rows)
+        )
+        
+        cycles = (last - first) // MAINTENANCE_PERIOD_DAYS + 1
+        visits = due[:, None] + MAINTENANCE_PERIOD_DAYS * np.arange(cycles)
+        groups = np.broadcast_to(group[:, None], visits.shape)
+        planned = visits < last
+        week = (visits[planned] - first) // 7
+        counts = np.bincount(groups[planned] * weeks + week, minlength=len(keys) * weeks).reshape(len(keys), weeks)
+        
+        forecast = []
+        for (type_equipement, ville), position in sorted(keys.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+            forecast.append({
+                "type_equipement": type_equipement,
+                "ville": ville,
+                "visites": counts[position].tolist(),
+                "total": int(counts[position].sum())
+            })
+        
+        return {
+            "start_date": start_date.isoformat(),
+            "weeks": [(EPOCH + timedelta(days=first + 7 * week)).isoformat() for week in range(weeks)],
+            "groups": forecast,
+            "totals": counts.sum(axis=0).tolist() if len(keys) else [0] * weeks
+        }
@@ -0,0 +1,284 @@
+from app.models.billing import BillingRun, RentalBilling
+from app.models.equipment import Equipment
+from app.models.equipment_rental import EquipmentRental
+from app.models.invoice import Invoice, InvoiceItem
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.utils.invoice_documents import render_documents
+from app.utils.invoice_numbers import allocate_numbers
+from datetime import datetime, timedelta
+import calendar
+
+# Un mois de location mensuelle ou forfaitaire vaut JOURS_PAR_MOIS jours de tarif
+JOURS_PAR_MOIS = 30
+BILLING_MODES = ('journalier', 'mensuel', 'forfaitaire')
+BILLING_CHUNK_SIZE = 500
+# Une campagne « en cours » sans progression depuis ce délai est reprise
+BILLING_STALE_AFTER = timedelta(minutes=10)
+TAUX_TVA_LOCATION = 20.0
+DELAI_PAIEMENT_JOURS = 30
+
+_RUNS = BillingRun.__table__
+
+
+def parse_period(value):
+    """
+    Convertit « AAAA-MM » en (premier jour, dernier jour) du mois
+    """
+    try:
+        start = datetime.strptime(value or '', '%Y-%m').date()
+    except ValueError:
+        raise ValueError("Période invalide (format attendu : AAAA-MM)")
+    end = start.replace(day=calendar.monthrange(start.year, start.month)[1])
+    return start, end
+
+
+def rental_charge(mode, tarif, date_debut, date_fin, period_start, period_end):
+    """
+    Facturation d'une location sur une période selon son mode :
+
+    - journalier (et mode absent) : jours loués × tarif journalier ;
+    - mensuel : mois de JOURS_PAR_MOIS jours, au prorata des jours loués ;
+    - forfaitaire : mois complet dès qu'un jour est loué.
+
+    Retourne (début, fin, jours, quantité, prix unitaire, montant HT).
+    """
+    start = max(date_debut, period_start)
+    end = min(date_fin or period_end, period_end)
+    jours = (end - start).days + 1
+    mois = JOURS_PAR_MOIS * tarif
+
+    if mode == 'mensuel':
+        quantite = round(jours / ((period_end - period_start).days + 1), 4)
+        prix_unitaire = mois
+    elif mode == 'forfaitaire':
+        quantite, prix_unitaire = 1, mois
+    else:
+        quantite, prix_unitaire = jours, tarif
+
+    return start, end, jours, quantite, prix_unitaire, round(quantite * prix_unitaire, 2)
+
+
+class BillingService:
+    @staticmethod
+    def get_run(period):
+        """
+        État de la campagne de facturation d'une période (None si aucune)
+        """
+        parse_period(period)
+        return BillingRun.query.get(period)
+    
+    @staticmethod
+    def claim_run(period, now=None):
+        """
+        Ouvre (ou reprend) la campagne d'une période ; refuse si une autre
+        campagne de la période progresse encore
+        """
+        now = now or datetime.utcnow()
+        connection = db.session.connection()
+        values = {'statut': 'en cours', 'date_maj': now, 'date_fin': None, 'erreur': None, 'dernier_patient_id': None}
+        
+        claimed = connection.execute(_RUNS.update().where(
+            _RUNS.c.periode == period,
+            or_(_RUNS.c.statut != 'en cours', _RUNS.c.date_maj < now - BILLING_STALE_AFTER)
+        ).values(**values)).rowcount
+        if not claimed:
+            exists = connection.execute(select(_RUNS.c.periode).where(_RUNS.c.periode == period)).first()
+            if exists:
+                raise ValueError(f"Une facturation de la période {period} est déjà en cours")
+            try:
+                with connection.begin_nested():
+                    connection.execute(_RUNS.insert().values(
+                        periode=period, date_debut=now, factures=0, locations=0, montant_ht=0, **values
+                    ))
+            except IntegrityError:
+                raise ValueError(f"Une facturation de la période {period} est déjà en cours")
+        db.session.commit()
+    
+    @staticmethod
+    def run_billing(period, chunk_size=BILLING_CHUNK_SIZE, today=None, progress=None):
+        """
+        Facture toutes les locations de la période qui ne l'ont pas encore été
+        """
+        parse_period(period)
+        BillingService.claim_run(period)
+        return BillingService.process_run(period, chunk_size, today, progress)
+    
+    @staticmethod
+    def process_run(period, chunk_size=BILLING_CHUNK_SIZE, today=None, progress=None):
+        """
+        Traite une campagne ouverte par `claim_run`.
+        
+        Les patients sont traités par lots, dans l'ordre de leur identifiant ;
+        chaque lot (factures, lignes, journal des locations facturées) est
+        validé d'un bloc. Le journal porte une contrainte d'unicité (location,
+        période) et les locations déjà journalisées sont exclues : relancer la
+        campagne après une interruption reprend le travail sans doublon.
+        """
+        period_start, period_end = parse_period(period)
+        today = today or datetime.now().date()
+        
+        after = None
+        try:
+            while True:
+                patient_ids = BillingService._next_patients(period, period_start, period_end, after, chunk_size)
+                if not patient_ids:
+                    break
+                factures, locations, montant_ht = BillingService._bill_patients(
+                    period, period_start, period_end, patient_ids, today
+                )
+                after = patient_ids[-1]
+                db.session.connection().execute(_RUNS.update().where(_RUNS.c.periode == period).values(
+                    date_maj=datetime.utcnow(),
+                    dernier_patient_id=after,
+                    factures=_RUNS.c.factures + factures,
+                    locations=_RUNS.c.locations + locations,
+                    montant_ht=_RUNS.c.montant_ht + montant_ht
+                ))
+                db.session.commit()
+                if progress:
+                    progress(after, factures, locations)
+        except Exception as e:
+            db.session.rollback()
+            db.session.connection().execute(_RUNS.update().where(_RUNS.c.periode == period).values(
+                statut='en échec', date_maj=datetime.utcnow(), erreur=str(e)
+            ))
+            db.session.commit()
+            raise
+        
+        db.session.connection().execute(_RUNS.update().where(_RUNS.c.periode == period).values(
+            statut='terminée', date_maj=datetime.utcnow(), date_fin=datetime.utcnow()
+        ))
+        db.session.commit()
+        return BillingRun.query.get(period)
+    
+    @staticmethod
+    def render_documents(period, workers=None, progress=None):
+        """
+        Rend les documents PDF des factures de location de la période ;
+        les factures inchangées depuis leur dernier rendu sont ignorées
+        """
+        parse_period(period)
+        invoice_ids = db.session.execute(
+            select(RentalBilling.facture_id).where(RentalBilling.periode == period)
+            .distinct().order_by(RentalBilling.facture_id)
+        ).scalars().all()
+        return render_documents(invoice_ids, workers, progress=progress)
+    
+    @staticmethod
+    def _unbilled(period, period_start, period_end):
+        """
+        Critères des locations actives sur la période et non encore facturées
+        (une location supprimée, `actif` faux, n'est plus facturée)
+        """
+        billed = select(RentalBilling.id).where(
+            RentalBilling.rental_id == EquipmentRental.id,
+            RentalBilling.periode == period
+        ).exists()
+        return [
+            EquipmentRental.actif == True,
+            EquipmentRental.date_debut <= period_end,
+            or_(EquipmentRental.date_fin == None, EquipmentRental.date_fin >= period_start),
+            ~billed
+        ]
+    
+    @staticmethod
+    def _next_patients(period, period_start, period_end, after, limit):
+        """
+        Lot suivant de patients ayant des locations à facturer (keyset)
+        """
+        query = select(EquipmentRental.patient_id).where(
+            *BillingService._unbilled(period, period_start, period_end)
+        )
+        if after is not None:
+            query = query.where(EquipmentRental.patient_id > after)
+        query = query.group_by(EquipmentRental.patient_id).order_by(EquipmentRental.patient_id).limit(limit)
+        return db.session.execute(query).scalars().all()
+    
+    @staticmethod
+    def _bill_patients(period, period_start, period_end, patient_ids, today):
+        """
+        Crée les factures d'un lot de patients par insertions groupées ;
+        retourne (factures, locations, montant HT)
+        """
+        rentals = db.session.execute(select(
+            EquipmentRental.id,
+            EquipmentRental.patient_id,
+            EquipmentRental.equipment_id,
+            EquipmentRental.date_debut,
+            EquipmentRental.date_fin,
+            EquipmentRental.tarif_journalier,
+            EquipmentRental.mode_facturation,
+            Equipment.type_equipement,
+            Equipment.numero_serie
+        ).join(Equipment, Equipment.id == EquipmentRental.equipment_id).where(
+            EquipmentRental.patient_id.in_(patient_ids),
+            *BillingService._unbilled(period, period_start, period_end)
+        ).order_by(EquipmentRental.patient_id, EquipmentRental.date_debut, EquipmentRental.id)).all()
+        
+        by_patient = {}
+        for rental in rentals:
+            start, end, jours, quantite, prix_unitaire, montant = rental_charge(
+                rental.mode_facturation, rental.tarif_journalier or 0,
+                rental.date_debut, rental.date_fin, period_start, period_end
+            )
+            by_patient.setdefault(rental.patient_id, []).append((rental, start, end, jours, quantite, prix_unitaire, montant))
+        
+        invoices = []
+        for patient_id, lines in by_patient.items():
+            montant_ht = round(sum(line[-1] for line in lines), 2)
+            invoices.append({
+                'patient_id': patient_id,
+                'date_emission': today,
+                'date_echeance': today + timedelta(days=DELAI_PAIEMENT_JOURS),
+                'montant_ht': montant_ht,
+                'taux_tva': TAUX_TVA_LOCATION,
+                'montant_ttc': round(montant_ht * (1 + TAUX_TVA_LOCATION / 100), 2),
+                'periode_debut': min(line[1] for line in lines),
+                'periode_fin': max(line[2] for line in lines),
+                'statut': 'en attente',
+                'notes': f'Facturation des locations {period}'
+            })
+        if not invoices:
+            return 0, 0, 0
+        
+        # Un bloc de numéros pour tout le lot, réservé juste avant l'insertion
+        numbers = allocate_numbers(db.session.connection(), today, len(invoices))
+        for invoice, numero_facture in zip(invoices, numbers):
+            invoice['numero_facture'] = numero_facture
+        
+        invoice_ids = db.session.execute(
+            insert(Invoice).returning(Invoice.id, sort_by_parameter_order=True), invoices
+        ).scalars().all()
+        
+        items, ledger, links = [], [], []
+        for invoice_id, lines in zip(invoice_ids, by_patient.values()):
+            for rental, start, end, jours, quantite, prix_unitaire, montant in lines:
+                items.append({
+                    'facture_id': invoice_id,
+                    'description': f'Location {rental.type_equipement} {rental.numero_serie} '
+                                   f'du {start:%d/%m/%Y} au {end:%d/%m/%Y}',
+                    'quantite': quantite,
+                    'prix_unitaire': prix_unitaire,
+                    'montant_total': montant,
+                    'equipement_id': rental.equipment_id
+                })
+                ledger.append({
+                    'rental_id': rental.id,
+                    'periode': period,
+                    'patient_id': rental.patient_id,
+                    'facture_id': invoice_id,
+                    'date_debut': start,
+                    'date_fin': end,
+                    'jours': jours,
+                    'montant_ht': montant
+                })
+                links.append({'id': rental.id, 'facture_id': invoice_id})
+        
+        db.session.execute(insert(InvoiceItem), items)
+        db.session.execute(insert(RentalBilling), ledger)
+        # Dernière facture de chaque location
+        db.session.execute(update(EquipmentRental), links)
+        
+        return len(invoices), len(ledger), round(sum(i['montant_ht'] for i in invoices), 2)
@@ -0,0 +1,132 @@
+from app.models.claim import ClaimSubmission, SubmittedClaim
+from app.models.insurance import Insurance, PatientInsurance
+from app.models.invoice import Invoice
+from app.models.patient import Patient
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.services.billing_service import parse_period
+from app.utils.claim_writers import get_writer, write_claims
+
+CLAIM_CHUNK_SIZE = 1000
+DEFAULT_CLAIM_FORMAT = 'csv'
+
+
+class ClaimService:
+    @staticmethod
+    def get_submission(submission_id):
+        """
+        Bordereau de remboursement (None s'il n'existe pas)
+        """
+        return ClaimSubmission.query.get(submission_id)
+    
+    @staticmethod
+    def _claimable(assurance_id, period_start, period_end):
+        """
+        Critères des factures à transmettre à un organisme : émises sur la
+        période, avec une part à sa charge, non annulées et jamais transmises
+        """
+        submitted = select(SubmittedClaim.id).where(SubmittedClaim.facture_id == Invoice.id).exists()
+        return [
+            Invoice.assurance_id == assurance_id,
+            Invoice.date_emission >= period_start,
+            Invoice.date_emission <= period_end,
+            Invoice.statut != 'annulée',
+            Invoice.montant_prise_en_charge > 0,
+            ~submitted
+        ]
+    
+    @staticmethod
+    def create_submission(assurance_id, period, claim_format=None):
+        """
+        Ouvre un bordereau avec les factures de l'organisme non encore
+        transmises pour la période.
+        
+        Les factures sont inscrites au journal des transmissions par une
+        seule instruction INSERT ... SELECT, sans transiter par l'application ;
+        la contrainte d'unicité du journal écarte une facture déjà prise par
+        un export concurrent. Sans nouvelle facture, rien n'est créé et la
+        méthode retourne None.
+        """
+        period_start, period_end = parse_period(period)
+        assurance = Insurance.query.get(assurance_id)
+        if not assurance:
+            raise ValueError("Assurance non trouvée")
+        claim_format = claim_format or assurance.format_bordereau or DEFAULT_CLAIM_FORMAT
+        get_writer(claim_format)
+        
+        submission = ClaimSubmission(assurance_id=assurance_id, periode=period, format=claim_format)
+        db.session.add(submission)
+        try:
+            db.session.flush()
+            db.session.execute(insert(SubmittedClaim).from_select(
+                ['soumission_id', 'facture_id', 'montant_prise_en_charge'],
+                select(literal(submission.id), Invoice.id, Invoice.montant_prise_en_charge).where(
+                    *ClaimService._claimable(assurance_id, period_start, period_end)
+                ).order_by(Invoice.id)
+            ))
+        except IntegrityError:
+            db.session.rollback()
+            raise ValueError("Un export concurrent a déjà transmis une partie de ces factures ; relancer l'export")
+        
+        factures, montant_ttc, montant_prise_en_charge = db.session.execute(select(
+            func.count(SubmittedClaim.id),
+            func.coalesce(func.sum(Invoice.montant_ttc), 0),
+            func.coalesce(func.sum(SubmittedClaim.montant_prise_en_charge), 0)
+        ).join(Invoice, Invoice.id == SubmittedClaim.facture_id).where(
+            SubmittedClaim.soumission_id == submission.id
+        )).one()
+        if not factures:
+            db.session.rollback()
+            return None
+        
+        submission.factures = factures
+        submission.montant_ttc = round(montant_ttc, 2)
+        submission.montant_prise_en_charge = round(montant_prise_en_charge, 2)
+        db.session.commit()
+        return submission
+    
+    @staticmethod
+    def claim_rows(submission_id, chunk_size=CLAIM_CHUNK_SIZE):
+        """
+        Demandes d'un bordereau, ligne par ligne (curseur serveur si
+        disponible) : la mémoire consommée ne dépend pas du nombre de factures
+        """
+        submission = select(ClaimSubmission.assurance_id).where(ClaimSubmission.id == submission_id).scalar_subquery()
+        # Numéro d'adhérent du patient auprès de l'organisme du bordereau
+        numero_adherent = select(PatientInsurance.numero_adherent).where(
+            PatientInsurance.patient_id == Invoice.patient_id,
+            PatientInsurance.assurance_id == submission
+        ).order_by(PatientInsurance.actif.desc(), PatientInsurance.date_debut.desc()).limit(1).scalar_subquery()
+        
+        query = select(
+            Invoice.numero_facture,
+            Invoice.date_emission,
+            Invoice.periode_debut,
+            Invoice.periode_fin,
+            Patient.nom,
+            Patient.prenom,
+            Patient.date_naissance,
+            Patient.numero_securite_sociale,
+            numero_adherent.label('numero_adherent'),
+            Invoice.numero_dossier_assurance,
+            Invoice.taux_prise_en_charge,
+            Invoice.montant_ttc,
+            SubmittedClaim.montant_prise_en_charge,
+            Invoice.reste_a_charge
+        ).join(Invoice, Invoice.id == SubmittedClaim.facture_id).join(
+            Patient, Patient.id == Invoice.patient_id
+        ).where(SubmittedClaim.soumission_id == submission_id).order_by(SubmittedClaim.id)
+        
+        result = db.session.execute(query, execution_options={'yield_per': chunk_size})
+        for row in result.mappings():
+            yield row
+    
+    @staticmethod
+    def export_submission(submission):
+        """
+        Fichier d'un bordereau dans le format de l'organisme : retourne
+        (format, morceaux de texte produits au fil de la lecture)
+        """
+        writer = get_writer(submission.format)
+        return writer, write_claims(writer, submission, ClaimService.claim_rows(submission.id))
@@ -4,70 +4,34 @@ from app.models.intervention import Intervention
 from app.models.invoice import Invoice
 from app.models.medical_record import MedicalRecord
 from app.models.equipment_rental import EquipmentRental
+from app.models.revenue_daily import RevenueDaily
 from sqlalchemy import func, and_, or_
 from app import db
+from app.utils.dashboard_counters import group, read_counters
 from datetime import datetime, timedelta
 
 class DashboardService:
     @staticmethod
     def get_stats_summary():
         """
-        Récupère un résumé des statistiques pour le tableau de bord
-        """
-        today = datetime.now().date()
-        
-        # Statistiques générales
-        patients_count = Patient.query.filter_by(actif=True).count()
-        equipments_count = Equipment.query.count()
-        
-        # Équipements par statut
-        equipment_by_status = db.session.query(
-            Equipment.statut, func.count(Equipment.id)
-        ).group_by(Equipment.statut).all()
-        equipment_status_stats = {status: count for status, count in equipment_by_status}
-        
-        # Interventions à venir
-        next_week = today + timedelta(days=7)
-        upcoming_interventions = Intervention.query.filter(
-            Intervention.date_planifiee >= today,
-            Intervention.date_planifiee <= next_week,
-            Intervention.statut == 'planifiée'
-        ).count()
-        
-        # Interventions par statut
-        intervention_by_status = db.session.query(
-            Intervention.statut, func.count(Intervention.id)
-        ).group_by(Intervention.statut).all()
-        intervention_status_stats = {status: count for status, count in intervention_by_status}
-        
-        # Factures impayées
-        unpaid_invoices = Invoice.query.filter(
-            Invoice.statut == 'en attente',
-            Invoice.date_echeance < today
-        ).count()
-        
-        # Équipements en retard pour la maintenance
-        maintenance_due = Equipment.query.filter(
-            Equipment.date_prochaine_maintenance < today,
-            Equipment.statut != 'réformé'
-        ).count()
+        Récupère un résumé des statistiques pour le tableau de bord.
         
-        # Locations actives
-        active_rentals = EquipmentRental.query.filter(
-            EquipmentRental.date_fin == None,
-            EquipmentRental.actif == True
-        ).count()
+        Les valeurs proviennent de `dashboard_counters`, tenu à jour par les
+        événements ORM : une seule lecture au lieu d'un COUNT par indicateur.
+        """
+        counters = read_counters()
         
         # Assemblage des statistiques
         return {
-            "patients_count": patients_count,
-            "equipments_count": equipments_count,
-            "equipment_status": equipment_status_stats,
-            "upcoming_interventions": upcoming_interventions,
-            "intervention_status": intervention_status_stats,
-            "unpaid_invoices": unpaid_invoices,
-            "maintenance_due": maintenance_due,
-            "active_rentals": active_rentals
+            "patients_count": int(counters.get('patients_actifs', 0)),
+            "equipments_count": int(counters.get('equipment_status', 0)),
+            "equipment_status": group(counters, 'equipment_status'),
+            "upcoming_interventions": int(counters.get('upcoming_interventions', 0)),
+            "intervention_status": group(counters, 'intervention_status'),
+            "unpaid_invoices": int(counters.get('unpaid_invoices', 0)),
+            "maintenance_due": int(counters.get('maintenance_due', 0)),
+            "active_rentals": int(counters.get('active_rentals', 0)),
+            "current_month_revenue": float(counters.get('current_month_revenue', 0))
         }
     
     @staticmethod
@@ -95,25 +59,16 @@ class DashboardService:
             start_date = today - timedelta(days=30)
             end_date = today + timedelta(days=1)
         
-        # Récupérer le chiffre d'affaires total
-        total_revenue = db.session.query(func.sum(Invoice.montant_ttc)).filter(
-            Invoice.date_emission >= start_date,
-            Invoice.date_emission < end_date,
-            Invoice.statut == 'payée'
-        ).scalar() or 0
-        
-        # Chiffre d'affaires par jour
-        daily_revenue = db.session.query(
-            func.date(Invoice.date_emission).label('day'),
-            func.sum(Invoice.montant_ttc).label('revenue')
-        ).filter(
-            Invoice.date_emission >= start_date,
-            Invoice.date_emission < end_date,
-            Invoice.statut == 'payée'
-        ).group_by('day').all()
+        # Chiffre d'affaires par jour, lu dans le cumul journalier
+        daily_revenue = db.session.query(RevenueDaily.jour, RevenueDaily.montant_ttc).filter(
+            RevenueDaily.jour >= start_date,
+            RevenueDaily.jour < end_date,
+            RevenueDaily.nombre_factures > 0
+        ).order_by(RevenueDaily.jour).all()
         
         # Formater les résultats
-        daily_data = {day.strftime('%Y-%m-%d'): float(revenue) for day, revenue in daily_revenue}
+        daily_data = {str(day): float(revenue) for day, revenue in daily_revenue}
+        total_revenue = sum(daily_data.values())
         
         return {
             "total_revenue": float(total_revenue),
@@ -122,3 +77,75 @@ class DashboardService:
             "end_date": (end_date - timedelta(days=1)).strftime('%Y-%m-%d'),
             "daily_data": daily_data
         }
+    
+    @staticmethod
+    def get_revenue_series(start_date, end_date, bucket='day'):
+        """
+        Chiffre d'affaires entre deux dates (incluses), regroupé par jour,
+        semaine, mois ou trimestre, à partir du cumul journalier
+        """
+        if bucket not in REVENUE_BUCKETS:
+            raise ValueError(f"Regroupement invalide : {bucket} (attendu : {', '.join(REVENUE_BUCKETS)})")
+        if start_date > end_date:
+            raise ValueError("La date de début doit précéder la date de fin")
+        
+        # Périodes vides incluses : la série est continue
+        buckets = {}
+        day = _bucket_start(start_date, bucket)
+        while day <= end_date:
+            buckets[day] = {"start": day.isoformat(), "montant_ht": 0.0, "montant_ttc": 0.0, "nombre_factures": 0}
+            day = _next_bucket(day, bucket)
+            if len(buckets) > MAX_REVENUE_BUCKETS:
+                raise ValueError(f"Trop de périodes (maximum {MAX_REVENUE_BUCKETS}) : élargir le regroupement")
+        
+        rows = db.session.query(
+            RevenueDaily.jour, RevenueDaily.montant_ht, RevenueDaily.montant_ttc, RevenueDaily.nombre_factures
+        ).filter(
+            RevenueDaily.jour >= start_date,
+            RevenueDaily.jour <= end_date
+        ).all()
+        
+        for jour, montant_ht, montant_ttc, nombre in rows:
+            entry = buckets[_bucket_start(jour, bucket)]
+            entry["montant_ht"] += montant_ht
+            entry["montant_ttc"] += montant_ttc
+            entry["nombre_factures"] += nombre
+        
+        series = list(buckets.values())
+        for entry in series:
+            entry["montant_ht"] = round(entry["montant_ht"], 2)
+            entry["montant_ttc"] = round(entry["montant_ttc"], 2)
+        
+        return {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "bucket": bucket,
+            "total_revenue": round(sum(e["montant_ttc"] for e in series), 2),
+            "buckets": series
+        }
+
+
+REVENUE_BUCKETS = ('day', 'week', 'month', 'quarter')
+MAX_REVENUE_BUCKETS = 3660
+
+
+def _bucket_start(day, bucket):
+    """
+    Premier jour de la période contenant `day` (semaine ISO : lundi)
+    """
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    if bucket == 'quarter':
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    return day
+
+
+def _next_bucket(day, bucket):
+    if bucket == 'week':
+        return day + timedelta(days=7)
+    if bucket in ('month', 'quarter'):
+        months = day.month - 1 + (3 if bucket == 'quarter' else 1)
+        return day.replace(year=day.year + months // 12, month=months % 12 + 1, day=1)
+    return day + timedelta(days=1)
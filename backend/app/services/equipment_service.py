@@ -1,8 +1,10 @@
 from app.models.equipment import Equipment
 from app.models.intervention import Intervention
+from app.models.worklist import MaintenanceDueSnapshot
 from app import db
 from datetime import datetime, timedelta
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select
+from app.utils.worklists import maintenance_due_ids, snapshot_time
 
 class EquipmentService:
     @staticmethod
@@ -121,20 +123,18 @@ class EquipmentService:
     def get_maintenance_due_equipment():
         """
         Récupère les équipements dont la maintenance est due ou prochainement due
+        
+        Lue dans la liste précalculée du jour lorsqu'elle existe (tenue à jour
+        à chaque écriture ORM), sinon calculée à la demande.
         """
         today = datetime.now().date()
-        soon = today + timedelta(days=30)
-        
-        return Equipment.query.filter(
-            or_(
-                and_(
-                    Equipment.date_prochaine_maintenance <= soon,
-                    Equipment.statut != 'réformé'
-                ),
-                and_(
-                    Equipment.date_derniere_maintenance <= today - timedelta(days=365),
-                    Equipment.statut != 'réformé'
-                )
+        
+        if snapshot_time(today) is not None:
+            query = Equipment.query.filter(Equipment.id.in_(select(MaintenanceDueSnapshot.equipment_id)))
+        else:
+            query = Equipment.query.filter(
+                Equipment.id.in_(maintenance_due_ids(today)),
+                Equipment.statut != 'réformé'
             )
-        ).order_by(Equipment.date_prochaine_maintenance).all()
-
+        
+        return query.order_by(Equipment.date_prochaine_maintenance).all()
@@ -1,9 +1,21 @@
 from app.models.intervention import Intervention
-from app.models.service_intervention import ServiceIntervention
+from app.models.service import ServiceIntervention
 from app.models.equipment import Equipment
+from app.models.user import User
+from app.models.worklist import OverdueInterventionSnapshot
 from app import db
+from app.utils.intervals import EPOCH, day_number, to_day
+from app.utils.result_cache import VersionedCache
+from app.utils.worklists import MAINTENANCE_PERIOD_DAYS, snapshot_time
+from app.utils.collection_sync import sync_children
 from datetime import datetime, timedelta
-from sqlalchemy import and_, func
+from sqlalchemy import and_, case, func, or_, select, union
+
+# Interventions comptées dans la charge : celles qui restent à réaliser
+WORKLOAD_STATUSES = ('planifiée', 'en cours')
+MAX_WORKLOAD_DAYS = 92
+
+_workload_cache = VersionedCache([Intervention.__tablename__, User.__tablename__], maxsize=64)
 
 class InterventionService:
     @staticmethod
@@ -42,14 +54,8 @@ class InterventionService:
         
         # Gérer les services associés si fournis
         if services_data is not None:
-            # Supprimer les services existants
-            ServiceIntervention.query.filter_by(intervention_id=intervention.id).delete()
-            
-            # Ajouter les nouveaux services
-            for service_data in services_data:
-                service_data['intervention_id'] = intervention.id
-                service_intervention = ServiceIntervention(**service_data)
-                db.session.add(service_intervention)
+            # Seules les lignes ajoutées, modifiées ou retirées sont écrites
+            sync_children(ServiceIntervention, 'intervention_id', intervention.id, services_data)
         
         db.session.commit()
         
@@ -82,7 +88,7 @@ class InterventionService:
             if equipment:
                 equipment.date_derniere_maintenance = intervention.date_fin.date()
                 equipment.date_prochaine_maintenance = (
-                    intervention.date_fin.date() + timedelta(days=365)
+                    intervention.date_fin.date() + timedelta(days=MAINTENANCE_PERIOD_DAYS)
                 )
         
         db.session.commit()
@@ -114,9 +120,108 @@ class InterventionService:
     def get_overdue_interventions():
         """
         Récupère les interventions en retard
+        
+        Lue dans la liste précalculée (tenue à jour à chaque écriture ORM),
+        complétée par les seules interventions échues depuis son calcul ;
+        calculée à la demande en l'absence de liste pour le jour.
         """
         now = datetime.utcnow()
-        return Intervention.query.filter(
-            Intervention.date_planifiee < now,
-            Intervention.statut.in_(['planifiée'])
-        ).order_by(Intervention.date_planifiee).all()
+        computed_at = snapshot_time()
+        if computed_at is None:
+            query = Intervention.query.filter(
+                Intervention.date_planifiee < now,
+                Intervention.statut == 'planifiée'
+            )
+        else:
+            # La liste mène la lecture : aucun critère sur la table des
+            # interventions, seulement des accès par clé
+            query = Intervention.query.filter(Intervention.id.in_(union(
+                select(OverdueInterventionSnapshot.intervention_id),
+                select(Intervention.id).where(
+                    Intervention.statut == 'planifiée',
+                    Intervention.date_planifiee >= computed_at,
+                    Intervention.date_planifiee < now
+                )
+            )))
+        
+        return query.order_by(Intervention.date_planifiee).all()
+    
+    @staticmethod
+    def get_workload_matrix(start_date, end_date, now=None):
+        """
+        Charge des techniciens sur une période : matrice technicien × jour des
+        minutes planifiées, du nombre d'interventions et des retards.
+        
+        Le résultat vient d'une seule agrégation et reste en cache par période
+        tant que les interventions et les utilisateurs ne changent pas. Comme
+        le retard dépend de l'heure, l'entrée expire aussi à la prochaine
+        échéance planifiée de la période.
+        """
+        if start_date > end_date:
+            raise ValueError("La date de début doit précéder la date de fin")
+        if (end_date - start_date).days >= MAX_WORKLOAD_DAYS:
+            raise ValueError(f"La période est limitée à {MAX_WORKLOAD_DAYS} jours")
+        now = now or datetime.utcnow()
+        
+        def compute():
+            return InterventionService._compute_workload(start_date, end_date, now)
+        
+        return _workload_cache.get((start_date, end_date), compute, now)
+    
+    @staticmethod
+    def _compute_workload(start_date, end_date, now):
+        """
+        Calcule la matrice de charge ; retourne (matrice, expiration)
+        """
+        first = to_day(start_date)
+        size = (end_date - start_date).days + 1
+        pending = Intervention.statut == 'planifiée'
+        
+        rows = db.session.execute(select(
+            Intervention.technicien_id,
+            day_number(Intervention.date_planifiee),
+            func.sum(func.coalesce(Intervention.duree_estimee, 0)),
+            func.count(),
+            func.sum(case((and_(pending, Intervention.date_planifiee < now), 1), else_=0)),
+            # Prochaine échéance : le retard de la cellule change à cette date
+            func.min(case((and_(pending, Intervention.date_planifiee >= now), Intervention.date_planifiee)))
+        ).where(
+            Intervention.statut.in_(WORKLOAD_STATUSES),
+            Intervention.date_planifiee >= start_date,
+            Intervention.date_planifiee < end_date + timedelta(days=1),
+            Intervention.technicien_id != None
+        ).group_by(Intervention.technicien_id, day_number(Intervention.date_planifiee))).all()
+        
+        cells = {}
+        expires = None
+        for technicien_id, jour, minutes, count, overdue, next_due in rows:
+            cells[(technicien_id, jour - first)] = (int(minutes or 0), count, int(overdue or 0))
+            if next_due is not None and (expires is None or next_due < expires):
+                expires = next_due
+        
+        # Techniciens actifs, même sans intervention, et tout technicien assigné
+        assigned = {technicien_id for technicien_id, _ in cells}
+        technicians = db.session.execute(select(User.id, User.nom, User.prenom).where(
+            or_(and_(User.role == 'technicien', User.is_active == True), User.id.in_(assigned))
+        ).order_by(User.nom, User.prenom, User.id)).all()
+        
+        empty = (0, 0, 0)
+        lines = []
+        totals = {"minutes": [0] * size, "interventions": [0] * size, "en_retard": [0] * size}
+        for technicien_id, nom, prenom in technicians:
+            values = [cells.get((technicien_id, day), empty) for day in range(size)]
+            row = {"id": technicien_id, "nom": nom, "prenom": prenom}
+            for position, name in enumerate(("minutes", "interventions", "en_retard")):
+                row[name] = [value[position] for value in values]
+                row[f"total_{name}"] = sum(row[name])
+                totals[name] = [a + b for a, b in zip(totals[name], row[name])]
+            lines.append(row)
+        
+        matrix = {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "days": [(EPOCH + timedelta(days=first + day)).isoformat() for day in range(size)],
+            "technicians": lines,
+            "totals": totals
+        }
+        return matrix, expires
@@ -3,19 +3,24 @@ from app.models.intervention import Intervention
 from app.models.equipment_rental import EquipmentRental
 from app.models.patient import Patient
 from app import db
-from datetime import datetime, timedelta
-import uuid
+from app.utils.invoice_numbers import allocate_numbers
+from app.utils.collection_sync import sync_children
+from app.utils.invoice_documents import ensure_document
+from app.services.billing_service import parse_period
+from sqlalchemy import func, insert, select, update
+from datetime import datetime, time, timedelta
+
+INTERVENTION_CHUNK_SIZE = 500
+TAUX_TVA_INTERVENTION = 20.0
 
 class InvoiceService:
     @staticmethod
-    def generate_invoice_number():
+    def generate_invoice_number(date_emission=None):
         """
-        Génère un numéro de facture unique
+        Attribue le numéro suivant du mois d'émission (compteur en base,
+        réservé dans la transaction en cours)
         """
-        prefix = "F-"
-        date_part = datetime.now().strftime("%Y%m")
-        unique_part = str(uuid.uuid4().int)[:6]
-        return f"{prefix}{date_part}-{unique_part}"
+        return allocate_numbers(db.session.connection(), date_emission or datetime.now().date())[0]
     
     @staticmethod
     def create_invoice(invoice_data, items_data=None):
@@ -24,7 +29,7 @@ class InvoiceService:
         """
         # Générer un numéro de facture si non fourni
         if not invoice_data.get('numero_facture'):
-            invoice_data['numero_facture'] = InvoiceService.generate_invoice_number()
+            invoice_data['numero_facture'] = InvoiceService.generate_invoice_number(invoice_data.get('date_emission'))
         
         # Créer la facture
         invoice = Invoice(**invoice_data)
@@ -61,14 +66,8 @@ class InvoiceService:
         
         # Gérer les items si fournis
         if items_data is not None:
-            # Supprimer les items existants
-            InvoiceItem.query.filter_by(facture_id=invoice.id).delete()
-            
-            # Ajouter les nouveaux items
-            for item_data in items_data:
-                item_data['facture_id'] = invoice.id
-                invoice_item = InvoiceItem(**item_data)
-                db.session.add(invoice_item)
+            # Seules les lignes ajoutées, modifiées ou retirées sont écrites
+            sync_children(InvoiceItem, 'facture_id', invoice.id, items_data)
         
         db.session.commit()
         
@@ -87,6 +86,7 @@ class InvoiceService:
             raise ValueError("Cette facture est déjà payée")
         
         invoice.statut = 'payée'
+        invoice.montant_regle = invoice.montant_ttc
         invoice.date_paiement = payment_data.get('date_paiement', datetime.now().date())
         invoice.methode_paiement = payment_data.get('methode_paiement')
         invoice.reference_paiement = payment_data.get('reference_paiement')
@@ -95,6 +95,16 @@ class InvoiceService:
         
         return invoice
     
+    @staticmethod
+    def get_invoice_document(invoice_id):
+        """
+        Chemin du document PDF d'une facture, rendu s'il n'existe pas encore
+        """
+        path = ensure_document(invoice_id)
+        if path is None:
+            raise ValueError("Facture non trouvée")
+        return path
+    
     @staticmethod
     def generate_invoice_from_interventions(patient_id, intervention_ids, invoice_data=None):
         """
@@ -119,10 +129,11 @@ class InvoiceService:
         if not invoice_data:
             invoice_data = {}
         
+        # Numéro attribué par le compteur à la création de la facture
+        invoice_data.pop('numero_facture', None)
         today = datetime.now().date()
         invoice_data.update({
             'patient_id': patient_id,
-            'numero_facture': InvoiceService.generate_invoice_number(),
             'date_emission': today,
             'date_echeance': today + timedelta(days=30),
             'statut': 'en attente',
@@ -160,4 +171,121 @@ class InvoiceService:
         
         db.session.commit()
         
-        return invoice
\ No newline at end of file
+        return invoice
+    
+    @staticmethod
+    def generate_invoices_from_interventions(period, chunk_size=INTERVENTION_CHUNK_SIZE, today=None, taux_tva=TAUX_TVA_INTERVENTION, progress=None):
+        """
+        Facture en lot les interventions terminées et facturables du mois,
+        une facture par patient.
+        
+        Les interventions non facturées de la période sont lues en une seule
+        requête (index statut, date planifiée) et regroupées par patient en
+        mémoire. Les patients sont ensuite traités par lots de `chunk_size` :
+        factures et lignes par insertions groupées, rattachement des
+        interventions par une mise à jour groupée, puis validation du lot.
+        Le rattachement ne porte que sur les interventions encore sans
+        facture : un lot concurrent est annulé au lieu de facturer deux fois,
+        et une relance reprend les interventions restantes.
+        
+        Retourne {factures, interventions, montant_ht}.
+        """
+        period_start, period_end = parse_period(period)
+        today = today or datetime.now().date()
+        
+        rows = db.session.execute(select(
+            Intervention.id,
+            Intervention.patient_id,
+            Intervention.type_intervention,
+            Intervention.date_planifiee,
+            Intervention.date_fin,
+            Intervention.montant
+        ).where(
+            Intervention.statut == 'terminée',
+            Intervention.date_planifiee >= datetime.combine(period_start, time.min),
+            Intervention.date_planifiee < datetime.combine(period_end + timedelta(days=1), time.min),
+            Intervention.facturable == True,
+            Intervention.facture_id == None
+        ).order_by(Intervention.patient_id, Intervention.date_planifiee, Intervention.id)).all()
+        
+        by_patient = {}
+        for row in rows:
+            by_patient.setdefault(row.patient_id, []).append(row)
+        groups = list(by_patient.values())
+        
+        totals = {'factures': 0, 'interventions': 0, 'montant_ht': 0.0}
+        for offset in range(0, len(groups), chunk_size):
+            chunk = groups[offset:offset + chunk_size]
+            try:
+                factures, interventions, montant_ht = InvoiceService._bill_interventions(
+                    period, chunk, today, taux_tva
+                )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            totals['factures'] += factures
+            totals['interventions'] += interventions
+            totals['montant_ht'] = round(totals['montant_ht'] + montant_ht, 2)
+            if progress:
+                progress(totals)
+        return totals
+    
+    @staticmethod
+    def _bill_interventions(period, groups, today, taux_tva):
+        """
+        Crée les factures d'un lot de patients [[interventions]] par
+        insertions groupées ; retourne (factures, interventions, montant HT)
+        """
+        invoices = []
+        for interventions in groups:
+            montant_ht = round(sum(i.montant or 0 for i in interventions), 2)
+            invoices.append({
+                'patient_id': interventions[0].patient_id,
+                'date_emission': today,
+                'date_echeance': today + timedelta(days=30),
+                'montant_ht': montant_ht,
+                'taux_tva': taux_tva,
+                'montant_ttc': round(montant_ht * (1 + taux_tva / 100), 2),
+                'periode_debut': min(i.date_planifiee.date() for i in interventions),
+                'periode_fin': max(i.date_fin.date() if i.date_fin else i.date_planifiee.date() for i in interventions),
+                'statut': 'en attente',
+                'notes': f'Facturation des interventions {period}'
+            })
+        
+        # Un bloc de numéros pour tout le lot, réservé juste avant l'insertion
+        numbers = allocate_numbers(db.session.connection(), today, len(invoices))
+        for invoice, numero_facture in zip(invoices, numbers):
+            invoice['numero_facture'] = numero_facture
+        
+        invoice_ids = db.session.execute(
+            insert(Invoice).returning(Invoice.id, sort_by_parameter_order=True), invoices
+        ).scalars().all()
+        
+        items, links = [], []
+        for invoice_id, interventions in zip(invoice_ids, groups):
+            for intervention in interventions:
+                items.append({
+                    'facture_id': invoice_id,
+                    'description': f"Intervention {intervention.type_intervention} du {intervention.date_planifiee.strftime('%d/%m/%Y')}",
+                    'quantite': 1,
+                    'prix_unitaire': intervention.montant or 0,
+                    'montant_total': intervention.montant or 0,
+                    'intervention_id': intervention.id
+                })
+                links.append({'id': intervention.id, 'facture_id': invoice_id})
+        
+        db.session.execute(insert(InvoiceItem), items)
+        # Rattachement par clé primaire, limité aux interventions encore libres
+        db.session.execute(
+            update(Intervention).where(Intervention.facture_id == None), links,
+            execution_options={'synchronize_session': None}
+        )
+        linked = db.session.execute(select(func.count(Intervention.id)).where(
+            Intervention.id.in_([link['id'] for link in links]),
+            Intervention.facture_id.in_(invoice_ids)
+        )).scalar()
+        if linked != len(links):
+            raise ValueError("Des interventions du lot ont été facturées entre-temps ; relancer la facturation")
+        
+        return len(invoices), len(links), round(sum(i['montant_ht'] for i in invoices), 2)
\ No newline at end of file
@@ -1,8 +1,25 @@
 from app.models.patient import Patient
 from app.models.medical_record import MedicalRecord
 from app.models.insurance import PatientInsurance
+from app.models.equipment import Equipment
+from app.models.equipment_rental import EquipmentRental
+from app.models.intervention import Intervention
+from app.models.invoice import Invoice
 from app import db
-from sqlalchemy import or_
+from app.utils.eager_loading import loader_options
+from app.utils.pagination import paginate
+from app.utils.patient_search import ranked_search
+
+# Collections de la vue d'ensemble d'un patient : modèle et colonnes de tri
+# (du plus récent au plus ancien, clé primaire en dernier)
+OVERVIEW_COLLECTIONS = {
+    'equipements': (Equipment, (Equipment.id,)),
+    'locations': (EquipmentRental, (EquipmentRental.date_debut, EquipmentRental.id)),
+    'interventions': (Intervention, (Intervention.date_planifiee, Intervention.id)),
+    'factures': (Invoice, (Invoice.date_emission, Invoice.id)),
+    'dossiers_medicaux': (MedicalRecord, (MedicalRecord.date_creation, MedicalRecord.id)),
+}
+OVERVIEW_LIMIT = 10
 
 class PatientService:
     @staticmethod
@@ -61,17 +78,9 @@ class PatientService:
         if active_only:
             query = query.filter(Patient.actif == True)
         
+        # Recherche via l'index plein texte, résultats triés par pertinence
         if search_term:
-            search_term = f"%{search_term}%"
-            query = query.filter(
-                or_(
-                    Patient.nom.ilike(search_term),
-                    Patient.prenom.ilike(search_term),
-                    Patient.numero_securite_sociale.ilike(search_term),
-                    Patient.telephone.ilike(search_term),
-                    Patient.email.ilike(search_term)
-                )
-            )
+            return ranked_search(query, search_term).all()
         
         return query.order_by(Patient.nom, Patient.prenom).all()
     
@@ -102,3 +111,20 @@ class PatientService:
             patient_id=patient_id, 
             actif=True
         ).all()
+    
+    @staticmethod
+    def get_overview_page(patient_id, collection, schema, limit=OVERVIEW_LIMIT, cursor=None):
+        """
+        Page d'une collection de la vue d'ensemble d'un patient
+        
+        Une requête limitée par collection (index patient_id + date), plus
+        les chargements groupés des relations du schéma : le nombre de
+        requêtes ne dépend pas de l'ancienneté du dossier. Retourne
+        (éléments, curseur suivant ou None).
+        """
+        if collection not in OVERVIEW_COLLECTIONS:
+            raise ValueError(f"Collection inconnue : {collection}")
+        model, order = OVERVIEW_COLLECTIONS[collection]
+        
+        query = model.query.filter(model.patient_id == patient_id).options(*loader_options(model, schema))
+        return paginate(query, list(order), limit, cursor, descending=True)
@@ -0,0 +1,204 @@
+import re
+from itertools import islice
+from app.models.invoice import Invoice, InvoicePayment
+from sqlalchemy import insert, select, update
+from app import db
+from app.utils.bank_statements import read_statement
+
+RECONCILE_CHUNK_SIZE = 1000
+# Écart toléré entre règlement et montant dû (arrondis bancaires)
+TOLERANCE = 0.005
+METHODE_VIREMENT = 'virement'
+# Motif de rejet d'une ligne selon le statut courant de sa facture
+_MOTIFS = {'payée': "Facture déjà soldée", 'annulée': "Facture annulée"}
+
+_TOKENS = re.compile(r'[A-Za-z0-9][A-Za-z0-9/_.\-]*[A-Za-z0-9]')
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ReconciliationService:
+    @staticmethod
+    def _load_index():
+        """
+        Index en mémoire des clés de rapprochement des factures en attente
+        (numéro de facture, référence de paiement attendue) : {clé: id}
+        """
+        index = {}
+        rows = db.session.execute(select(
+            Invoice.id, Invoice.numero_facture, Invoice.reference_paiement
+        ).where(Invoice.statut == 'en attente'))
+        for invoice_id, numero_facture, reference_paiement in rows:
+            index[numero_facture.upper()] = invoice_id
+            if reference_paiement:
+                index.setdefault(reference_paiement.upper(), invoice_id)
+        return index
+    
+    @staticmethod
+    def _lock_invoices(invoice_ids):
+        """
+        État courant des factures d'un lot, verrouillées jusqu'à sa
+        validation : les montants écrits partent de ce qui est en base, non
+        de l'état lu au début du relevé
+        """
+        invoices = {}
+        if not invoice_ids:
+            return invoices
+        rows = db.session.execute(select(
+            Invoice.id, Invoice.numero_facture, Invoice.reference_paiement, Invoice.statut,
+            Invoice.montant_ttc, Invoice.montant_regle
+        ).where(Invoice.id.in_(sorted(invoice_ids))).order_by(Invoice.id).with_for_update())
+        for invoice_id, numero_facture, reference_paiement, statut, montant_ttc, montant_regle in rows:
+            invoices[invoice_id] = {
+                'numero_facture': numero_facture,
+                'reference_paiement': reference_paiement,
+                'statut': statut,
+                'du': round(montant_ttc or 0, 2),
+                'regle': round(montant_regle or 0, 2)
+            }
+        return invoices
+    
+    @staticmethod
+    def _match(line, index):
+        """
+        Facture désignée par une ligne : sa référence, à défaut un mot de
+        son libellé
+        """
+        candidates = [line.reference] if line.reference else []
+        candidates += _TOKENS.findall(line.libelle or '')
+        for candidate in candidates:
+            invoice_id = index.get(candidate.upper())
+            if invoice_id is not None:
+                return invoice_id
+        return None
+    
+    @staticmethod
+    def reconcile(lines, dry_run=False, chunk_size=RECONCILE_CHUNK_SIZE, methode_paiement=METHODE_VIREMENT):
+        """
+        Rapproche les lignes d'un relevé des factures en attente.
+        
+        Les clés des factures ouvertes sont indexées en mémoire une fois ;
+        les lignes sont lues au fil du relevé et traitées par lots. Chaque
+        lot relit et verrouille les factures qu'il désigne, insère ses
+        règlements et met à jour ses factures en deux instructions groupées,
+        puis est validé. Un règlement partiel s'ajoute au montant réglé ; la
+        facture passe « payée » une fois soldée. Une facture payée ou annulée
+        entre-temps n'est pas touchée. Une opération déjà importée (même
+        identifiant bancaire) est ignorée : un relevé interrompu peut être
+        réimporté tel quel. En simulation, les lots ne sont pas validés et
+        tout est annulé à la fin.
+        """
+        index = ReconciliationService._load_index()
+        report = {
+            "lignes": 0,
+            "rapprochees": 0,
+            "deja_importees": 0,
+            "ignorees": 0,
+            "factures_soldees": 0,
+            "paiements_partiels": 0,
+            "montant_rapproche": 0.0,
+            "matched": [],
+            "unmatched": []
+        }
+        seen = set()
+        
+        for chunk in _chunks(lines, chunk_size):
+            report["lignes"] += len(chunk)
+            imported = set(db.session.execute(select(InvoicePayment.reference_bancaire).where(
+                InvoicePayment.reference_bancaire.in_([line.identifiant for line in chunk])
+            )).scalars())
+        
+            candidates = []
+            for line in chunk:
+                if line.identifiant in imported or line.identifiant in seen:
+                    report["deja_importees"] += 1
+                    continue
+                seen.add(line.identifiant)
+                if line.montant <= 0:
+                    # Débits et lignes nulles : hors rapprochement des factures
+                    report["ignorees"] += 1
+                    continue
+                candidates.append((line, ReconciliationService._match(line, index)))
+            invoices = ReconciliationService._lock_invoices({invoice_id for _, invoice_id in candidates if invoice_id})
+        
+            payments, changes = [], {}
+            for line, invoice_id in candidates:
+                montant = float(line.montant)
+                invoice = invoices.get(invoice_id)
+                if invoice is None or invoice['statut'] != 'en attente':
+                    report["unmatched"].append({
+                        "ligne": line.numero,
+                        "date": line.date.isoformat(),
+                        "montant": montant,
+                        "libelle": line.libelle,
+                        "reference": line.reference,
+                        "motif": _MOTIFS.get(invoice and invoice['statut'], "Aucune facture en attente correspondante")
+                    })
+                    continue
+        
+                invoice['regle'] = round(invoice['regle'] + montant, 2)
+                soldee = invoice['regle'] >= invoice['du'] - TOLERANCE
+                change = changes.setdefault(invoice_id, {'id': invoice_id})
+                change['montant_regle'] = invoice['regle']
+                if soldee:
+                    invoice['statut'] = 'payée'
+                    change.update(statut='payée', date_paiement=line.date, methode_paiement=methode_paiement)
+                    if not invoice['reference_paiement']:
+                        change['reference_paiement'] = line.reference or line.identifiant
+        
+                payments.append({
+                    'facture_id': invoice_id,
+                    'montant': montant,
+                    'date_paiement': line.date,
+                    'methode_paiement': methode_paiement,
+                    'reference_bancaire': line.identifiant,
+                    'libelle': (line.libelle or '')[:500]
+                })
+                report["rapprochees"] += 1
+                report["montant_rapproche"] += montant
+                report["factures_soldees" if soldee else "paiements_partiels"] += 1
+                report["matched"].append({
+                    "ligne": line.numero,
+                    "facture_id": invoice_id,
+                    "numero_facture": invoice['numero_facture'],
+                    "montant": montant,
+                    "soldee": soldee,
+                    "reste_du": round(max(invoice['du'] - invoice['regle'], 0), 2),
+                    "trop_percu": round(max(invoice['regle'] - invoice['du'], 0), 2)
+                })
+        
+            if payments:
+                db.session.execute(insert(InvoicePayment), payments)
+                # Mise à jour par clé primaire, regroupée par jeu de colonnes ;
+                # limitée aux factures toujours en attente
+                db.session.execute(
+                    update(Invoice).where(Invoice.statut == 'en attente'), list(changes.values()),
+                    execution_options={'synchronize_session': None}
+                )
+            if not dry_run:
+                db.session.commit()
+        
+        if dry_run:
+            db.session.rollback()
+        report["montant_rapproche"] = round(report["montant_rapproche"], 2)
+        report["dry_run"] = dry_run
+        return report
+    
+    @staticmethod
+    def reconcile_statement(stream, statement_format=None, filename=None, encoding='utf-8-sig', dry_run=False):
+        """
+        Rapproche un relevé bancaire (CSV ou CAMT.053, flux binaire)
+        """
+        lines = read_statement(stream, statement_format, filename, encoding)
+        try:
+            return ReconciliationService.reconcile(lines, dry_run=dry_run)
+        except Exception:
+            db.session.rollback()
+            raise
@@ -0,0 +1,115 @@
+from app.models.invoice import Invoice
+from app.models.patient import Patient
+from app.models.insurance import Insurance
+from sqlalchemy import and_, case, func, literal, select
+from app import db
+from datetime import datetime, timedelta
+
+# Tranches d'ancienneté : (clé, retard minimal en jours, retard maximal)
+AGING_BUCKETS = [
+    ('non_echu', None, 0),
+    ('0_30', 1, 30),
+    ('31_60', 31, 60),
+    ('61_90', 61, 90),
+    ('90_plus', 91, None),
+]
+AGING_AMOUNTS = ('reste_a_charge', 'montant_prise_en_charge')
+AGING_GROUPS = ('patient', 'assurance')
+
+
+class ReportService:
+    @staticmethod
+    def aging_query(group_by='patient', as_of=None):
+        """
+        Construit la requête de la balance âgée des factures en attente.
+        
+        Une seule agrégation conditionnelle, lue dans l'index couvrant
+        `ix_invoices_aging` : chaque facture tombe dans une tranche
+        selon sa date d'échéance, comparée à des bornes calculées ici, ce qui
+        évite toute arithmétique de dates propre au moteur.
+        """
+        if group_by not in AGING_GROUPS:
+            raise ValueError(f"Regroupement invalide : {group_by} (attendu : {', '.join(AGING_GROUPS)})")
+        as_of = as_of or datetime.now().date()
+        
+        prise_en_charge = func.coalesce(Invoice.montant_prise_en_charge, 0)
+        # Reste à charge non renseigné : montant TTC moins la part assurée
+        reste_a_charge = func.coalesce(Invoice.reste_a_charge, Invoice.montant_ttc - prise_en_charge)
+        amounts = {'reste_a_charge': reste_a_charge, 'montant_prise_en_charge': prise_en_charge}
+        
+        columns = []
+        for bucket, min_days, max_days in AGING_BUCKETS:
+            conditions = []
+            if min_days is not None:
+                conditions.append(Invoice.date_echeance <= as_of - timedelta(days=min_days))
+            if max_days is not None:
+                conditions.append(Invoice.date_echeance >= as_of - timedelta(days=max_days))
+            condition = conditions[0] if len(conditions) == 1 else and_(*conditions)
+            for name, amount in amounts.items():
+                columns.append(func.sum(case((condition, amount), else_=0)).label(f'{bucket}_{name}'))
+            columns.append(func.sum(case((condition, 1), else_=0)).label(f'{bucket}_count'))
+        
+        key = Invoice.patient_id if group_by == 'patient' else Invoice.assurance_id
+        aggregate = select(key.label('group_id'), *columns).where(
+            Invoice.statut == 'en attente'
+        ).group_by(key).subquery()
+        
+        # Libellés joints après agrégation : une ligne par groupe seulement
+        if group_by == 'patient':
+            labels = [Patient.nom, Patient.prenom]
+            query = select(aggregate, *labels).join(Patient, Patient.id == aggregate.c.group_id)
+            order = [Patient.nom, Patient.prenom, aggregate.c.group_id]
+        else:
+            labels = [func.coalesce(Insurance.nom, literal('Sans assurance')).label('nom')]
+            query = select(aggregate, *labels).outerjoin(Insurance, Insurance.id == aggregate.c.group_id)
+            order = [aggregate.c.group_id]
+        
+        return query.order_by(*order)
+    
+    @staticmethod
+    def aging_rows(group_by='patient', as_of=None, chunk_size=1000):
+        """
+        Parcourt la balance âgée ligne par ligne (curseur serveur si disponible)
+        """
+        query = ReportService.aging_query(group_by, as_of)
+        result = db.session.execute(query, execution_options={'yield_per': chunk_size})
+        for row in result.mappings():
+            yield dict(row)
+    
+    @staticmethod
+    def get_aging_report(group_by='patient', as_of=None):
+        """
+        Balance âgée des factures en attente, par patient ou par assurance
+        """
+        as_of = as_of or datetime.now().date()
+        measures = AGING_AMOUNTS + ('count',)
+        groups = []
+        totals = {bucket: dict.fromkeys(measures, 0) for bucket, _, _ in AGING_BUCKETS}
+        
+        for row in ReportService.aging_rows(group_by, as_of):
+            buckets = {}
+            for bucket, _, _ in AGING_BUCKETS:
+                values = {name: row[f'{bucket}_{name}'] or 0 for name in measures}
+                for name, value in values.items():
+                    totals[bucket][name] += value
+                buckets[bucket] = _format_bucket(values)
+            group = {"id": row['group_id'], "nom": row['nom'], "buckets": buckets}
+            if group_by == 'patient':
+                group["prenom"] = row['prenom']
+            groups.append(group)
+        
+        return {
+            "as_of": as_of.isoformat(),
+            "group_by": group_by,
+            "buckets": [bucket for bucket, _, _ in AGING_BUCKETS],
+            "groups": groups,
+            "totals": {bucket: _format_bucket(values) for bucket, values in totals.items()}
+        }
+
+
+def _format_bucket(values):
+    return {
+        "reste_a_charge": round(float(values['reste_a_charge']), 2),
+        "montant_prise_en_charge": round(float(values['montant_prise_en_charge']), 2),
+        "count": int(values['count'])
+    }
@@ -0,0 +1,197 @@
+import csv
+import hashlib
+import io
+import os
+from collections import Counter, namedtuple
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from xml.etree.ElementTree import ParseError, iterparse
+
+STATEMENT_FORMATS = ('csv', 'camt')
+
+# Ligne de relevé : `identifiant` désigne l'opération bancaire de façon
+# stable d'un import à l'autre
+StatementLine = namedtuple('StatementLine', 'numero date montant libelle reference identifiant')
+
+# En-têtes reconnus (minuscules, sans espaces superflus) par colonne
+CSV_COLUMNS = {
+    'date': ('date', 'date operation', 'date opération', 'date comptable', 'date de valeur', 'booking date'),
+    'montant': ('montant', 'amount'),
+    'credit': ('crédit', 'credit'),
+    'debit': ('débit', 'debit'),
+    'libelle': ('libelle', 'libellé', 'label', 'description', 'motif'),
+    'reference': ('reference', 'référence', 'ref', 'réf', 'end to end id'),
+    'identifiant': ('id', 'identifiant', 'transaction id', 'reference banque', 'référence banque'),
+}
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%d/%m/%y')
+
+
+def parse_amount(value):
+    """
+    Montant d'un relevé : « 1 234,56 », « 1234.56 », « -12,00 »
+    """
+    text = (value or '').replace(' ', '').replace(' ', '').replace('€', '').strip()
+    if ',' in text and '.' in text:
+        # Le dernier séparateur est le séparateur décimal
+        thousands = '.' if text.rindex(',') > text.rindex('.') else ','
+        text = text.replace(thousands, '')
+    try:
+        return Decimal(text.replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError(f"Montant invalide : {value!r}")
+
+
+def parse_date(value):
+    text = (value or '').strip()[:10]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Date invalide : {value!r}")
+
+
+def detect_format(stream, filename=None):
+    """
+    Format d'un relevé d'après son extension, à défaut son premier octet
+    significatif (« < » : XML CAMT)
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in ('.xml', '.camt', '.053'):
+        return 'camt'
+    if extension in ('.csv', '.txt'):
+        return 'csv'
+    head = stream.read(512)
+    stream.seek(0)
+    return 'camt' if head.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'<') else 'csv'
+
+
+def _line_identifier(occurrences, *values):
+    # Sans identifiant bancaire : empreinte de la ligne, numérotée pour
+    # distinguer deux opérations identiques du même relevé
+    digest = hashlib.sha1('|'.join(str(v) for v in values).encode()).hexdigest()[:24]
+    occurrences[digest] += 1
+    return f'{digest}-{occurrences[digest]}'
+
+
+def read_csv(stream, encoding='utf-8-sig'):
+    """
+    Lignes d'un relevé CSV, lues au fil du fichier (séparateur « ; », « , »
+    ou tabulation, déduit de l'en-tête).
+
+    Le montant vient d'une colonne signée, à défaut des colonnes « Débit »
+    et « Crédit » : une cellule vide y vaut zéro et un débit est compté
+    en négatif.
+    """
+    text = io.TextIOWrapper(stream, encoding=encoding, newline='')
+    header_line = text.readline()
+    delimiter = max(';,\t', key=header_line.count)
+    header = [name.strip().lower() for name in next(csv.reader([header_line], delimiter=delimiter), [])]
+
+    positions = {}
+    for column, names in CSV_COLUMNS.items():
+        for name in names:
+            if name in header:
+                positions[column] = header.index(name)
+                break
+    missing = [column for column in ('date', 'montant') if column not in positions]
+    if 'montant' in missing and ('credit' in positions or 'debit' in positions):
+        missing.remove('montant')
+    if missing:
+        raise ValueError(f"Colonnes absentes du relevé : {', '.join(missing)}")
+
+    def cell(row, column):
+        position = positions.get(column)
+        return row[position].strip() if position is not None and position < len(row) else ''
+
+    def amount(row):
+        if 'montant' in positions:
+            return parse_amount(cell(row, 'montant'))
+        credit, debit = cell(row, 'credit'), cell(row, 'debit')
+        return (parse_amount(credit) if credit else Decimal(0)) - (abs(parse_amount(debit)) if debit else Decimal(0))
+
+    occurrences = Counter()
+    try:
+        for numero, row in enumerate(csv.reader(text, delimiter=delimiter), start=2):
+            if not any(value.strip() for value in row):
+                continue
+            try:
+                date, montant = parse_date(cell(row, 'date')), amount(row)
+            except ValueError as e:
+                raise ValueError(f"Ligne {numero} : {e}")
+            libelle, reference = cell(row, 'libelle'), cell(row, 'reference')
+            identifiant = cell(row, 'identifiant') or _line_identifier(occurrences, date, montant, libelle, reference)
+            yield StatementLine(numero, date, montant, libelle, reference, identifiant)
+    finally:
+        text.detach()
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _text(element, path):
+    found = element.find(path)
+    return found.text.strip() if found is not None and found.text else ''
+
+
+def read_camt(stream):
+    """
+    Lignes d'un relevé CAMT.053 (ISO 20022), lues écriture par écriture
+    (`Ntry`) sans charger le document ; une écriture groupée donne une
+    ligne par transaction détaillée
+    """
+    try:
+        yield from _read_camt_entries(stream)
+    except ParseError as e:
+        raise ValueError(f"Relevé CAMT illisible : {e}")
+
+
+def _read_camt_entries(stream):
+    occurrences = Counter()
+    numero = 0
+    for _, element in iterparse(stream, events=('end',)):
+        if _local(element.tag) != 'Ntry':
+            continue
+        numero += 1
+        sign = -1 if _text(element, '{*}CdtDbtInd') == 'DBIT' else 1
+        date = parse_date(_text(element, '{*}BookgDt/{*}Dt') or _text(element, '{*}BookgDt/{*}DtTm')
+                          or _text(element, '{*}ValDt/{*}Dt'))
+        entry_reference = _text(element, '{*}AcctSvcrRef')
+        entry_label = _text(element, '{*}AddtlNtryInf')
+
+        transactions = element.findall('{*}NtryDtls/{*}TxDtls') or [None]
+        for position, transaction in enumerate(transactions):
+            source = transaction if transaction is not None else element
+            amount = _text(source, '{*}Amt') or _text(source, '{*}AmtDtls/{*}TxAmt/{*}Amt')
+            if not amount:
+                if len(transactions) > 1:
+                    continue
+                amount = _text(element, '{*}Amt')
+            libelle = ' '.join(filter(None, [
+                ' '.join(e.text.strip() for e in source.iterfind('.//{*}RmtInf/{*}Ustrd') if e.text),
+                entry_label
+            ]))
+            reference = _text(source, './/{*}CdtrRefInf/{*}Ref')
+            end_to_end = _text(source, '{*}Refs/{*}EndToEndId')
+            if not reference and end_to_end != 'NOTPROVIDED':
+                reference = end_to_end
+            identifiant = _text(source, '{*}Refs/{*}AcctSvcrRef') or entry_reference
+            if identifiant and len(transactions) > 1:
+                identifiant = f'{identifiant}/{position + 1}'
+            montant = sign * parse_amount(amount)
+            identifiant = identifiant or _line_identifier(occurrences, date, montant, libelle, reference)
+            yield StatementLine(numero, date, montant, libelle, reference, identifiant)
+        element.clear()
+
+
+def read_statement(stream, statement_format=None, filename=None, encoding='utf-8-sig'):
+    """
+    Lignes d'un relevé bancaire (flux binaire), au fil de la lecture
+    """
+    statement_format = statement_format or detect_format(stream, filename)
+    if statement_format not in STATEMENT_FORMATS:
+        raise ValueError(f"Format de relevé invalide : {statement_format} (attendu : {', '.join(STATEMENT_FORMATS)})")
+    if statement_format == 'camt':
+        return read_camt(stream)
+    return read_csv(stream, encoding)
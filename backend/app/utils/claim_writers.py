@@ -0,0 +1,217 @@
+import csv
+import io
+import unicodedata
+from xml.etree.ElementTree import Element, SubElement, tostring
+from xml.sax.saxutils import quoteattr
+
+# Tampon d'écriture : un morceau est envoyé dès qu'il atteint cette taille
+CLAIM_BUFFER_SIZE = 64 * 1024
+
+# Colonnes des demandes fournies aux formats (une ligne par facture)
+CLAIM_COLUMNS = (
+    'numero_facture', 'date_emission', 'periode_debut', 'periode_fin',
+    'nom', 'prenom', 'date_naissance', 'numero_securite_sociale', 'numero_adherent',
+    'numero_dossier_assurance', 'taux_prise_en_charge',
+    'montant_ttc', 'montant_prise_en_charge', 'reste_a_charge'
+)
+
+CLAIM_WRITERS = {}
+
+
+def claim_writer(name):
+    """
+    Enregistre un format de bordereau sous son nom
+    """
+    def decorator(cls):
+        cls.name = name
+        CLAIM_WRITERS[name] = cls
+        return cls
+    return decorator
+
+
+def get_writer(name):
+    """
+    Format de bordereau enregistré sous ce nom
+    """
+    if name not in CLAIM_WRITERS:
+        raise ValueError(f"Format de bordereau invalide : {name} (attendu : {', '.join(CLAIM_WRITERS)})")
+    return CLAIM_WRITERS[name]()
+
+
+class ClaimWriter:
+    """
+    Format de bordereau : un en-tête, une ligne par demande, un pied.
+
+    Chaque méthode retourne du texte ; le bordereau (`ClaimSubmission`),
+    totaux compris, est connu avant la première ligne.
+    """
+    name = None
+    extension = 'txt'
+    mimetype = 'text/plain'
+
+    def header(self, submission):
+        return ''
+
+    def claim(self, row):
+        raise NotImplementedError
+
+    def footer(self, submission):
+        return ''
+
+
+def write_claims(writer, submission, rows, buffer_size=CLAIM_BUFFER_SIZE):
+    """
+    Texte d'un bordereau par morceaux d'environ `buffer_size` caractères ;
+    `rows` est consommé au fil de l'écriture
+    """
+    buffer = io.StringIO()
+    buffer.write(writer.header(submission))
+    for row in rows:
+        buffer.write(writer.claim(row))
+        if buffer.tell() >= buffer_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    buffer.write(writer.footer(submission))
+    yield buffer.getvalue()
+
+
+def _decimal(value):
+    return f'{value or 0:.2f}'
+
+
+@claim_writer('csv')
+class CsvClaimWriter(ClaimWriter):
+    """
+    CSV « ; », une ligne d'en-tête de colonnes, montants au point décimal
+    """
+    extension = 'csv'
+    mimetype = 'text/csv'
+
+    def __init__(self):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer, delimiter=';', lineterminator='\r\n')
+
+    def _row(self, values):
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.writer.writerow(values)
+        return self.buffer.getvalue()
+
+    def header(self, submission):
+        return self._row(CLAIM_COLUMNS)
+
+    def claim(self, row):
+        return self._row([
+            _decimal(row[column]) if column.startswith('montant') or column == 'reste_a_charge'
+            else row[column].isoformat() if hasattr(row[column], 'isoformat')
+            else '' if row[column] is None else row[column]
+            for column in CLAIM_COLUMNS
+        ])
+
+
+def _ascii(value):
+    # Zones alphanumériques : majuscules sans accents
+    text = unicodedata.normalize('NFKD', str(value or '')).encode('ascii', 'ignore').decode()
+    return text.upper()
+
+
+@claim_writer('largeur_fixe')
+class FixedWidthClaimWriter(ClaimWriter):
+    """
+    Enregistrements à positions fixes : « E » (émetteur), « D » (une
+    demande), « T » (totaux de contrôle). Zones alphanumériques cadrées à
+    gauche, zones numériques en centimes cadrées à droite avec des zéros.
+    """
+    extension = 'txt'
+    mimetype = 'text/plain'
+    RECORD_LENGTH = 250
+
+    # (colonne, longueur, numérique en centimes)
+    FIELDS = (
+        ('numero_facture', 20, False),
+        ('date_emission', 8, False),
+        ('periode_debut', 8, False),
+        ('periode_fin', 8, False),
+        ('nom', 30, False),
+        ('prenom', 20, False),
+        ('date_naissance', 8, False),
+        ('numero_securite_sociale', 15, False),
+        ('numero_adherent', 20, False),
+        ('numero_dossier_assurance', 20, False),
+        ('taux_prise_en_charge', 5, True),
+        ('montant_ttc', 12, True),
+        ('montant_prise_en_charge', 12, True),
+        ('reste_a_charge', 12, True),
+    )
+
+    @staticmethod
+    def _number(value, length, scale=100):
+        return f'{round((value or 0) * scale):0{length}d}'[-length:]
+
+    @staticmethod
+    def _text(value, length):
+        if hasattr(value, 'strftime'):
+            value = value.strftime('%Y%m%d')
+        return _ascii(value)[:length].ljust(length)
+
+    def _zone(self, value, length, numeric):
+        return self._number(value, length) if numeric else self._text(value, length)
+
+    def _record(self, kind, zones):
+        return (kind + ''.join(zones)).ljust(self.RECORD_LENGTH) + '\r\n'
+
+    def header(self, submission):
+        return self._record('E', [
+            self._number(submission.assurance_id, 10, scale=1),
+            self._text(submission.assurance.nom if submission.assurance else '', 40),
+            self._text(submission.periode.replace('-', ''), 6),
+            self._number(submission.id, 10, scale=1),
+            self._text(submission.date_creation, 8),
+        ])
+
+    def claim(self, row):
+        return self._record('D', [self._zone(row[column], length, numeric) for column, length, numeric in self.FIELDS])
+
+    def footer(self, submission):
+        return self._record('T', [
+            self._number(submission.factures, 8, scale=1),
+            self._number(submission.montant_ttc, 14),
+            self._number(submission.montant_prise_en_charge, 14),
+        ])
+
+
+@claim_writer('xml')
+class XmlClaimWriter(ClaimWriter):
+    """
+    Document XML `<bordereau>` : un élément `<demande>` par facture
+    """
+    extension = 'xml'
+    mimetype = 'application/xml'
+
+    def header(self, submission):
+        attributes = {
+            'numero': submission.id,
+            'assurance': submission.assurance_id,
+            'periode': submission.periode,
+            'factures': submission.factures,
+            'montant_ttc': _decimal(submission.montant_ttc),
+            'montant_prise_en_charge': _decimal(submission.montant_prise_en_charge),
+        }
+        # Balise ouvrante seule : les demandes suivent au fil de l'écriture
+        opening = ' '.join(f'{name}={quoteattr(str(value))}' for name, value in attributes.items())
+        return f'<?xml version="1.0" encoding="UTF-8"?>\n<bordereau {opening}>\n'
+
+    def claim(self, row):
+        element = Element('demande')
+        for column in CLAIM_COLUMNS:
+            value = row[column]
+            if value is None:
+                continue
+            if column.startswith('montant') or column == 'reste_a_charge':
+                value = _decimal(value)
+            SubElement(element, column).text = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        return '  ' + tostring(element, encoding='unicode') + '\n'
+
+    def footer(self, submission):
+        return '</bordereau>\n'
@@ -0,0 +1,84 @@
+from sqlalchemy import delete, insert, inspect, select, update
+from app import db
+
+
+class ChangeSet:
+    """
+    Écritures effectuées par `sync_children` : identifiants des lignes
+    insérées, modifiées et supprimées
+    """
+
+    def __init__(self, inserted=(), updated=(), deleted=()):
+        self.inserted = list(inserted)
+        self.updated = list(updated)
+        self.deleted = list(deleted)
+
+    def __bool__(self):
+        return bool(self.inserted or self.updated or self.deleted)
+
+    def __repr__(self):
+        return f'<ChangeSet +{len(self.inserted)} ~{len(self.updated)} -{len(self.deleted)}>'
+
+
+def sync_children(model, parent_key, parent_id, rows):
+    """
+    Aligne les lignes enfants d'un parent sur la liste reçue (PUT).
+
+    Les lignes reçues sont rapprochées des lignes existantes par `id` :
+
+    - avec un `id` existant : seules les colonnes fournies et réellement
+      modifiées sont mises à jour (les colonnes absentes sont conservées) ;
+    - sans `id` : la ligne est insérée ;
+    - les lignes existantes absentes de la liste sont supprimées.
+
+    Chaque catégorie est écrite en une instruction groupée (executemany,
+    IN (...) pour les suppressions) ; une liste identique à l'existant
+    n'écrit rien. Les instructions passent par la session (écouteurs de
+    versions et de compteurs). Retourne le `ChangeSet`.
+    """
+    mapper = inspect(model)
+    primary_key = mapper.primary_key[0].key
+    columns = {column.key for column in mapper.column_attrs} - {primary_key, parent_key}
+    parent = getattr(model, parent_key)
+
+    existing = {
+        row[primary_key]: row
+        for row in db.session.execute(
+            select(*(getattr(model, key) for key in columns | {primary_key})).where(parent == parent_id)
+        ).mappings()
+    }
+
+    inserts, updates, seen = [], [], set()
+    for row in rows:
+        unknown = set(row) - columns - {primary_key, parent_key}
+        if unknown:
+            raise ValueError(f"Champs inconnus : {', '.join(sorted(unknown))}")
+        values = {key: value for key, value in row.items() if key in columns}
+
+        row_id = row.get(primary_key)
+        if row_id is None:
+            inserts.append(dict(values, **{parent_key: parent_id}))
+            continue
+        if row_id not in existing:
+            raise ValueError(f"Ligne {row_id} introuvable pour ce parent")
+        if row_id in seen:
+            raise ValueError(f"Ligne {row_id} présente plusieurs fois")
+        seen.add(row_id)
+
+        changed = {key: value for key, value in values.items() if existing[row_id][key] != value}
+        if changed:
+            updates.append(dict(changed, **{primary_key: row_id}))
+
+    deleted = sorted(set(existing) - seen)
+    if deleted:
+        db.session.execute(delete(model).where(getattr(model, primary_key).in_(deleted)))
+    # Mise à jour par clé primaire : regroupée par jeu de colonnes modifiées
+    if updates:
+        db.session.execute(update(model), updates)
+    inserted = []
+    if inserts:
+        inserted = db.session.execute(
+            insert(model).returning(getattr(model, primary_key), sort_by_parameter_order=True), inserts
+        ).scalars().all()
+
+    return ChangeSet(inserted, [row[primary_key] for row in updates], deleted)
@@ -0,0 +1,308 @@
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app import db
+from app.models.dashboard_counter import DashboardCounter
+from app.models.patient import Patient
+from app.models.equipment import Equipment
+from app.models.intervention import Intervention
+from app.models.invoice import Invoice
+from app.models.equipment_rental import EquipmentRental
+
+_COUNTERS = DashboardCounter.__table__
+
+
+def _month_bounds(today):
+    start = today.replace(day=1)
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+class Counter:
+    """
+    Compteur du tableau de bord maintenu par différence.
+
+    Chaque compteur décrit la même condition deux fois : en SQL (`where`),
+    pour le recalcul complet, et en Python (`match`), pour ajuster la valeur
+    à chaque ligne ajoutée, modifiée ou supprimée. `amount` désigne la colonne
+    sommée (COUNT sinon), `group_by` la colonne de regroupement (une ligne
+    par valeur, en plus de l'agrégat). Un compteur `relative` dépend de la
+    date du jour : il n'est valable que le jour de son dernier recalcul.
+    """
+
+    def __init__(self, name, model, columns, where, match, amount=None, group_by=None, relative=False):
+        self.name = name
+        self.model = model
+        self.columns = set(columns) | {c for c in (amount, group_by) if c}
+        self.where = where
+        self.match = match
+        self.amount = amount
+        self.group_by = group_by
+        self.relative = relative
+
+    def contribution(self, values, today):
+        """
+        Retourne {ligne: montant} apporté par une ligne de la table
+        """
+        if values is None or not self.match(values, today):
+            return {}
+        amount = 1 if self.amount is None else (values[self.amount] or 0)
+        rows = {self.name: amount}
+        if self.group_by:
+            rows[f'{self.name}:{values[self.group_by]}'] = amount
+        return rows
+
+    def compute(self, connection, today):
+        """
+        Recalcule le compteur en une requête : {ligne: valeur}
+        """
+        model = self.model
+        measure = func.count() if self.amount is None else func.coalesce(func.sum(getattr(model, self.amount)), 0)
+        if self.group_by is None:
+            value = connection.execute(select(measure).select_from(model).where(*self.where(today))).scalar()
+            return {self.name: value}
+
+        key = getattr(model, self.group_by)
+        rows = connection.execute(select(key, measure).where(*self.where(today)).group_by(key)).all()
+        values = {f'{self.name}:{k}': v for k, v in rows}
+        values[self.name] = sum(v for _, v in rows)
+        return values
+
+    def is_fresh(self, valid_on, today):
+        return valid_on is not None and (not self.relative or valid_on == today)
+
+
+COUNTERS = [
+    Counter(
+        'patients_actifs', Patient, ['actif'],
+        where=lambda today: [Patient.actif == True],
+        match=lambda v, today: v['actif'] is True,
+    ),
+    Counter(
+        'equipment_status', Equipment, [],
+        where=lambda today: [],
+        match=lambda v, today: True,
+        group_by='statut',
+    ),
+    Counter(
+        'intervention_status', Intervention, [],
+        where=lambda today: [],
+        match=lambda v, today: True,
+        group_by='statut',
+    ),
+    Counter(
+        'active_rentals', EquipmentRental, ['date_fin', 'actif'],
+        where=lambda today: [EquipmentRental.date_fin == None, EquipmentRental.actif == True],
+        match=lambda v, today: v['date_fin'] is None and v['actif'] is True,
+    ),
+    Counter(
+        'upcoming_interventions', Intervention, ['statut', 'date_planifiee'],
+        where=lambda today: [
+            Intervention.date_planifiee >= today,
+            Intervention.date_planifiee <= today + timedelta(days=7),
+            Intervention.statut == 'planifiée'
+        ],
+        match=lambda v, today: (
+            v['statut'] == 'planifiée'
+            and datetime.combine(today, time.min) <= v['date_planifiee']
+            <= datetime.combine(today + timedelta(days=7), time.min)
+        ),
+        relative=True,
+    ),
+    Counter(
+        'unpaid_invoices', Invoice, ['statut', 'date_echeance'],
+        where=lambda today: [Invoice.statut == 'en attente', Invoice.date_echeance < today],
+        match=lambda v, today: v['statut'] == 'en attente' and v['date_echeance'] < today,
+        relative=True,
+    ),
+    Counter(
+        'maintenance_due', Equipment, ['statut', 'date_prochaine_maintenance'],
+        where=lambda today: [Equipment.date_prochaine_maintenance < today, Equipment.statut != 'réformé'],
+        match=lambda v, today: (
+            v['date_prochaine_maintenance'] is not None
+            and v['date_prochaine_maintenance'] < today
+            and v['statut'] != 'réformé'
+        ),
+        relative=True,
+    ),
+    Counter(
+        'current_month_revenue', Invoice, ['statut', 'date_emission'],
+        where=lambda today: [
+            Invoice.date_emission >= _month_bounds(today)[0],
+            Invoice.date_emission < _month_bounds(today)[1],
+            Invoice.statut == 'payée'
+        ],
+        match=lambda v, today: (
+            v['statut'] == 'payée'
+            and _month_bounds(today)[0] <= v['date_emission'] < _month_bounds(today)[1]
+        ),
+        amount='montant_ttc',
+        relative=True,
+    ),
+]
+
+_BY_MODEL = {}
+for _counter in COUNTERS:
+    _BY_MODEL.setdefault(_counter.model, []).append(_counter)
+_BY_TABLE = {model.__tablename__: counters for model, counters in _BY_MODEL.items()}
+
+
+def _add(connection, name, delta):
+    updated = connection.execute(
+        _COUNTERS.update().where(_COUNTERS.c.name == name).values(value=_COUNTERS.c.value + delta)
+    ).rowcount
+    if not updated:
+        connection.execute(_COUNTERS.insert().values(name=name, value=delta))
+
+
+def _invalidate(connection, counters):
+    names = sorted(c.name for c in counters)
+    if names:
+        connection.execute(_COUNTERS.update().where(_COUNTERS.c.name.in_(names)).values(valid_on=None))
+
+
+def _row_values(state, columns, old):
+    """
+    Valeurs des colonnes avant (`old`) ou après le flush ; None si une
+    ancienne valeur n'a jamais été chargée et ne peut être connue
+    """
+    values = {}
+    for key in columns:
+        history = state.attrs[key].history
+        if old and history.added:
+            if not history.deleted:
+                return None
+            values[key] = history.deleted[0]
+        else:
+            values[key] = state.attrs[key].value
+    return values
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    today = date.today()
+    deltas, stale = {}, set()
+
+    for obj, was_present, is_present in (
+        [(o, False, True) for o in session.new]
+        + [(o, True, True) for o in session.dirty if session.is_modified(o)]
+        + [(o, True, False) for o in session.deleted]
+    ):
+        state = inspect(obj)
+        for counter in _BY_MODEL.get(state.mapper.class_, ()):
+            if was_present and is_present and not any(state.attrs[c].history.has_changes() for c in counter.columns):
+                continue
+            old = _row_values(state, counter.columns, old=True) if was_present else None
+            if was_present and old is None:
+                stale.add(counter)
+                continue
+            new = _row_values(state, counter.columns, old=False) if is_present else None
+            rows = deltas.setdefault(counter, {})
+            for name, amount in counter.contribution(old, today).items():
+                rows[name] = rows.get(name, 0) - amount
+            for name, amount in counter.contribution(new, today).items():
+                rows[name] = rows.get(name, 0) + amount
+
+    if not deltas and not stale:
+        return
+
+    connection = session.connection()
+    # Verrou sur les lignes agrégées (ordre fixe) : un recalcul en cours se
+    # termine avant que l'écart ne soit appliqué, ou l'inclut déjà
+    headers = dict(connection.execute(
+        select(_COUNTERS.c.name, _COUNTERS.c.valid_on)
+        .where(_COUNTERS.c.name.in_(sorted(c.name for c in deltas)))
+        .order_by(_COUNTERS.c.name)
+        .with_for_update()
+    ).all()) if deltas else {}
+
+    for counter, rows in deltas.items():
+        # Compteur périmé : le prochain recalcul complet inclura ce flush
+        if counter in stale or not counter.is_fresh(headers.get(counter.name), today):
+            continue
+        for name, delta in sorted(rows.items()):
+            if delta:
+                _add(connection, name, delta)
+    _invalidate(connection, stale)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _do_orm_execute(orm_execute_state):
+    # Écritures groupées : l'écart n'est pas calculable, recalcul à la lecture
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and table.name in _BY_TABLE:
+            _invalidate(orm_execute_state.session.connection(), _BY_TABLE[table.name])
+
+
+def _rebuild(connection, counter, today):
+    """
+    Recalcule un compteur à partir des tables sources
+    """
+    # La ligne agrégée sert de verrou : un seul recalcul à la fois
+    claimed = connection.execute(
+        _COUNTERS.update()
+        .where(_COUNTERS.c.name == counter.name)
+        .where((_COUNTERS.c.valid_on == None) | (_COUNTERS.c.valid_on != today) if counter.relative
+               else _COUNTERS.c.valid_on == None)
+        .values(valid_on=today)
+    ).rowcount
+    if not claimed:
+        exists = connection.execute(select(_COUNTERS.c.name).where(_COUNTERS.c.name == counter.name)).first()
+        if exists:
+            return
+        connection.execute(_COUNTERS.insert().values(name=counter.name, value=0, valid_on=today))
+
+    values = counter.compute(connection, today)
+    if counter.group_by:
+        connection.execute(_COUNTERS.delete().where(_COUNTERS.c.name.like(f'{counter.name}:%')))
+        members = [{'name': n, 'value': v, 'valid_on': None} for n, v in values.items() if n != counter.name]
+        if members:
+            connection.execute(_COUNTERS.insert(), members)
+    connection.execute(
+        _COUNTERS.update().where(_COUNTERS.c.name == counter.name).values(value=values[counter.name])
+    )
+
+
+def read_counters(today=None):
+    """
+    Retourne {ligne: valeur} pour tous les compteurs du tableau de bord.
+
+    Une seule lecture de `dashboard_counters` dans le cas courant ; les
+    compteurs périmés (écriture groupée, changement de jour pour les
+    compteurs relatifs) sont recalculés une fois, validés, puis relus.
+    """
+    today = today or date.today()
+    rows = db.session.execute(select(_COUNTERS.c.name, _COUNTERS.c.value, _COUNTERS.c.valid_on)).all()
+    valid_on = {name: day for name, _, day in rows}
+
+    stale = [c for c in COUNTERS if not c.is_fresh(valid_on.get(c.name), today)]
+    if not stale:
+        return {name: value for name, value, _ in rows}
+
+    try:
+        connection = db.session.connection()
+        for counter in stale:
+            _rebuild(connection, counter, today)
+        db.session.commit()
+    except IntegrityError:
+        # Recalcul concurrent : ses résultats sont relus ci-dessous
+        db.session.rollback()
+    return dict(db.session.execute(select(_COUNTERS.c.name, _COUNTERS.c.value)).all())
+
+
+def rebuild_counters():
+    """
+    Invalide puis recalcule tous les compteurs (réinitialisation complète)
+    """
+    _invalidate(db.session.connection(), COUNTERS)
+    db.session.commit()
+    return read_counters()
+
+
+def group(counters, name):
+    """
+    Extrait les membres d'un compteur regroupé : {valeur: nombre}
+    """
+    prefix = f'{name}:'
+    return {k[len(prefix):]: int(v) for k, v in counters.items() if k.startswith(prefix) and v}
@@ -0,0 +1,41 @@
+from marshmallow import fields
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from app.utils.fieldsets import column_keys
+
+
+def loader_options(model, schema):
+    """
+    Construit les options de chargement correspondant aux champs imbriqués
+    d'un schéma (en tenant compte de son `only`).
+
+    Les relations vers un seul objet sont jointes dans la requête principale
+    (`joinedload`), les collections sont chargées en une requête groupée
+    (`selectinload`). Le parcours descend dans les schémas imbriqués : le
+    nombre de requêtes ne dépend plus du nombre de lignes sérialisées.
+
+    Un schéma imbriqué restreint (`only`) ne charge que ses colonnes, plus
+    celles qui relient une collection à son parent.
+    """
+    mapper = inspect(model)
+    options = []
+
+    for name, field in schema.dump_fields.items():
+        if not isinstance(field, fields.Nested):
+            continue
+        relationship = mapper.relationships.get(field.attribute or name)
+        if relationship is None:
+            continue
+
+        attribute = getattr(model, relationship.key)
+        loader = selectinload(attribute) if relationship.uselist else joinedload(attribute)
+
+        target = relationship.mapper.class_
+        children = loader_options(target, field.schema)
+        if field.schema.only is not None:
+            required = [getattr(target, relationship.mapper.get_property_by_column(c).key)
+                        for c in relationship.remote_side if c.table is relationship.mapper.local_table]
+            children.insert(0, load_only(*[getattr(target, k) for k in column_keys(target, field.schema.only, required)]))
+        options.append(loader.options(*children) if children else loader)
+
+    return options
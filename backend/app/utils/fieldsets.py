@@ -0,0 +1,70 @@
+from functools import lru_cache
+from flask import request
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+
+def get_requested_fields():
+    """
+    Extrait la liste des champs demandés via `?fields=id,nom,prenom`
+    """
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    return fields or None
+
+
+@lru_cache(maxsize=256)
+def _build_schema(schema_class, fields, many):
+    return schema_class(only=fields, many=many)
+
+
+def select_schema(schema, fields):
+    """
+    Retourne le schéma restreint aux champs demandés.
+
+    Marshmallow valide lui-même la liste `only` et lève une ValueError pour
+    tout champ inconnu. Les schémas restreints sont mis en cache.
+    """
+    if fields is None:
+        return schema
+    return _build_schema(type(schema), fields, schema.many)
+
+
+def column_keys(model, only, required=()):
+    """
+    Colonnes à charger pour sérialiser les champs `only` de `model` : les
+    colonnes demandées, celles de `required`, la clé primaire et les clés
+    étrangères des relations demandées
+    """
+    mapper = inspect(model)
+    requested = {f.split('.')[0] for f in only}
+    columns = mapper.column_attrs.keys()
+
+    keys = {f for f in requested if f in columns}
+    keys.update(c.key for c in required)
+    keys.update(mapper.get_property_by_column(c).key for c in mapper.primary_key)
+    for relationship in mapper.relationships:
+        if relationship.key in requested:
+            keys.update(
+                mapper.get_property_by_column(c).key
+                for c in relationship.local_columns
+                if c.table is mapper.local_table
+            )
+    return sorted(keys)
+
+
+def restrict_columns(query, model, schema, required=()):
+    """
+    Limite les colonnes chargées par la requête à celles du schéma restreint.
+
+    Les colonnes de `required` (colonnes de tri, par exemple) et la clé
+    primaire sont toujours chargées, ainsi que les clés étrangères des
+    relations demandées. Les relations non demandées ne sont jamais lues.
+    Les relations imbriquées sont restreintes par `loader_options`.
+    """
+    if schema.only is None:
+        return query
+
+    return query.options(load_only(*[getattr(model, k) for k in column_keys(model, schema.only, required)]))
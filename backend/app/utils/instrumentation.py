@@ -0,0 +1,237 @@
+import heapq
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Collecteurs actifs dans le contexte courant (requête, bloc `query_budget`)
+_collectors = ContextVar('sql_collectors', default=())
+
+_IN_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    """
+    Forme normalisée d'une requête : espaces réduits, listes IN (...)
+    ramenées à un seul paramètre, pour reconnaître une même requête répétée
+    """
+    return _IN_LIST.sub('(?)', _SPACES.sub(' ', statement).strip())
+
+
+class QueryStats:
+    """
+    Mesures SQL d'un bloc : nombre de requêtes, temps cumulé, requêtes les
+    plus lentes, répétitions par forme et durées nommées (sérialisation...)
+    """
+
+    def __init__(self, slowest=3):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.slowest = []
+        self.keep = slowest
+        self.timings = {}
+        self._sequence = 0
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+        self._sequence += 1
+        entry = (duration, self._sequence, statement)
+        if len(self.slowest) < self.keep:
+            heapq.heappush(self.slowest, entry)
+        else:
+            heapq.heappushpop(self.slowest, entry)
+
+    def add_time(self, name, duration):
+        self.timings[name] = self.timings.get(name, 0.0) + duration
+
+    def repeated(self, limit):
+        """
+        Formes de requête émises plus de `limit` fois (suspicion de N+1)
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > limit]
+
+    def slowest_statements(self):
+        return [
+            {"duration_ms": round(duration * 1000, 2), "statement": statement_shape(statement)[:500]}
+            for duration, _, statement in sorted(self.slowest, reverse=True)
+        ]
+
+
+@contextmanager
+def collect(slowest=3):
+    """
+    Mesure les requêtes SQL émises dans le bloc (fil et contexte courants)
+    """
+    stats = QueryStats(slowest)
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """
+    Ajoute la durée du bloc à la mesure `name` des collecteurs actifs
+    """
+    collectors = _collectors.get()
+    if not collectors:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        for stats in collectors:
+            stats.add_time(name, duration)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget:
+    """
+    Budget de requêtes d'une vue ou d'un bloc.
+
+    En décorateur, il déclare le budget de la vue : vérifié à chaque requête,
+    il lève `QueryBudgetExceeded` en mode test et journalise un avertissement
+    sinon. En gestionnaire de contexte (tests, vérifications), il lève
+    l'exception à la sortie du bloc.
+    """
+
+    def __init__(self, max_queries=None, max_repeats=None):
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+        self._collect = None
+        self.stats = None
+
+    def __call__(self, view):
+        view.query_budget = self
+        return view
+
+    def violations(self, stats, default_repeats=None):
+        problems = []
+        if self.max_queries is not None and stats.count > self.max_queries:
+            problems.append(f'{stats.count} requêtes pour un budget de {self.max_queries}')
+        max_repeats = self.max_repeats if self.max_repeats is not None else default_repeats
+        if max_repeats is not None:
+            for shape, count in stats.repeated(max_repeats):
+                problems.append(f'requête répétée {count} fois (N+1 ?) : {shape[:200]}')
+        return problems
+
+    def __enter__(self):
+        self._collect = collect()
+        self.stats = self._collect.__enter__()
+        return self.stats
+
+    def __exit__(self, *exc_info):
+        self._collect.__exit__(*exc_info)
+        if exc_info[0] is None:
+            problems = self.violations(self.stats)
+            if problems:
+                raise QueryBudgetExceeded('; '.join(problems))
+        return False
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors.get():
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    for stats in _collectors.get():
+        stats.record(statement, duration)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """
+    Encodage JSON compté dans la mesure de sérialisation
+    """
+
+    def dumps(self, obj, **kwargs):
+        with timed('serialize'):
+            return super().dumps(obj, **kwargs)
+
+
+def server_timing(stats, total):
+    """
+    Valeur de l'en-tête Server-Timing d'une réponse
+    """
+    metrics = [f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"']
+    for name, duration in sorted(stats.timings.items()):
+        metrics.append(f'{name};dur={duration * 1000:.1f}')
+    metrics.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(metrics)
+
+
+def init_instrumentation(app):
+    """
+    Mesure chaque requête HTTP : en-tête Server-Timing, champs de journal
+    structurés et contrôle des budgets de requêtes déclarés par les vues
+    """
+    logger = app.logger.getChild('sql')
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_instrumentation():
+        g.sql_collect = collect(app.config['SQL_SLOWEST_STATEMENTS'])
+        g.sql_stats = g.sql_collect.__enter__()
+        g.sql_started = time.perf_counter()
+
+    @app.after_request
+    def finish_instrumentation(response):
+        stats = g.get('sql_stats')
+        if stats is None:
+            return response
+        total = time.perf_counter() - g.sql_started
+        response.headers.add('Server-Timing', server_timing(stats, total))
+
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": round(total * 1000, 2),
+            "db_queries": stats.count,
+            "db_time_ms": round(stats.duration * 1000, 2),
+            "serialize_ms": round(stats.timings.get('serialize', 0.0) * 1000, 2),
+            "slowest": stats.slowest_statements(),
+        }
+
+        view = app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None) or query_budget()
+        problems = budget.violations(stats, app.config['SQL_MAX_REPEATS'])
+        if problems:
+            fields["budget_violations"] = problems
+            if app.testing:
+                raise QueryBudgetExceeded(f'{request.method} {request.path} : ' + '; '.join(problems))
+            logger.warning('Budget de requêtes dépassé', extra={"sql": fields})
+        elif total * 1000 >= app.config['SQL_SLOW_REQUEST_MS']:
+            logger.warning('Requête lente', extra={"sql": fields})
+        else:
+            logger.info('Requête', extra={"sql": fields})
+        return response
+
+    @app.teardown_request
+    def stop_instrumentation(exc):
+        collector = g.pop('sql_collect', None)
+        if collector is not None:
+            collector.__exit__(None, None, None)
@@ -0,0 +1,84 @@
+from datetime import date
+from itertools import chain
+import numpy as np
+from sqlalchemy import Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+EPOCH = date(1970, 1, 1)
+
+
+class day_number(FunctionElement):
+    """
+    Numéro de jour (depuis le 1er janvier 1970) d'une date ou d'un datetime,
+    calculé par la base : les lignes arrivent sous forme d'entiers, sans
+    conversion de dates côté Python.
+    """
+    type = Integer()
+    name = 'day_number'
+    inherit_cache = True
+
+
+@compiles(day_number)
+def _day_number_default(element, compiler, **kw):
+    # PostgreSQL : la différence de deux dates est un nombre de jours
+    return "(CAST(%s AS DATE) - DATE '1970-01-01')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(day_number, 'sqlite')
+def _day_number_sqlite(element, compiler, **kw):
+    return 'CAST(julianday(%s) - 2440587.5 AS INTEGER)' % compiler.process(element.clauses, **kw)
+
+
+def to_day(value):
+    """
+    Numéro de jour d'une date Python (même origine que `day_number`)
+    """
+    return (value - EPOCH).days
+
+
+def load_columns(connection, statement, count):
+    """
+    Exécute une requête de colonnes entières et retourne un tableau par colonne
+    """
+    rows = connection.execute(statement).all()
+    # Lecture à plat : np.array sur des Row sonderait chaque ligne
+    data = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * count).reshape(-1, count)
+    return tuple(data[:, i] for i in range(count))
+
+
+def covered_days(owners, starts, ends, size):
+    """
+    Nombre de jours couverts par l'union des intervalles [start, end) de
+    chaque propriétaire (indices 0..size-1), par balayage vectorisé.
+
+    Chaque intervalle devient deux événements (+1 au début, -1 à la fin) ;
+    triés par (propriétaire, jour), leur somme cumulée donne le nombre
+    d'intervalles ouverts, et la durée entre deux événements consécutifs
+    compte dès que ce nombre est positif. Les chevauchements ne sont donc
+    comptés qu'une fois, sans boucle Python.
+    """
+    owners = np.asarray(owners, dtype=np.int64)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+
+    valid = ends > starts
+    owners, starts, ends = owners[valid], starts[valid], ends[valid]
+    if not len(owners):
+        return np.zeros(size, dtype=np.int64)
+
+    event_owner = np.concatenate([owners, owners])
+    event_day = np.concatenate([starts, ends])
+    event_delta = np.concatenate([np.ones_like(starts), -np.ones_like(ends)])
+
+    order = np.lexsort((event_day, event_owner))
+    event_owner, event_day, event_delta = event_owner[order], event_day[order], event_delta[order]
+
+    # Intervalles ouverts après chaque événement : la somme de chaque
+    # propriétaire revient à zéro, la somme globale reste donc par propriétaire
+    open_count = np.cumsum(event_delta)
+    length = np.diff(event_day)
+    same_owner = event_owner[1:] == event_owner[:-1]
+    covered = (open_count[:-1] > 0) & same_owner
+
+    return np.bincount(event_owner[:-1][covered], weights=length[covered], minlength=size).astype(np.int64)
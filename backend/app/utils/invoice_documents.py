@@ -0,0 +1,280 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from sqlalchemy import select, update
+from app import db
+from app.models.insurance import Insurance
+from app.models.invoice import Invoice, InvoiceItem
+from app.models.patient import Patient
+from app.utils.pdf import PAGE_HEIGHT, PAGE_WIDTH, PdfDocument
+
+# Version de la mise en page : l'incrémenter invalide tous les documents
+TEMPLATE_VERSION = 1
+ITEMS_PER_PAGE = 30
+RENDER_CHUNK_SIZE = 500
+DOCUMENTS_PER_TASK = 50
+
+MARGIN = 50
+RIGHT = PAGE_WIDTH - MARGIN
+
+
+def document_root():
+    """
+    Répertoire des documents de facture (INVOICE_PDF_DIR, à défaut
+    `instance/factures`)
+    """
+    return current_app.config.get('INVOICE_PDF_DIR') or os.path.join(current_app.instance_path, 'factures')
+
+
+def load_payloads(invoice_ids):
+    """
+    Contenu imprimé des factures, en deux requêtes : {id: contenu}.
+
+    Le contenu ne retient que ce qui figure sur le document (dates en ISO),
+    si bien que son empreinte ne change que si le rendu change.
+    """
+    payloads = {}
+    rows = db.session.execute(select(
+        Invoice.id, Invoice.numero_facture, Invoice.statut,
+        Invoice.date_emission, Invoice.date_echeance, Invoice.periode_debut, Invoice.periode_fin,
+        Invoice.date_paiement, Invoice.montant_ht, Invoice.taux_tva, Invoice.montant_ttc,
+        Invoice.numero_dossier_assurance, Invoice.taux_prise_en_charge,
+        Invoice.montant_prise_en_charge, Invoice.reste_a_charge,
+        Patient.nom, Patient.prenom, Patient.adresse, Patient.code_postal, Patient.ville,
+        Patient.numero_securite_sociale,
+        Insurance.nom.label('assurance')
+    ).join(Patient, Patient.id == Invoice.patient_id).outerjoin(
+        Insurance, Insurance.id == Invoice.assurance_id
+    ).where(Invoice.id.in_(invoice_ids))).mappings()
+
+    for row in rows:
+        payload = {key: value.isoformat() if hasattr(value, 'isoformat') else value for key, value in row.items()}
+        payload['items'] = []
+        payloads[payload.pop('id')] = payload
+
+    items = db.session.execute(select(
+        InvoiceItem.facture_id, InvoiceItem.description, InvoiceItem.quantite,
+        InvoiceItem.prix_unitaire, InvoiceItem.montant_total
+    ).where(InvoiceItem.facture_id.in_(invoice_ids)).order_by(InvoiceItem.facture_id, InvoiceItem.id))
+    for facture_id, *item in items:
+        payloads[facture_id]['items'].append(item)
+    return payloads
+
+
+def content_key(payload):
+    """
+    Empreinte SHA-256 du contenu et de la version de mise en page
+    """
+    canonical = json.dumps([TEMPLATE_VERSION, payload], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def document_path(key):
+    """
+    Chemin relatif (valeur de `document_facture`) d'un document
+    """
+    return os.path.join(key[:2], f'{key}.pdf')
+
+
+def _amount(value):
+    return f'{value or 0:,.2f} €'.replace(',', ' ').replace('.', ',')
+
+
+def _date(value):
+    return '/'.join(reversed(value.split('-'))) if value else ''
+
+
+def render_invoice(payload):
+    """
+    Document PDF d'une facture : patient, lignes, totaux, prise en charge
+    """
+    document = PdfDocument()
+    items = payload['items']
+    pages = max(1, -(-len(items) // ITEMS_PER_PAGE))
+
+    for page in range(pages):
+        document.add_page()
+        top = PAGE_HEIGHT - MARGIN
+        document.text(MARGIN, top, 'FACTURE', size=18, font='bold')
+        document.text(RIGHT, top, f"N° {payload['numero_facture']}", size=12, font='bold', align='right')
+        document.text(RIGHT, MARGIN - 20, f'Page {page + 1} / {pages}', size=8, align='right')
+
+        y = top - 40
+        if page == 0:
+            patient = [
+                f"{payload['prenom']} {payload['nom']}",
+                payload['adresse'],
+                f"{payload['code_postal']} {payload['ville']}",
+            ]
+            if payload['numero_securite_sociale']:
+                patient.append(f"N° de sécurité sociale : {payload['numero_securite_sociale']}")
+            details = [
+                f"Date d'émission : {_date(payload['date_emission'])}",
+                f"Échéance : {_date(payload['date_echeance'])}",
+                f"Période : du {_date(payload['periode_debut'])} au {_date(payload['periode_fin'])}",
+            ]
+            if payload['statut'] == 'payée':
+                details.append(f"Acquittée le {_date(payload['date_paiement'])}")
+            for position, line in enumerate(patient):
+                document.text(MARGIN, y - 14 * position, line, font='bold' if position == 0 else 'regular')
+            for position, line in enumerate(details):
+                document.text(330, y - 14 * position, line)
+            y -= 14 * max(len(patient), len(details)) + 30
+
+        document.text(MARGIN, y, 'Description', font='bold')
+        document.text(380, y, 'Qté', font='bold', align='right')
+        document.text(460, y, 'P.U. HT', font='bold', align='right')
+        document.text(RIGHT, y, 'Total HT', font='bold', align='right')
+        document.line(MARGIN, y - 6, RIGHT, y - 6)
+        y -= 22
+
+        for description, quantite, prix_unitaire, montant_total in items[page * ITEMS_PER_PAGE:(page + 1) * ITEMS_PER_PAGE]:
+            document.text(MARGIN, y, description if len(description) <= 55 else description[:54] + '…', size=9)
+            document.text(380, y, f'{quantite:g}'.replace('.', ','), size=9, align='right')
+            document.text(460, y, _amount(prix_unitaire), size=9, align='right')
+            document.text(RIGHT, y, _amount(montant_total), size=9, align='right')
+            y -= 16
+
+    document.line(330, y + 6, RIGHT, y + 6)
+    y -= 10
+    totals = [
+        ('Total HT', _amount(payload['montant_ht'])),
+        (f"TVA ({payload['taux_tva'] or 0:g} %)".replace('.', ','),
+         _amount((payload['montant_ttc'] or 0) - (payload['montant_ht'] or 0))),
+        ('Total TTC', _amount(payload['montant_ttc'])),
+    ]
+    if payload['assurance']:
+        dossier = f" (dossier {payload['numero_dossier_assurance']})" if payload['numero_dossier_assurance'] else ''
+        totals += [
+            (f"Prise en charge {payload['assurance']}{dossier}, "
+             f"{payload['taux_prise_en_charge'] or 0:g} %".replace('.', ','),
+             _amount(payload['montant_prise_en_charge'])),
+            ('Reste à charge patient', _amount(payload['reste_a_charge'])),
+        ]
+    for label, value in totals:
+        bold = label in ('Total TTC', 'Reste à charge patient')
+        document.text(460, y, label, font='bold' if bold else 'regular', align='right')
+        document.text(RIGHT, y, value, font='bold' if bold else 'regular', align='right')
+        y -= 16
+
+    return document.render()
+
+
+def write_document(root, key, payload):
+    """
+    Rend et enregistre un document sous son empreinte (exécuté dans un
+    processus du pool) ; un document déjà présent n'est pas recalculé
+    """
+    path = os.path.join(root, document_path(key))
+    if os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Écriture atomique : un document présent est toujours complet
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(handle, 'wb') as output:
+        output.write(render_invoice(payload))
+    os.replace(temporary, path)
+    return True
+
+
+def write_documents(root, documents):
+    """
+    Tâche du pool : rend une tranche de documents [(empreinte, contenu)] ;
+    retourne le nombre de documents rendus
+    """
+    return sum(write_document(root, key, payload) for key, payload in documents)
+
+
+def _link_documents(paths, current):
+    """
+    Renseigne `document_facture` des factures dont le document a changé
+    """
+    changed = [{'id': invoice_id, 'document_facture': path}
+               for invoice_id, path in paths.items() if current.get(invoice_id) != path]
+    if changed:
+        db.session.execute(update(Invoice), changed)
+    return len(changed)
+
+
+def ensure_document(invoice_id):
+    """
+    Document d'une facture, rendu dans le processus courant si nécessaire ;
+    retourne son chemin absolu (None si la facture n'existe pas)
+    """
+    payload = load_payloads([invoice_id]).get(invoice_id)
+    if payload is None:
+        return None
+    root = document_root()
+    key = content_key(payload)
+    write_document(root, key, payload)
+
+    current = db.session.execute(select(Invoice.document_facture).where(Invoice.id == invoice_id)).scalar()
+    _link_documents({invoice_id: document_path(key)}, {invoice_id: current})
+    db.session.commit()
+    return os.path.join(root, document_path(key))
+
+
+def _pool_context():
+    """
+    Contexte des processus de rendu : serveur de fork (module préchargé une
+    fois, processus neufs sans fils ni connexions hérités du parent),
+    à défaut « spawn »
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+def render_documents(invoice_ids, workers=None, chunk_size=RENDER_CHUNK_SIZE, progress=None):
+    """
+    Rend les documents d'un ensemble de factures sur un pool de processus.
+
+    Les factures sont traitées par lots : contenu chargé en deux requêtes,
+    empreinte calculée ici, puis seuls les documents absents du stockage
+    sont confiés au pool (`workers` processus au plus). Une facture
+    inchangée ne coûte qu'une empreinte. Chaque lot renseigne
+    `document_facture` et est validé avant le suivant.
+    """
+    root = document_root()
+    workers = workers or current_app.config['INVOICE_PDF_WORKERS']
+    totals = {'factures': 0, 'rendus': 0, 'en_cache': 0, 'liees': 0}
+    invoice_ids = list(invoice_ids)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+        for offset in range(0, len(invoice_ids), chunk_size):
+            chunk = invoice_ids[offset:offset + chunk_size]
+            payloads = load_payloads(chunk)
+            current = dict(db.session.execute(
+                select(Invoice.id, Invoice.document_facture).where(Invoice.id.in_(chunk))
+            ).all())
+
+            paths, missing = {}, []
+            for invoice_id, payload in payloads.items():
+                key = content_key(payload)
+                paths[invoice_id] = document_path(key)
+                if os.path.exists(os.path.join(root, paths[invoice_id])):
+                    totals['en_cache'] += 1
+                else:
+                    missing.append((key, payload))
+
+            # Tranches de quelques dizaines de documents : un rendu prend
+            # moins d'une milliseconde, l'aller-retour vers le pool davantage
+            size = max(1, min(DOCUMENTS_PER_TASK, -(-len(missing) // workers)))
+            futures = [pool.submit(write_documents, root, missing[start:start + size])
+                       for start in range(0, len(missing), size)]
+            rendered = sum(future.result() for future in futures)
+            totals['rendus'] += rendered
+            totals['en_cache'] += len(missing) - rendered
+
+            totals['liees'] += _link_documents(paths, current)
+            db.session.commit()
+            totals['factures'] += len(payloads)
+            if progress:
+                progress(totals)
+    return totals
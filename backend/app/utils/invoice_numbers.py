@@ -0,0 +1,103 @@
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app.models.invoice import Invoice
+from app.models.invoice_counter import InvoiceCounter, InvoiceNumberReserve
+
+_COUNTERS = InvoiceCounter.__table__
+_RESERVE = InvoiceNumberReserve.__table__
+PREFIX = 'F-'
+
+
+def _month(date_emission):
+    return date_emission.strftime('%Y%m')
+
+
+def format_number(mois, sequence):
+    """
+    Numéro de facture : « F-202610-000042 »
+    """
+    return f'{PREFIX}{mois}-{sequence:06d}'
+
+
+def _highest_existing(connection, mois):
+    """
+    Plus grand numéro déjà émis pour le mois (factures antérieures au
+    compteur, numérotées au hasard), pour démarrer le compteur au-delà
+    """
+    prefix = f'{PREFIX}{mois}-'
+    # Plage sur l'index unique de numero_facture ('.' suit '-' en ASCII)
+    numbers = connection.execute(select(Invoice.numero_facture).where(
+        Invoice.numero_facture >= prefix,
+        Invoice.numero_facture < f'{PREFIX}{mois}.'
+    )).scalars()
+    suffixes = [int(n[len(prefix):]) for n in numbers if n[len(prefix):].isdigit()]
+    return max(suffixes, default=0)
+
+
+def _reserve_block(connection, mois, count):
+    """
+    Avance le compteur du mois de `count` et verse les numéros obtenus à la
+    réserve
+    """
+    update = _COUNTERS.update().where(_COUNTERS.c.mois == mois).values(
+        dernier=_COUNTERS.c.dernier + count
+    ).returning(_COUNTERS.c.dernier)
+
+    last = connection.execute(update).scalar()
+    if last is None:
+        try:
+            # Premier numéro du mois : la clé primaire départage les processus
+            with connection.begin_nested():
+                connection.execute(_COUNTERS.insert().values(
+                    mois=mois, dernier=_highest_existing(connection, mois)
+                ))
+        except IntegrityError:
+            pass
+        last = connection.execute(update).scalar()
+
+    connection.execute(_RESERVE.insert(), [
+        {'mois': mois, 'sequence': sequence} for sequence in range(last - count + 1, last + 1)
+    ])
+
+
+def allocate_numbers(connection, date_emission, count=1):
+    """
+    Attribue `count` numéros du mois de `date_emission`, les plus petits
+    disponibles.
+
+    Le compteur n'est avancé que par blocs, dans une courte transaction
+    distincte validée aussitôt : son verrou n'est jamais tenu pendant le
+    travail de l'appelant. Les numéros du bloc passent par la réserve, d'où
+    l'appelant les retire dans sa propre transaction ; deux transactions
+    concurrentes y prennent des lignes différentes (SKIP LOCKED) au lieu de
+    s'attendre. Si l'appelant annule, ses numéros reviennent dans la réserve
+    et sont attribués en premier ensuite : la suite des numéros validés
+    reste sans trou.
+
+    Sous SQLite, les écritures sont de toute façon sérialisées par la base
+    et une seconde connexion attendrait la première : le bloc est réservé
+    dans la transaction de l'appelant.
+    """
+    if count < 1:
+        return []
+    mois = _month(date_emission)
+    numbers = []
+
+    while len(numbers) < count:
+        taken = connection.execute(select(_RESERVE.c.sequence).where(
+            _RESERVE.c.mois == mois
+        ).order_by(_RESERVE.c.sequence).limit(count - len(numbers)).with_for_update(skip_locked=True)).scalars().all()
+        if taken:
+            connection.execute(_RESERVE.delete().where(_RESERVE.c.mois == mois, _RESERVE.c.sequence.in_(taken)))
+            numbers += taken
+            continue
+
+        # Réserve vide : un bloc de la taille exacte du manque, pour ne pas
+        # laisser de numéros inutilisés en fin de mois
+        if connection.dialect.name == 'sqlite':
+            _reserve_block(connection, mois, count - len(numbers))
+        else:
+            with connection.engine.begin() as own:
+                _reserve_block(own, mois, count - len(numbers))
+
+    return [format_number(mois, sequence) for sequence in sorted(numbers)]
@@ -0,0 +1,170 @@
+import json
+import queue
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.utils.dashboard_counters import COUNTERS
+
+# Indicateurs diffusés en direct (clés de DashboardService.get_stats_summary)
+STREAMED_KEYS = ('equipment_status', 'intervention_status', 'unpaid_invoices', 'active_rentals')
+
+_COUNTED_MODELS = tuple({c.model for c in COUNTERS})
+_COUNTED_TABLES = {m.__tablename__ for m in _COUNTED_MODELS}
+
+
+class DashboardBroker:
+    """
+    Diffusion en processus des variations du tableau de bord.
+
+    Un seul fil de publication recalcule le résumé après chaque validation
+    touchant une table comptée (et à intervalle régulier, pour les écritures
+    des autres processus et le changement de jour), puis envoie à chaque
+    abonné les seules clés modifiées. Les abonnés n'ont qu'une file : ils ne
+    tiennent aucune connexion à la base.
+    """
+
+    def __init__(self, queue_size=100, settle=0.2):
+        self.queue_size = queue_size
+        self.settle = settle
+        self.subscribers = set()
+        self.snapshot = None
+        self.lock = threading.Lock()
+        self.changed = threading.Event()
+        self.thread = None
+
+    def notify(self):
+        """
+        Signale qu'une transaction a modifié une table comptée
+        """
+        self.changed.set()
+
+    def subscribe(self, app):
+        """
+        Inscrit un abonné ; retourne (file, résumé courant)
+        """
+        with self.lock:
+            if self.snapshot is None:
+                with app.app_context():
+                    self.snapshot = self.compute()
+            subscriber = queue.Queue(maxsize=self.queue_size)
+            self.subscribers.add(subscriber)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, args=(app,), name='dashboard-broker', daemon=True
+                )
+                self.thread.start()
+            return subscriber, dict(self.snapshot)
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+            # Sans abonné, le résumé n'est plus suivi : recalcul au prochain
+            if not self.subscribers:
+                self.snapshot = None
+
+    @staticmethod
+    def compute():
+        from app import db
+        from app.services.dashboard_service import DashboardService
+        try:
+            summary = DashboardService.get_stats_summary()
+        finally:
+            # Connexion rendue au pool aussitôt la lecture faite
+            db.session.remove()
+        return {key: summary[key] for key in STREAMED_KEYS}
+
+    def publish(self, snapshot):
+        """
+        Envoie aux abonnés les clés modifiées depuis le dernier résumé
+        """
+        with self.lock:
+            previous = self.snapshot or {}
+            delta = {k: v for k, v in snapshot.items() if previous.get(k) != v}
+            self.snapshot = snapshot
+            if not delta or not previous:
+                return delta
+            for subscriber in list(self.subscribers):
+                try:
+                    subscriber.put_nowait(delta)
+                except queue.Full:
+                    # Abonné trop lent : il est déconnecté et se resynchronise
+                    self.subscribers.discard(subscriber)
+                    with subscriber.mutex:
+                        subscriber.queue.clear()
+                    subscriber.put_nowait(None)
+        return delta
+
+    def _run(self, app):
+        while True:
+            self.changed.wait(timeout=app.config['DASHBOARD_STREAM_REFRESH'])
+            # Regroupe les validations rapprochées en un seul calcul
+            time.sleep(self.settle)
+            self.changed.clear()
+            if not self.subscribers:
+                continue
+            try:
+                with app.app_context():
+                    snapshot = self.compute()
+            except Exception:
+                app.logger.exception('Calcul du tableau de bord en direct impossible')
+                continue
+            self.publish(snapshot)
+
+
+broker = DashboardBroker()
+
+
+def format_event(name, data):
+    """
+    Met en forme un événement Server-Sent Events
+    """
+    return f'event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+def event_stream(subscriber, snapshot, heartbeat):
+    """
+    Générateur SSE d'un abonné : résumé complet, puis variations
+    """
+    try:
+        yield format_event('snapshot', snapshot)
+        while True:
+            try:
+                delta = subscriber.get(timeout=heartbeat)
+            except queue.Empty:
+                # Commentaire SSE : garde la connexion ouverte derrière un proxy
+                yield ': keep-alive\n\n'
+                continue
+            if delta is None:
+                yield format_event('resync', {})
+                return
+            yield format_event('delta', delta)
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _COUNTED_MODELS):
+            session.info['dashboard_changed'] = True
+            return
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _do_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and table.name in _COUNTED_TABLES:
+            orm_execute_state.session.info['dashboard_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    if session.info.pop('dashboard_changed', False):
+        broker.notify()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('dashboard_changed', None)
@@ -0,0 +1,94 @@
+import base64
+import json
+from datetime import date, datetime
+from flask import request
+from sqlalchemy import tuple_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(values):
+    """
+    Encode les valeurs de tri de la dernière ligne en un curseur opaque
+    """
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """
+    Décode un curseur opaque en valeurs typées selon les colonnes de tri
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Curseur invalide")
+
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        raise ValueError("Curseur invalide")
+
+    values = []
+    for column, value in zip(columns, payload):
+        python_type = column.type.python_type
+        if value is not None and python_type in (date, datetime):
+            try:
+                value = python_type.fromisoformat(value)
+            except (ValueError, TypeError):
+                raise ValueError("Curseur invalide")
+        values.append(value)
+    return values
+
+
+def parse_limit(limit):
+    """
+    Valide une taille de page et la borne à MAX_LIMIT
+    """
+    try:
+        limit = int(limit)
+    except (ValueError, TypeError):
+        raise ValueError("Le paramètre limit doit être un entier")
+    if limit < 1:
+        raise ValueError("Le paramètre limit doit être positif")
+
+    return min(limit, MAX_LIMIT)
+
+
+def get_pagination_args():
+    """
+    Extrait les paramètres `limit` et `cursor` de la requête courante
+    """
+    limit = parse_limit(request.args.get('limit', DEFAULT_LIMIT))
+    return limit, request.args.get('cursor') or None
+
+
+def paginate(query, columns, limit, cursor=None, descending=False):
+    """
+    Pagination par clé (keyset) sur les colonnes de tri données.
+
+    `columns` doit se terminer par la clé primaire pour garantir un ordre
+    total. Aucune clause OFFSET n'est utilisée : la page suivante reprend
+    strictement après les valeurs encodées dans le curseur, ce qui garde un
+    coût constant quelle que soit la profondeur de la page.
+
+    Retourne le tuple (éléments, curseur suivant ou None).
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        keys = tuple_(*columns)
+        query = query.filter(keys < tuple_(*values) if descending else keys > tuple_(*values))
+
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+
+    return rows, next_cursor
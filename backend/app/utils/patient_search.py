@@ -0,0 +1,187 @@
+import re
+import unicodedata
+from sqlalchemy import Float, Integer, false, func, literal_column, or_, select, text
+from app import db
+from app.models.patient import Patient
+
+# Colonnes couvertes par l'index de recherche
+SEARCH_COLUMNS = ('nom', 'prenom', 'numero_securite_sociale', 'telephone', 'email')
+
+# --- SQLite : table FTS5 à contenu externe, synchronisée par triggers ---
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+        nom, prenom, numero_securite_sociale, telephone, email,
+        content='patients', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+        INSERT INTO patients_fts(rowid, nom, prenom, numero_securite_sociale, telephone, email)
+        VALUES (new.id, new.nom, new.prenom, new.numero_securite_sociale, new.telephone, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, nom, prenom, numero_securite_sociale, telephone, email)
+        VALUES ('delete', old.id, old.nom, old.prenom, old.numero_securite_sociale, old.telephone, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, nom, prenom, numero_securite_sociale, telephone, email)
+        VALUES ('delete', old.id, old.nom, old.prenom, old.numero_securite_sociale, old.telephone, old.email);
+        INSERT INTO patients_fts(rowid, nom, prenom, numero_securite_sociale, telephone, email)
+        VALUES (new.id, new.nom, new.prenom, new.numero_securite_sociale, new.telephone, new.email);
+    END
+    """,
+    # Indexation des lignes déjà présentes
+    "INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS patients_fts_au",
+    "DROP TRIGGER IF EXISTS patients_fts_ad",
+    "DROP TRIGGER IF EXISTS patients_fts_ai",
+    "DROP TABLE IF EXISTS patients_fts",
+]
+
+# --- PostgreSQL : index trigrammes sur des expressions sans accents ---
+# Les index d'expression sont maintenus par PostgreSQL à chaque écriture.
+# concat_ws() n'est que STABLE, donc refusée dans un index : concaténation
+# par « || », reproduite à l'identique par `_pg_expression`
+POSTGRES_SEARCH_TEXT = " || ' ' || ".join(f"coalesce({column}, '')" for column in SEARCH_COLUMNS)
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # unaccent() n'est pas IMMUTABLE : on l'enveloppe pour pouvoir l'indexer
+    """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    AS $$ SELECT public.unaccent('public.unaccent', $1) $$
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_patients_search_trgm ON patients USING gin (
+        f_unaccent(lower(%s)) gin_trgm_ops
+    )
+    """ % POSTGRES_SEARCH_TEXT,
+    "CREATE INDEX IF NOT EXISTS ix_patients_nom_trgm ON patients USING gin (f_unaccent(lower(nom)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_patients_prenom_trgm ON patients USING gin (f_unaccent(lower(prenom)) gin_trgm_ops)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS ix_patients_prenom_trgm",
+    "DROP INDEX IF EXISTS ix_patients_nom_trgm",
+    "DROP INDEX IF EXISTS ix_patients_search_trgm",
+    "DROP FUNCTION IF EXISTS f_unaccent(text)",
+]
+
+
+def create_search_index(bind):
+    """
+    Crée (ou complète) l'index de recherche des patients pour le dialecte courant
+    """
+    statements = {'sqlite': SQLITE_DDL, 'postgresql': POSTGRES_DDL}.get(bind.dialect.name, [])
+    for statement in statements:
+        bind.execute(text(statement))
+
+
+def drop_search_index(bind):
+    """
+    Supprime l'index de recherche des patients
+    """
+    statements = {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}.get(bind.dialect.name, [])
+    for statement in statements:
+        bind.execute(text(statement))
+
+
+def normalize(value):
+    """
+    Met en minuscules et retire les accents (« Hélène » -> « helene »)
+    """
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def _fts_query(term, columns):
+    """
+    Construit une requête FTS5 : chaque mot devient un préfixe, tous requis
+    """
+    tokens = re.findall(r'\w+', normalize(term))
+    if not tokens:
+        return None
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    if tuple(columns) != SEARCH_COLUMNS:
+        match = '{%s} : (%s)' % (' '.join(columns), match)
+    return match
+
+
+def _pg_expression(columns):
+    """
+    Expression indexée côté PostgreSQL (doit correspondre exactement aux index)
+    """
+    if len(columns) == 1:
+        value = getattr(Patient, columns[0])
+    else:
+        # Littéraux en clair (pas de paramètres) : même texte que POSTGRES_SEARCH_TEXT
+        value = func.coalesce(getattr(Patient, columns[0]), literal_column("''"))
+        for column in columns[1:]:
+            value = value.op('||')(literal_column("' '")).op('||')(
+                func.coalesce(getattr(Patient, column), literal_column("''"))
+            )
+    return func.f_unaccent(func.lower(value))
+
+
+def _like_pattern(term):
+    escaped = normalize(term).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _fts_subquery(match):
+    return text(
+        "SELECT rowid AS patient_id, rank FROM patients_fts WHERE patients_fts MATCH :fts_match"
+    ).bindparams(fts_match=match).columns(patient_id=Integer, rank=Float).subquery('patients_fts_match')
+
+
+def search_filter(term, columns=SEARCH_COLUMNS):
+    """
+    Condition SQL restreignant les patients à ceux qui correspondent au terme
+    """
+    dialect = db.engine.dialect.name
+
+    if dialect == 'sqlite':
+        match = _fts_query(term, columns)
+        if match is None:
+            return false()
+        return Patient.id.in_(select(_fts_subquery(match).c.patient_id))
+
+    if dialect == 'postgresql' and tuple(columns) in (SEARCH_COLUMNS, ('nom',), ('prenom',)):
+        return _pg_expression(columns).like(_like_pattern(term), escape='\\')
+
+    # Autres moteurs : recherche non indexée
+    pattern = f'%{term}%'
+    return or_(*[getattr(Patient, c).ilike(pattern) for c in columns])
+
+
+def ranked_search(query, term):
+    """
+    Applique la recherche plein texte à une requête Patient, triée par pertinence
+    """
+    dialect = db.engine.dialect.name
+
+    if dialect == 'sqlite':
+        match = _fts_query(term, SEARCH_COLUMNS)
+        if match is None:
+            return query.filter(false())
+        fts = _fts_subquery(match)
+        return query.join(fts, fts.c.patient_id == Patient.id).order_by(
+            fts.c.rank, Patient.nom, Patient.prenom
+        )
+
+    query = query.filter(search_filter(term))
+    if dialect == 'postgresql':
+        rank = func.word_similarity(normalize(term), _pg_expression(SEARCH_COLUMNS))
+        return query.order_by(rank.desc(), Patient.nom, Patient.prenom)
+    return query.order_by(Patient.nom, Patient.prenom)
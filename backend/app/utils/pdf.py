@@ -0,0 +1,91 @@
+import zlib
+
+# Pages A4 en points
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+
+FONTS = {'regular': 'Helvetica', 'bold': 'Helvetica-Bold'}
+
+# Chasses Helvetica (millièmes de corps) des caractères des montants, pour
+# l'alignement à droite ; les autres caractères prennent la chasse moyenne
+_WIDTHS = {**{digit: 556 for digit in '0123456789'}, ' ': 278, ',': 278, '.': 278, '-': 333, '%': 889, '€': 556}
+_AVERAGE_WIDTH = 556
+
+
+def text_width(text, size):
+    return sum(_WIDTHS.get(char, _AVERAGE_WIDTH) for char in text) * size / 1000
+
+
+def _escape(text):
+    # Jeu WinAnsi (cp1252) des polices standard : accents et symbole euro
+    encoded = text.encode('cp1252', errors='replace')
+    return encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+class PdfDocument:
+    """
+    Document PDF minimal : texte en polices standard (sans incorporation)
+    et filets, page par page.
+
+    La sortie ne dépend que du contenu (ni date ni identifiant aléatoire) :
+    deux rendus identiques produisent les mêmes octets.
+    """
+
+    def __init__(self):
+        self.pages = []
+        self.operations = None
+
+    def add_page(self):
+        self.operations = []
+        self.pages.append(self.operations)
+
+    def text(self, x, y, value, size=10, font='regular', align='left'):
+        if align == 'right':
+            x -= text_width(value, size)
+        self.operations.append(
+            b'BT /%s %d Tf %.2f %.2f Td (%s) Tj ET' % (font[0].upper().encode(), size, x, y, _escape(value))
+        )
+
+    def line(self, x1, y1, x2, y2, width=0.5):
+        self.operations.append(b'%.2f w %.2f %.2f m %.2f %.2f l S' % (width, x1, y1, x2, y2))
+
+    def render(self):
+        objects = []
+
+        def add(body):
+            objects.append(body)
+            return len(objects)
+
+        catalog = add(None)
+        pages = add(None)
+        fonts = {
+            name: add(b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % base.encode())
+            for name, base in FONTS.items()
+        }
+        resources = b'<< /Font << %s >> >>' % b' '.join(
+            b'/%s %d 0 R' % (name[0].upper().encode(), number) for name, number in fonts.items()
+        )
+
+        kids = []
+        for operations in self.pages:
+            stream = zlib.compress(b'\n'.join(operations))
+            content = add(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream))
+            kids.append(add(
+                b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources %s /Contents %d 0 R >>'
+                % (pages, PAGE_WIDTH, PAGE_HEIGHT, resources, content)
+            ))
+        objects[catalog - 1] = b'<< /Type /Catalog /Pages %d 0 R >>' % pages
+        objects[pages - 1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % kid for kid in kids), len(kids)
+        )
+
+        output = bytearray(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(output))
+            output += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        xref = len(output)
+        output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+        output += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, catalog, xref)
+        return bytes(output)
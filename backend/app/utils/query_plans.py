@@ -0,0 +1,288 @@
+import random
+import re
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import db
+from app.models import (
+    User, Patient, Equipment, Intervention, MedicalRecord, Insurance,
+    PatientInsurance, Invoice, InvoiceItem, Service, ServiceIntervention,
+    EquipmentRental
+)
+from app.utils.patient_search import create_search_index
+
+# Tables de référence de petite taille (tables de compteurs et du
+# planificateur, quelques dizaines de lignes ; listes de travail précalculées,
+# lues en entier par construction) : un parcours complet y est acceptable
+SMALL_TABLES = {
+    'users', 'services', 'insurances', 'table_versions', 'dashboard_counters',
+    'scheduler_leases', 'scheduled_jobs', 'overdue_interventions_snapshot', 'maintenance_due_snapshot'
+}
+
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+# Parcours complet d'un index sans rapport avec le filtre (ordre seulement)
+_SQLITE_INDEX_WALK = re.compile(r'^SCAN (\w+)(?: AS \w+)? USING (?:COVERING )?INDEX \w+$')
+
+TODAY = date.today()
+NOW = datetime.utcnow()
+
+
+def seed(size=500):
+    """
+    Peuple la base avec un jeu de données synthétique mais réaliste
+    """
+    rng = random.Random(42)
+    statuts_equipement = ['disponible', 'en service', 'en location', 'en maintenance', 'réformé']
+    statuts_intervention = ['planifiée', 'en cours', 'terminée', 'annulée']
+    statuts_facture = ['en attente', 'payée', 'annulée']
+    types = ['CPAP', 'Concentrateur', 'Oxygénothérapie', 'Nébuliseur']
+
+    def rows(model, data):
+        db.session.execute(model.__table__.insert(), data)
+
+    rows(User, [
+        dict(id=i, nom=f'Tech{i}', prenom='Test', email=f'tech{i}@oxycare.com',
+             password_hash='x', role='technicien', is_active=True)
+        for i in range(1, 11)
+    ])
+    rows(Service, [
+        dict(id=i, nom=f'Service {i}', type='Entretien', prix_unitaire=35.0, facturable=True, actif=True)
+        for i in range(1, 9)
+    ])
+    rows(Insurance, [dict(id=i, nom=f'Assurance {i}', actif=True) for i in range(1, 6)])
+    rows(Patient, [
+        dict(id=i, nom=rng.choice(['Dupont', 'Lefèvre', 'Martin', 'Bernard', 'Thomas']) + str(i),
+             prenom=rng.choice(['Hélène', 'Éric', 'Jean', 'Marie']), date_naissance=date(1950, 1, 1),
+             sexe='F', adresse='1 rue de Paris', ville='Paris', code_postal='75000',
+             telephone=f'06{i:08d}', numero_securite_sociale=f'1{i:012d}', actif=rng.random() > 0.1,
+             date_creation=NOW, date_modification=NOW)
+        for i in range(1, size + 1)
+    ])
+    rows(PatientInsurance, [
+        dict(patient_id=i, assurance_id=rng.randint(1, 5), numero_adherent=f'A{i}',
+             date_debut=date(2020, 1, 1), actif=True)
+        for i in range(1, size + 1)
+    ])
+    rows(Equipment, [
+        dict(id=i, numero_serie=f'SN{i:06d}', modele='M1', type_equipement=rng.choice(types),
+             fabricant='ResMed', statut=rng.choice(statuts_equipement), date_acquisition=date(2020, 1, 1),
+             date_derniere_maintenance=TODAY - timedelta(days=rng.randint(0, 380)),
+             date_prochaine_maintenance=TODAY + timedelta(days=rng.randint(-15, 365)),
+             patient_id=rng.randint(1, size))
+        for i in range(1, size + 1)
+    ])
+    rows(Intervention, [
+        dict(id=i, type_intervention=rng.choice(['installation', 'maintenance']),
+             statut=rng.choice(statuts_intervention),
+             date_planifiee=NOW + timedelta(days=rng.randint(-200, 60), minutes=rng.randint(0, 600)),
+             duree_estimee=60, patient_id=rng.randint(1, size), equipement_id=rng.randint(1, size),
+             technicien_id=rng.randint(1, 10), description='Intervention', facturable=True, montant=50.0)
+        for i in range(1, size * 4 + 1)
+    ])
+    rows(ServiceIntervention, [
+        dict(intervention_id=i, service_id=rng.randint(1, 8), quantite=1.0, facturable=True)
+        for i in range(1, size * 4 + 1)
+    ])
+    rows(Invoice, [
+        dict(id=i, numero_facture=f'F-{i:08d}', patient_id=rng.randint(1, size),
+             date_emission=TODAY - timedelta(days=rng.randint(0, 400)),
+             date_echeance=TODAY + timedelta(days=rng.randint(-100, 30)),
+             montant_ht=100.0, taux_tva=20.0, montant_ttc=120.0,
+             periode_debut=TODAY - timedelta(days=30), periode_fin=TODAY,
+             statut=rng.choice(statuts_facture), assurance_id=rng.randint(1, 5))
+        for i in range(1, size * 2 + 1)
+    ])
+    rows(InvoiceItem, [
+        dict(facture_id=i, description='Ligne', quantite=1.0, prix_unitaire=100.0, montant_total=100.0,
+             intervention_id=i, service_id=rng.randint(1, 8))
+        for i in range(1, size * 2 + 1)
+    ])
+    rows(EquipmentRental, [
+        dict(id=i, patient_id=rng.randint(1, size), equipment_id=rng.randint(1, size),
+             date_debut=TODAY - timedelta(days=rng.randint(0, 700)),
+             date_fin=None if rng.random() > 0.9 else TODAY, tarif_journalier=5.0,
+             mode_facturation='mensuel', actif=rng.random() > 0.05)
+        for i in range(1, size + 1)
+    ])
+    rows(MedicalRecord, [
+        dict(id=i, patient_id=rng.randint(1, size), date_diagnostic=date(2024, 1, 1),
+             medecin_prescripteur='Dr House', diagnostic='SAOS', traitement_type='CPAP',
+             traitement_details='Nuit', date_debut_traitement=date(2024, 1, 1), actif=True,
+             date_creation=NOW - timedelta(days=rng.randint(0, 700)))
+        for i in range(1, size + 1)
+    ])
+    db.session.commit()
+
+
+@contextmanager
+def capture_statements():
+    """
+    Enregistre les SELECT émis par le moteur pendant le bloc
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def table_scans(connection, statement, parameters):
+    """
+    Retourne (tables parcourues intégralement, plan brut) pour une requête
+    """
+    tables = set(db.metadata.tables)
+
+    if connection.dialect.name == 'postgresql':
+        # Sans seq scan autorisé, il n'en reste que là où aucun index ne sert
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        plan = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + statement, parameters).scalar()
+        scans, stack = set(), [plan[0]['Plan']]
+        while stack:
+            node = stack.pop()
+            if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in tables:
+                scans.add(node['Relation Name'])
+            stack.extend(node.get('Plans', []))
+        return scans, plan
+
+    plan = [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+    filtered = ' WHERE ' in ' '.join(statement.split()).upper()
+    scans = set()
+    for detail in plan:
+        match = _SQLITE_SCAN.match(detail) or (filtered and _SQLITE_INDEX_WALK.match(detail))
+        if match and match.group(1) in tables:
+            scans.add(match.group(1))
+    return scans, plan
+
+
+def _service_checks():
+    from app.services import (
+        PatientService, EquipmentService, InterventionService,
+        EquipmentRentalService, DashboardService
+    )
+    from app.utils.scheduler import run_due_jobs
+    return [
+        ('PatientService.search_patients', lambda: PatientService.search_patients('dupont')),
+        ('PatientService.get_patient_medical_records', lambda: PatientService.get_patient_medical_records(1)),
+        ('PatientService.get_patient_insurances', lambda: PatientService.get_patient_insurances(1)),
+        ('EquipmentService.search_available_equipment', lambda: EquipmentService.search_available_equipment('CPAP')),
+        ('EquipmentService.get_maintenance_due_equipment', EquipmentService.get_maintenance_due_equipment),
+        ('InterventionService.get_technician_schedule',
+         lambda: InterventionService.get_technician_schedule(1, NOW - timedelta(days=7), NOW + timedelta(days=7))),
+        ('InterventionService.get_workload_matrix',
+         lambda: InterventionService.get_workload_matrix((NOW - timedelta(days=7)).date(), (NOW + timedelta(days=7)).date())),
+        ('InterventionService.get_interventions_by_status', lambda: InterventionService.get_interventions_by_status('planifiée')),
+        ('InterventionService.get_overdue_interventions', InterventionService.get_overdue_interventions),
+        ('EquipmentRentalService.get_active_rentals', EquipmentRentalService.get_active_rentals),
+        ('EquipmentRentalService.get_patient_rentals', lambda: EquipmentRentalService.get_patient_rentals(1)),
+        ('DashboardService.get_stats_summary', DashboardService.get_stats_summary),
+        ('DashboardService.get_revenue_stats', lambda: DashboardService.get_revenue_stats('month')),
+        # Listes de travail : calcul par le planificateur, puis lecture
+        ('worklists.rebuild_worklists', lambda: run_due_jobs(force=True)),
+        ('EquipmentService.get_maintenance_due_equipment (précalculée)', EquipmentService.get_maintenance_due_equipment),
+        ('InterventionService.get_overdue_interventions (précalculée)', InterventionService.get_overdue_interventions),
+    ]
+
+
+ROUTE_CHECKS = [
+    '/api/patients',
+    '/api/patients?nom=dupont',
+    '/api/patients?actif=true',
+    '/api/patients/1/overview',
+    '/api/patients/1/overview/interventions?limit=2',
+    '/api/interventions',
+    '/api/interventions?statut=planifiée',
+    '/api/interventions?technicien_id=1',
+    '/api/interventions?patient_id=1',
+    '/api/interventions/workload',
+    '/api/invoices',
+    '/api/invoices?statut=en attente',
+    '/api/invoices?patient_id=1',
+    '/api/equipments',
+    '/api/equipments?statut=disponible',
+    '/api/rentals',
+    '/api/rentals?patient_id=1',
+    '/api/medical-records',
+    '/api/medical-records?patient_id=1',
+    '/api/reports/aging',
+    '/api/reports/aging?group_by=assurance',
+]
+
+
+def _route_checks(app):
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {create_access_token(identity="1")}'}
+
+    def fetch(url):
+        def run():
+            response = client.get(url, headers=headers)
+            cursor = (response.get_json() or {}).get('next_cursor')
+            # La seconde page exerce la comparaison de curseur
+            if cursor:
+                client.get(url + ('&' if '?' in url else '?') + 'cursor=' + cursor, headers=headers)
+        return run
+
+    return [(f'GET {url}', fetch(url)) for url in ROUTE_CHECKS]
+
+
+def check_query_plans(app, size=500, allowed=SMALL_TABLES):
+    """
+    Exécute chaque requête de service et de route sur une base peuplée et
+    vérifie par EXPLAIN qu'aucune ne retombe sur un parcours complet de table.
+
+    Retourne la liste des violations : (contrôle, requête, tables, plan).
+    """
+    db.create_all()
+    with db.engine.begin() as connection:
+        create_search_index(connection)
+    seed(size)
+    # Statistiques à jour pour que le planificateur choisisse comme en production
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql('ANALYZE')
+
+    violations = []
+    for name, check in _service_checks() + _route_checks(app):
+        with capture_statements() as statements:
+            check()
+        db.session.rollback()
+
+        with db.engine.connect() as connection:
+            for statement, parameters in statements:
+                with connection.begin():
+                    scans, plan = table_scans(connection, statement, parameters)
+                scans -= set(allowed)
+                if scans:
+                    violations.append((name, statement, sorted(scans), plan))
+
+    return violations
+
+
+def check_query_budgets(app, size=500):
+    """
+    Appelle chaque route contrôlée sur une base peuplée : en mode test,
+    l'instrumentation lève `QueryBudgetExceeded` dès qu'une vue dépasse son
+    budget déclaré ou répète une même requête (N+1).
+
+    Retourne la liste des dépassements : (contrôle, message).
+    """
+    from app.utils.instrumentation import QueryBudgetExceeded
+    db.create_all()
+    with db.engine.begin() as connection:
+        create_search_index(connection)
+    seed(size)
+
+    failures = []
+    for name, check in _route_checks(app):
+        try:
+            check()
+        except QueryBudgetExceeded as e:
+            failures.append((name, str(e)))
+        db.session.rollback()
+
+    return failures
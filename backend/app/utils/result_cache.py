@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from app.utils.versioning import current_versions, has_pending_writes
+
+
+class VersionedCache:
+    """
+    Cache LRU en processus de résultats calculés à partir de tables.
+
+    Chaque entrée retient les versions des tables lues (`table_versions`) :
+    elle n'est servie que si ces versions n'ont pas bougé, ce qui couvre les
+    écritures de tous les processus pour le prix d'une seule lecture. Une
+    entrée peut aussi expirer à une date donnée, pour les résultats qui
+    dépendent de l'heure courante.
+    """
+
+    def __init__(self, tables, maxsize=128):
+        self.tables = tuple(sorted(tables))
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, compute, now=None):
+        """
+        Retourne la valeur de `key`, recalculée si les tables ont changé.
+
+        `compute()` retourne (valeur, expiration) ; l'expiration vaut None
+        pour un résultat qui ne dépend que des tables.
+
+        Une transaction qui a déjà écrit voit des données que ses versions ne
+        reflètent pas encore : elle calcule sans lire ni alimenter le cache.
+        """
+        now = now or datetime.utcnow()
+        if has_pending_writes():
+            return compute()[0]
+        versions = tuple(current_versions(self.tables).values())
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry_versions, expires, value = entry
+                if entry_versions == versions and (expires is None or now < expires):
+                    self.entries.move_to_end(key)
+                    return value
+
+        value, expires = compute()
+
+        with self.lock:
+            self.entries[key] = (versions, expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
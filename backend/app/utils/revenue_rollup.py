@@ -0,0 +1,197 @@
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+from app import db
+from app.models.invoice import Invoice
+from app.models.revenue_daily import RevenueDaily
+
+_ROLLUP = RevenueDaily.__table__
+_COLUMNS = ('statut', 'date_emission', 'montant_ht', 'montant_ttc')
+_UNKNOWN = object()
+
+
+def _contribution(values):
+    """
+    Apport d'une facture au cumul : (jour, ht, ttc, nombre) ou None
+    """
+    if values is None or values['statut'] != 'payée' or values['date_emission'] is None:
+        return None
+    return values['date_emission'], values['montant_ht'] or 0, values['montant_ttc'] or 0, 1
+
+
+def _values(state, old):
+    """
+    Valeurs des colonnes avant (`old`) ou après le flush ; None si une
+    ancienne valeur n'a jamais été chargée et ne peut être connue
+    """
+    values = {}
+    for key in _COLUMNS:
+        history = state.attrs[key].history
+        if old and history.added:
+            if not history.deleted:
+                return None
+            values[key] = history.deleted[0]
+        elif old and key in state.unloaded:
+            return None
+        else:
+            values[key] = state.attrs[key].value
+    return values
+
+
+def _old_day(state):
+    """
+    Jour d'émission avant le flush ; _UNKNOWN s'il n'a jamais été chargé
+    """
+    history = state.attrs['date_emission'].history
+    if history.added:
+        return history.deleted[0] if history.deleted else _UNKNOWN
+    if 'date_emission' in state.unloaded:
+        return _UNKNOWN
+    return state.attrs['date_emission'].value
+
+
+def _add(deltas, contribution, sign):
+    if contribution is None:
+        return
+    jour, ht, ttc, nombre = contribution
+    current = deltas.get(jour, (0, 0, 0))
+    deltas[jour] = (current[0] + sign * ht, current[1] + sign * ttc, current[2] + sign * nombre)
+
+
+def _apply(connection, deltas):
+    for jour, (ht, ttc, nombre) in sorted(deltas.items()):
+        if not (ht or ttc or nombre):
+            continue
+        updated = connection.execute(
+            _ROLLUP.update().where(_ROLLUP.c.jour == jour).values(
+                montant_ht=_ROLLUP.c.montant_ht + ht,
+                montant_ttc=_ROLLUP.c.montant_ttc + ttc,
+                nombre_factures=_ROLLUP.c.nombre_factures + nombre
+            )
+        ).rowcount
+        if not updated:
+            connection.execute(_ROLLUP.insert().values(
+                jour=jour, montant_ht=ht, montant_ttc=ttc, nombre_factures=nombre
+            ))
+
+
+def rebuild_rollup(connection, start=None, end=None):
+    """
+    Recalcule le cumul journalier à partir des factures payées, sur la
+    période [start, end] (bornes facultatives). Retourne le nombre de jours.
+    """
+    bounds = []
+    if start is not None:
+        bounds.append(Invoice.date_emission >= start)
+    if end is not None:
+        bounds.append(Invoice.date_emission <= end)
+
+    delete = _ROLLUP.delete()
+    if start is not None:
+        delete = delete.where(_ROLLUP.c.jour >= start)
+    if end is not None:
+        delete = delete.where(_ROLLUP.c.jour <= end)
+    connection.execute(delete)
+
+    # Agrégation côté base, en une seule instruction INSERT ... SELECT
+    aggregate = select(
+        Invoice.date_emission,
+        func.sum(Invoice.montant_ht),
+        func.sum(Invoice.montant_ttc),
+        func.count()
+    ).where(Invoice.statut == 'payée', *bounds).group_by(Invoice.date_emission)
+    connection.execute(_ROLLUP.insert().from_select(
+        ['jour', 'montant_ht', 'montant_ttc', 'nombre_factures'], aggregate
+    ))
+    return connection.execute(select(func.count()).select_from(_ROLLUP)).scalar()
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    # Ancienne valeur inconnue (instance expirée ou colonne non chargée) :
+    # plutôt que de deviner l'apport retiré, les jours concernés sont
+    # recalculés depuis les factures, et tout le cumul si le jour lui-même
+    # est inconnu
+    deltas, rebuild = {}, set()
+    for obj in session.new:
+        if isinstance(obj, Invoice):
+            _add(deltas, _contribution(_values(inspect(obj), old=False)), 1)
+    for obj in session.dirty:
+        if isinstance(obj, Invoice) and session.is_modified(obj):
+            state = inspect(obj)
+            if not any(state.attrs[key].history.has_changes() for key in _COLUMNS):
+                continue
+            old = _values(state, old=True)
+            if old is None:
+                rebuild.update([_old_day(state), obj.date_emission])
+                continue
+            _add(deltas, _contribution(old), -1)
+            _add(deltas, _contribution(_values(state, old=False)), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Invoice):
+            state = inspect(obj)
+            old = _values(state, old=True)
+            if old is None:
+                rebuild.add(_old_day(state))
+                continue
+            _add(deltas, _contribution(old), -1)
+
+    rebuild.discard(None)
+    if not (deltas or rebuild):
+        return
+    connection = session.connection()
+    if _UNKNOWN in rebuild:
+        rebuild_rollup(connection)
+        return
+    for jour in sorted(rebuild):
+        deltas.pop(jour, None)
+        rebuild_rollup(connection, jour, jour)
+    _apply(connection, deltas)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _do_orm_execute(orm_execute_state):
+    # Écriture groupée sur les factures : ajustée par écart lorsque les
+    # lignes écrites sont connues (insertion ou mise à jour par clé
+    # primaire), sinon le cumul est recalculé après l'instruction
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is None or table.name != Invoice.__tablename__:
+        return None
+    parameters = orm_execute_state.parameters
+    connection = orm_execute_state.session.connection()
+
+    if orm_execute_state.is_update and isinstance(parameters, list):
+        # Mise à jour par clé primaire : les colonnes du cumul sont lues
+        # avant l'instruction, l'écart est calculé ligne à ligne
+        rows = [row for row in parameters if any(key in row for key in _COLUMNS)]
+        before = {}
+        if rows:
+            before = {
+                row.id: dict(row._mapping)
+                for row in connection.execute(select(Invoice.id, *(getattr(Invoice, key) for key in _COLUMNS)).where(
+                    Invoice.id.in_([row['id'] for row in rows])
+                ))
+            }
+        result = orm_execute_state.invoke_statement()
+        deltas = {}
+        for row in rows:
+            old = before.get(row['id'])
+            if old is None:
+                continue
+            _add(deltas, _contribution(old), -1)
+            _add(deltas, _contribution({key: row.get(key, old[key]) for key in _COLUMNS}), 1)
+        _apply(connection, deltas)
+        return result
+
+    result = orm_execute_state.invoke_statement()
+    if orm_execute_state.is_insert and parameters:
+        # Insertion groupée (facturation mensuelle) : les valeurs insérées
+        # donnent directement l'apport de chaque facture
+        deltas = {}
+        for row in parameters if isinstance(parameters, list) else [parameters]:
+            _add(deltas, _contribution({key: row.get(key) for key in _COLUMNS}), 1)
+        _apply(connection, deltas)
+    else:
+        rebuild_rollup(connection)
+    return result
@@ -0,0 +1,182 @@
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.scheduled_job import SchedulerLease, ScheduledJob
+
+_LEASES = SchedulerLease.__table__
+_JOBS = ScheduledJob.__table__
+
+
+class Job:
+    """
+    Tâche périodique : `func(now)` est appelée toutes les `interval`
+    secondes (nombre ou clé de configuration) et, si `at_rollover`, dès le
+    changement de jour.
+    """
+
+    def __init__(self, name, func, interval, at_rollover=False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.at_rollover = at_rollover
+
+    def is_due(self, state, now, today):
+        if state is None or state.last_run_at is None:
+            return True
+        if self.at_rollover and state.valid_on != today:
+            return True
+        interval = current_app.config[self.interval] if isinstance(self.interval, str) else self.interval
+        return now >= state.last_run_at + timedelta(seconds=interval)
+
+
+JOBS = {}
+
+
+def job(name, interval, at_rollover=False):
+    """
+    Enregistre une tâche du planificateur
+    """
+    def decorator(func):
+        JOBS[name] = Job(name, func, interval, at_rollover)
+        return func
+    return decorator
+
+
+def acquire_lease(connection, name, owner, ttl, now=None):
+    """
+    Prend ou renouvelle le bail `name` pour `owner`.
+
+    Le bail n'est accordé que s'il est libre, expiré ou déjà détenu par
+    `owner` : une seule instruction UPDATE conditionnelle, atomique sur toute
+    base, tranche entre les processus. Retourne True si `owner` le détient.
+    """
+    now = now or datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl)
+    updated = connection.execute(
+        _LEASES.update().where(
+            _LEASES.c.name == name,
+            (_LEASES.c.owner == owner) | (_LEASES.c.expires_at < now)
+        ).values(owner=owner, expires_at=expires_at)
+    ).rowcount
+    if updated:
+        return True
+    try:
+        # Première élection : la clé primaire départage les candidats
+        with connection.begin_nested():
+            connection.execute(_LEASES.insert().values(name=name, owner=owner, expires_at=expires_at))
+    except IntegrityError:
+        return False
+    return True
+
+
+def run_job(job, now=None, today=None):
+    """
+    Exécute une tâche dans sa propre transaction et enregistre son état
+    """
+    now = now or datetime.utcnow()
+    today = today or datetime.now().date()
+    error = None
+    try:
+        job.func(now)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc()
+
+    values = {'last_attempt_at': now, 'last_error': error}
+    if error is None:
+        values.update(last_run_at=now, valid_on=today)
+    connection = db.session.connection()
+    if not connection.execute(_JOBS.update().where(_JOBS.c.name == job.name).values(**values)).rowcount:
+        connection.execute(_JOBS.insert().values(name=job.name, **values))
+    db.session.commit()
+    return error
+
+
+def job_state(name):
+    """
+    État enregistré d'une tâche (None si elle n'a jamais tourné)
+    """
+    return db.session.execute(select(ScheduledJob).where(ScheduledJob.name == name)).scalar_one_or_none()
+
+
+def run_due_jobs(now=None, today=None, force=False):
+    """
+    Exécute les tâches dues (toutes si `force`) ; retourne {nom: erreur}
+    """
+    now = now or datetime.utcnow()
+    today = today or datetime.now().date()
+    states = {s.name: s for s in db.session.execute(select(ScheduledJob)).scalars()}
+    db.session.commit()
+
+    results = {}
+    for name, job in JOBS.items():
+        if force or job.is_due(states.get(name), now, today):
+            results[name] = run_job(job, now, today)
+    return results
+
+
+class Scheduler:
+    """
+    Planificateur en processus, sans intermédiaire externe.
+
+    Chaque processus (travailleur gunicorn) lance son fil au premier appel,
+    mais seul le détenteur du bail `scheduler` en base exécute les tâches.
+    Le bail expire s'il n'est pas renouvelé : un autre processus prend alors
+    la relève.
+    """
+
+    LEASE = 'scheduler'
+
+    def __init__(self):
+        self.owner = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def ensure_started(self, app):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            # Identité propre au processus (le fil ne survit pas à un fork)
+            self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+            self.thread = threading.Thread(target=self._run, args=(app,), name='scheduler', daemon=True)
+            self.thread.start()
+
+    def tick(self, app):
+        """
+        Un tour de boucle : renouvelle le bail puis exécute les tâches dues
+        """
+        tick = app.config['SCHEDULER_TICK']
+        with app.app_context():
+            try:
+                leader = acquire_lease(db.session.connection(), self.LEASE, self.owner, ttl=3 * tick)
+                db.session.commit()
+                if leader:
+                    for name, error in run_due_jobs().items():
+                        if error:
+                            app.logger.error('Tâche planifiée %s en échec :\n%s', name, error)
+                return leader
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Tour du planificateur impossible')
+                return False
+            finally:
+                db.session.remove()
+
+    def _run(self, app):
+        while True:
+            self.tick(app)
+            time.sleep(app.config['SCHEDULER_TICK'])
+
+
+scheduler = Scheduler()
@@ -0,0 +1,131 @@
+from functools import lru_cache
+from marshmallow import Schema, fields
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+from marshmallow.utils import missing
+from app.utils.instrumentation import timed
+
+
+class CompiledSerializer:
+    """
+    Sérialiseur spécialisé produit à partir d'un schéma marshmallow.
+
+    La fonction de sérialisation est générée une seule fois : chaque champ
+    devient une lecture d'attribut suivie d'une conversion directe (int,
+    float, isoformat...), sans la répartition champ par champ de
+    `Schema.dump`. Les champs non reconnus délèguent à `field.serialize`,
+    si bien que la sortie reste identique à celle du schéma pour des objets
+    ORM (les dictionnaires ne sont pas pris en charge).
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.many = schema.many
+        self.serialize_one = _build(schema)
+
+    def dump(self, obj, *, many=None):
+        many = self.many if many is None else many
+        with timed('serialize'):
+            if many:
+                if obj is None:
+                    return None
+                serialize_one = self.serialize_one
+                return [serialize_one(item) for item in obj]
+            return self.serialize_one(obj)
+
+
+@lru_cache(maxsize=256)
+def serializer_for(schema):
+    """
+    Retourne le sérialiseur compilé d'une instance de schéma (mis en cache)
+    """
+    return CompiledSerializer(schema)
+
+
+def _inline(field):
+    """
+    Gabarit d'expression pour les types de champ connus, None sinon.
+
+    Seuls les types exacts sont traités : une sous-classe peut redéfinir
+    `_serialize` et doit passer par marshmallow.
+    """
+    kind = type(field)
+
+    if field.dump_default is not missing:
+        return None
+    if kind is fields.Integer and not field.as_string:
+        return 'None if {v} is None else int({v})'
+    if kind is fields.Float and not field.as_string:
+        return 'None if {v} is None else float({v})'
+    if kind in (fields.String, fields.Email):
+        # Les octets sont décodés par marshmallow : on lui laisse ce cas
+        return 'None if {v} is None else str({v}) if {v}.__class__ is not bytes else {f}._serialize({v}, {a}, obj)'
+    if kind is fields.Boolean:
+        return '{v} if {v} is True or {v} is False else {f}._serialize({v}, {a}, obj)'
+    if kind in (fields.Date, fields.DateTime) and (field.format or 'iso') in ('iso', 'iso8601'):
+        return 'None if {v} is None else {v}.isoformat()'
+    if kind is fields.Raw:
+        return '{v}'
+    if kind is fields.Dict and field.key_field is None and field.value_field is None and field.mapping_type is dict:
+        # Colonne JSON sans schéma de clés ni de valeurs : simple copie
+        return 'None if {v} is None else dict({v})'
+    if kind is fields.List:
+        inner = _inline(field.inner)
+        if inner is None:
+            return None
+        # L'élément est converti par le gabarit de `inner`, résolu plus tard
+        item = inner.format(v='_x', f='{f}.inner', a='{a}')
+        return 'None if {v} is None else [' + item + ' for _x in {v}]'
+    return None
+
+
+def _build(schema):
+    """
+    Génère la fonction qui sérialise un objet selon le schéma donné
+    """
+    if (schema._hooks[PRE_DUMP] or schema._hooks[POST_DUMP]
+            or type(schema).get_attribute is not Schema.get_attribute):
+        return lambda obj: schema.dump(obj, many=False)
+
+    namespace = {'_missing': missing, '_empty': {}}
+    # Lecture directe de l'état chargé de l'instance : évite le descripteur
+    # SQLAlchemy, qui ne sert plus que pour les attributs non chargés
+    lines = ['def serialize(obj):', '    result = {}', '    state = getattr(obj, "__dict__", _empty)']
+
+    for index, (name, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key if field.data_key is not None else name
+        attribute = field.attribute or name
+        field_ref, value_ref = f'_f{index}', f'_v{index}'
+        namespace[field_ref] = field
+
+        if type(field) is fields.Nested and '.' not in attribute and field.dump_default is missing:
+            nested_ref = f'_n{index}'
+            namespace[nested_ref] = _build(field.schema)
+            if field.many or field.schema.many:
+                expression = f'None if {value_ref} is None else [{nested_ref}(x) for x in {value_ref}]'
+            else:
+                expression = f'None if {value_ref} is None else {nested_ref}({value_ref})'
+        else:
+            template = _inline(field) if '.' not in attribute else None
+            if template is None:
+                # Délégation au champ marshmallow (valeur absente : clé omise)
+                lines.append(f'    {value_ref} = {field_ref}.serialize({name!r}, obj)')
+                lines.append(f'    if {value_ref} is not _missing: result[{key!r}] = {value_ref}')
+                continue
+            expression = template.format(v=value_ref, f=field_ref, a=repr(name))
+
+        lines.append(f'    {value_ref} = state.get({attribute!r}, _missing)')
+        lines.append(f'    if {value_ref} is _missing: {value_ref} = getattr(obj, {attribute!r}, _missing)')
+        lines.append(f'    if {value_ref} is not _missing: result[{key!r}] = {expression}')
+
+    lines.append('    return result')
+    exec(compile('\n'.join(lines), f'<serializer {type(schema).__name__}>', 'exec'), namespace)
+    return namespace['serialize']
+
+
+def check_parity(schema, objects):
+    """
+    Compare la sortie compilée à `Schema.dump` ; retourne les écarts
+    """
+    expected = schema.dump(objects, many=True)
+    actual = serializer_for(schema).dump(objects, many=True)
+    return [(e, a) for e, a in zip(expected, actual) if e != a or list(e) != list(a)]
@@ -0,0 +1,84 @@
+import csv
+import io
+from flask import Response, current_app, request, stream_with_context
+from app.utils.serializers import serializer_for
+
+STREAM_CHUNK_SIZE = 500
+
+
+def wants_stream():
+    """
+    Indique si le client a demandé le mode flux (`?stream=true`)
+    """
+    return request.args.get('stream', '').lower() == 'true'
+
+
+def stream_json_array(query, schema, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Envoie le résultat d'une requête sous forme de tableau JSON, par morceaux.
+
+    Les lignes sont lues par lots via `yield_per` (curseur serveur sous
+    PostgreSQL), chaque lot est sérialisé puis écrit immédiatement : la
+    mémoire consommée dépend de `chunk_size` et non du nombre de lignes, et
+    le premier octet part dès le premier lot.
+    """
+    dumps = current_app.json.dumps
+    serializer = serializer_for(schema)
+
+    def serialize(batch):
+        return ','.join(dumps(item) for item in serializer.dump(batch, many=True))
+
+    def generate():
+        yield '['
+        first = True
+        batch = []
+        for row in query.yield_per(chunk_size):
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield ('' if first else ',') + serialize(batch)
+                first = False
+                batch = []
+        if batch:
+            yield ('' if first else ',') + serialize(batch)
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def stream_csv(columns, rows, filename):
+    """
+    Envoie des lignes au format CSV, au fil de leur lecture.
+
+    `rows` est un itérable de séquences (ou de dictionnaires indexés par
+    `columns`) ; il est consommé paresseusement dans le contexte de la
+    requête, la réponse n'est donc jamais construite en mémoire.
+    """
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([row[c] for c in columns] if isinstance(row, dict) else row)
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
+def stream_text(chunks, mimetype, filename):
+    """
+    Envoie en pièce jointe un fichier texte produit par morceaux (`chunks`,
+    itérable de chaînes consommé dans le contexte de la requête)
+    """
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,163 @@
+import hashlib
+from marshmallow import fields
+from flask import request
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from werkzeug.http import quote_etag
+from app import db
+from app.models.table_version import TableVersion
+
+_VERSIONS = TableVersion.__table__
+# Tables écrites par la transaction en cours (`Session.info`)
+_PENDING = 'versioned_tables'
+
+
+def tables_for(model, schema):
+    """
+    Liste les tables lues pour sérialiser `model` avec `schema`.
+
+    Le parcours suit les champs imbriqués du schéma (comme `loader_options`) :
+    l'ETag d'une liste d'interventions dépend aussi des patients, équipements
+    et techniciens qu'elle embarque.
+    """
+    mapper = inspect(model)
+    tables = {t.name for t in mapper.tables}
+
+    for name, field in schema.dump_fields.items():
+        if not isinstance(field, fields.Nested):
+            continue
+        relationship = mapper.relationships.get(field.attribute or name)
+        if relationship is None:
+            continue
+        tables.update(tables_for(relationship.mapper.class_, field.schema))
+
+    return tables
+
+
+def current_versions(tables):
+    """
+    Lit les versions des tables données en une seule requête (0 par défaut)
+    """
+    names = sorted(tables)
+    rows = db.session.execute(
+        select(_VERSIONS.c.table_name, _VERSIONS.c.version).where(_VERSIONS.c.table_name.in_(names))
+    ).all()
+    versions = dict.fromkeys(names, 0)
+    versions.update(rows)
+    return versions
+
+
+def make_etag(tables, *extra):
+    """
+    Calcule l'ETag (faible) d'une réponse GET.
+
+    L'étiquette combine le chemin complet (filtres, curseur, `fields`), les
+    versions des tables lues et d'éventuelles valeurs supplémentaires (la date
+    du jour pour les statistiques relatives, par exemple).
+    """
+    versions = current_versions(tables)
+    payload = '|'.join(
+        [request.full_path]
+        + [f'{name}:{version}' for name, version in versions.items()]
+        + [str(value) for value in extra]
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def collection_etag(model, schema, *extra):
+    """
+    ETag d'une réponse sérialisant `model` avec `schema`
+    """
+    return make_etag(tables_for(model, schema), *extra)
+
+
+def not_modified(etag):
+    """
+    Indique si le client possède déjà la représentation courante
+    """
+    return request.if_none_match.contains_weak(etag)
+
+
+def etag_headers(etag):
+    """
+    En-têtes à joindre à la réponse : le client revalide à chaque lecture
+    """
+    return {'ETag': quote_etag(etag, weak=True), 'Cache-Control': 'no-cache'}
+
+
+def bump_versions(connection, tables):
+    """
+    Incrémente les versions des tables, dans la transaction en cours.
+
+    Les tables sont traitées dans un ordre fixe pour éviter les interblocages
+    entre transactions concurrentes. Les lignes sont créées par les
+    migrations (et par `create_all`) : une table sans ligne n'est pas
+    versionnée.
+    """
+    for name in sorted(set(tables) - {_VERSIONS.name}):
+        connection.execute(
+            _VERSIONS.update()
+            .where(_VERSIONS.c.table_name == name)
+            .values(version=_VERSIONS.c.version + 1)
+        )
+
+
+def has_pending_writes(session=None):
+    """
+    Indique si la transaction en cours a écrit dans des tables versionnées
+    (versions incrémentées seulement à la validation)
+    """
+    return bool((session or db.session).info.get(_PENDING))
+
+
+def _touch(session, tables):
+    session.info.setdefault(_PENDING, set()).update(tables)
+
+
+@event.listens_for(_VERSIONS, 'after_create')
+def _seed_versions(target, connection, **kw):
+    # Base créée par create_all : une ligne par table, comme les migrations
+    connection.execute(_VERSIONS.insert(), [
+        {'table_name': name, 'version': 0} for name in sorted(db.metadata.tables) if name != _VERSIONS.name
+    ])
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    # Tables touchées par le flush (objets ajoutés, modifiés ou supprimés)
+    tables = set()
+    for obj in session.new | session.deleted:
+        tables.update(t.name for t in inspect(obj).mapper.tables)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            tables.update(t.name for t in inspect(obj).mapper.tables)
+    if tables:
+        _touch(session, tables)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _do_orm_execute(orm_execute_state):
+    # Écritures groupées (insert/update/delete hors unité de travail)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and table.name != _VERSIONS.name:
+            _touch(orm_execute_state.session, [table.name])
+
+
+@event.listens_for(Session, 'before_commit')
+def _before_commit(session):
+    # Une seule incrémentation par transaction, juste avant le COMMIT : les
+    # lignes de versions ne restent verrouillées que le temps de la validation
+    if session.in_nested_transaction():
+        return
+    session.flush()
+    tables = session.info.pop(_PENDING, None)
+    if tables:
+        bump_versions(session.connection(), tables)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _after_transaction_end(session, transaction):
+    # Transaction annulée ou session fermée : rien à incrémenter
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect, select, union
+from sqlalchemy.orm import Session
+from app import db
+from app.models.equipment import Equipment
+from app.models.intervention import Intervention
+from app.models.scheduled_job import ScheduledJob
+from app.models.worklist import OverdueInterventionSnapshot, MaintenanceDueSnapshot
+from app.utils.scheduler import job, job_state
+
+WORKLIST_JOB = 'worklists'
+# Horizon de la maintenance « prochainement due » et périodicité par défaut
+MAINTENANCE_SOON_DAYS = 30
+MAINTENANCE_PERIOD_DAYS = 365
+
+_OVERDUE = OverdueInterventionSnapshot.__table__
+_MAINTENANCE = MaintenanceDueSnapshot.__table__
+_JOBS = ScheduledJob.__table__
+_INTERVENTION_COLUMNS = ('statut', 'date_planifiee')
+_EQUIPMENT_COLUMNS = ('statut', 'date_prochaine_maintenance', 'date_derniere_maintenance')
+
+
+def maintenance_due_ids(today):
+    """
+    Équipements dont la maintenance est due ou prochainement due.
+
+    Union de deux recherches indexées plutôt qu'un OR de deux dates,
+    qu'aucun index ne peut servir à lui seul.
+    """
+    return union(
+        select(Equipment.id).where(Equipment.date_prochaine_maintenance <= today + timedelta(days=MAINTENANCE_SOON_DAYS)),
+        select(Equipment.id).where(Equipment.date_derniere_maintenance <= today - timedelta(days=MAINTENANCE_PERIOD_DAYS))
+    )
+
+
+def rebuild_worklists(connection, now, today):
+    """
+    Matérialise les listes de travail (interventions en retard, maintenances
+    dues) en les recalculant intégralement côté base
+    """
+    connection.execute(_OVERDUE.delete())
+    connection.execute(_OVERDUE.insert().from_select(
+        ['intervention_id', 'date_planifiee'],
+        select(Intervention.id, Intervention.date_planifiee).where(
+            Intervention.statut == 'planifiée',
+            Intervention.date_planifiee < now
+        )
+    ))
+
+    connection.execute(_MAINTENANCE.delete())
+    connection.execute(_MAINTENANCE.insert().from_select(
+        ['equipment_id', 'date_prochaine_maintenance'],
+        select(Equipment.id, Equipment.date_prochaine_maintenance).where(
+            Equipment.id.in_(maintenance_due_ids(today)),
+            Equipment.statut != 'réformé'
+        )
+    ))
+
+
+@job(WORKLIST_JOB, interval='WORKLIST_REFRESH', at_rollover=True)
+def refresh_worklists(now):
+    rebuild_worklists(db.session.connection(), now, datetime.now().date())
+
+
+def snapshot_time(today=None):
+    """
+    Instant (UTC) du dernier calcul des listes, s'il couvre le jour courant ;
+    None si elles doivent être calculées à la demande
+    """
+    state = job_state(WORKLIST_JOB)
+    if state is None or state.valid_on != (today or datetime.now().date()):
+        return None
+    return state.last_run_at
+
+
+def _is_overdue(intervention, now):
+    return intervention.statut == 'planifiée' and intervention.date_planifiee is not None \
+        and intervention.date_planifiee < now
+
+
+def _is_maintenance_due(equipment, today):
+    if equipment.statut == 'réformé':
+        return False
+    prochaine, derniere = equipment.date_prochaine_maintenance, equipment.date_derniere_maintenance
+    return (prochaine is not None and prochaine <= today + timedelta(days=MAINTENANCE_SOON_DAYS)) or \
+        (derniere is not None and derniere <= today - timedelta(days=MAINTENANCE_PERIOD_DAYS))
+
+
+def _changed(obj, columns):
+    state = inspect(obj)
+    return any(state.attrs[key].history.has_changes() for key in columns)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    # Entre deux calculs, les lignes modifiées par l'ORM sont reportées dans
+    # les listes : une intervention replanifiée dans le passé y entre aussitôt
+    now, today = datetime.utcnow(), datetime.now().date()
+    overdue, maintenance = {}, {}
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Intervention) and (obj in session.new or _changed(obj, _INTERVENTION_COLUMNS)):
+            overdue[obj.id] = obj.date_planifiee if _is_overdue(obj, now) else None
+        elif isinstance(obj, Equipment) and (obj in session.new or _changed(obj, _EQUIPMENT_COLUMNS)):
+            maintenance[obj.id] = (obj.date_prochaine_maintenance,) if _is_maintenance_due(obj, today) else None
+    for obj in session.deleted:
+        if isinstance(obj, Intervention):
+            overdue[obj.id] = None
+        elif isinstance(obj, Equipment):
+            maintenance[obj.id] = None
+    if not (overdue or maintenance):
+        return
+
+    connection = session.connection()
+    if overdue:
+        connection.execute(_OVERDUE.delete().where(_OVERDUE.c.intervention_id.in_(sorted(overdue))))
+        rows = [{'intervention_id': k, 'date_planifiee': v} for k, v in sorted(overdue.items()) if v is not None]
+        if rows:
+            connection.execute(_OVERDUE.insert(), rows)
+    if maintenance:
+        connection.execute(_MAINTENANCE.delete().where(_MAINTENANCE.c.equipment_id.in_(sorted(maintenance))))
+        rows = [{'equipment_id': k, 'date_prochaine_maintenance': v[0]} for k, v in sorted(maintenance.items()) if v is not None]
+        if rows:
+            connection.execute(_MAINTENANCE.insert(), rows)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _do_orm_execute(orm_execute_state):
+    # Écriture groupée : lignes inconnues, les listes sont invalidées (calcul
+    # à la demande jusqu'au prochain passage du planificateur)
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None and table.name in (Intervention.__tablename__, Equipment.__tablename__):
+        orm_execute_state.session.connection().execute(
+            _JOBS.update().where(_JOBS.c.name == WORKLIST_JOB).values(valid_on=None)
+        )
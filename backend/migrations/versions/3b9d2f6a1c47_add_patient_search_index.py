@@ -0,0 +1,26 @@
+"""Add patient full-text search index
+
+Revision ID: 3b9d2f6a1c47
+Revises: 636cd96a786e
+Create Date: 2026-10-18 09:12:40.215733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.utils.patient_search import create_search_index, drop_search_index
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d2f6a1c47'
+down_revision = '636cd96a786e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 + triggers sous SQLite, index trigrammes sans accents sous PostgreSQL
+    create_search_index(op.get_bind())
+
+
+def downgrade():
+    drop_search_index(op.get_bind())
@@ -0,0 +1,36 @@
+"""Add per-table version counters for HTTP revalidation
+
+Revision ID: 5c2e7a9d4f18
+Revises: 8e41c0d7a5b3
+Create Date: 2026-10-18 14:21:07.318442
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2e7a9d4f18'
+down_revision = '8e41c0d7a5b3'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = [
+    'users', 'patients', 'equipments', 'interventions', 'medical_records',
+    'insurances', 'patient_insurances', 'invoices', 'invoice_items',
+    'services', 'service_interventions', 'equipment_rentals',
+]
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    # Une ligne par table : les écritures n'ont plus qu'à l'incrémenter
+    op.bulk_insert(table_versions, [{'table_name': name, 'version': 0} for name in VERSIONED_TABLES])
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,74 @@
+"""Add secondary indexes matching route and service query shapes
+
+Revision ID: 8e41c0d7a5b3
+Revises: 3b9d2f6a1c47
+Create Date: 2026-10-18 10:03:52.671904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e41c0d7a5b3'
+down_revision = '3b9d2f6a1c47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_patients_nom_prenom', 'patients', ['nom', 'prenom', 'id'], unique=False)
+    op.create_index('ix_patients_actif_nom_prenom', 'patients', ['actif', 'nom', 'prenom'], unique=False)
+    op.create_index('ix_equipments_type_numero_serie', 'equipments', ['type_equipement', 'numero_serie'], unique=False)
+    op.create_index('ix_equipments_statut_type_numero_serie', 'equipments', ['statut', 'type_equipement', 'numero_serie'], unique=False)
+    op.create_index('ix_equipments_date_prochaine_maintenance', 'equipments', ['date_prochaine_maintenance'], unique=False)
+    op.create_index('ix_equipments_date_derniere_maintenance', 'equipments', ['date_derniere_maintenance'], unique=False)
+    op.create_index('ix_equipments_patient_id', 'equipments', ['patient_id'], unique=False)
+    op.create_index('ix_interventions_date_planifiee', 'interventions', ['date_planifiee', 'id'], unique=False)
+    op.create_index('ix_interventions_statut_date_planifiee', 'interventions', ['statut', 'date_planifiee'], unique=False)
+    op.create_index('ix_interventions_technicien_date_planifiee', 'interventions', ['technicien_id', 'date_planifiee'], unique=False)
+    op.create_index('ix_interventions_patient_date_planifiee', 'interventions', ['patient_id', 'date_planifiee'], unique=False)
+    op.create_index('ix_interventions_equipement_date_planifiee', 'interventions', ['equipement_id', 'date_planifiee'], unique=False)
+    op.create_index('ix_invoices_date_emission', 'invoices', ['date_emission', 'id'], unique=False)
+    op.create_index('ix_invoices_statut_date_echeance', 'invoices', ['statut', 'date_echeance'], unique=False)
+    op.create_index('ix_invoices_statut_date_emission', 'invoices', ['statut', 'date_emission'], unique=False)
+    op.create_index('ix_invoices_patient_date_emission', 'invoices', ['patient_id', 'date_emission'], unique=False)
+    op.create_index('ix_equipment_rentals_date_debut', 'equipment_rentals', ['date_debut', 'id'], unique=False)
+    op.create_index('ix_equipment_rentals_actif_date_fin', 'equipment_rentals', ['actif', 'date_fin'], unique=False)
+    op.create_index('ix_equipment_rentals_patient_date_debut', 'equipment_rentals', ['patient_id', 'date_debut'], unique=False)
+    op.create_index('ix_equipment_rentals_equipment_date_debut', 'equipment_rentals', ['equipment_id', 'date_debut'], unique=False)
+    op.create_index('ix_medical_records_date_creation', 'medical_records', ['date_creation', 'id'], unique=False)
+    op.create_index('ix_medical_records_patient_date_creation', 'medical_records', ['patient_id', 'date_creation'], unique=False)
+    op.create_index('ix_invoice_items_facture_id', 'invoice_items', ['facture_id'], unique=False)
+    op.create_index('ix_invoice_items_intervention_id', 'invoice_items', ['intervention_id'], unique=False)
+    op.create_index('ix_service_interventions_intervention_id', 'service_interventions', ['intervention_id'], unique=False)
+    op.create_index('ix_patient_insurances_patient_id', 'patient_insurances', ['patient_id', 'actif'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_patient_insurances_patient_id', table_name='patient_insurances')
+    op.drop_index('ix_service_interventions_intervention_id', table_name='service_interventions')
+    op.drop_index('ix_invoice_items_intervention_id', table_name='invoice_items')
+    op.drop_index('ix_invoice_items_facture_id', table_name='invoice_items')
+    op.drop_index('ix_medical_records_patient_date_creation', table_name='medical_records')
+    op.drop_index('ix_medical_records_date_creation', table_name='medical_records')
+    op.drop_index('ix_equipment_rentals_equipment_date_debut', table_name='equipment_rentals')
+    op.drop_index('ix_equipment_rentals_patient_date_debut', table_name='equipment_rentals')
+    op.drop_index('ix_equipment_rentals_actif_date_fin', table_name='equipment_rentals')
+    op.drop_index('ix_equipment_rentals_date_debut', table_name='equipment_rentals')
+    op.drop_index('ix_invoices_patient_date_emission', table_name='invoices')
+    op.drop_index('ix_invoices_statut_date_emission', table_name='invoices')
+    op.drop_index('ix_invoices_statut_date_echeance', table_name='invoices')
+    op.drop_index('ix_invoices_date_emission', table_name='invoices')
+    op.drop_index('ix_interventions_equipement_date_planifiee', table_name='interventions')
+    op.drop_index('ix_interventions_patient_date_planifiee', table_name='interventions')
+    op.drop_index('ix_interventions_technicien_date_planifiee', table_name='interventions')
+    op.drop_index('ix_interventions_statut_date_planifiee', table_name='interventions')
+    op.drop_index('ix_interventions_date_planifiee', table_name='interventions')
+    op.drop_index('ix_equipments_patient_id', table_name='equipments')
+    op.drop_index('ix_equipments_date_derniere_maintenance', table_name='equipments')
+    op.drop_index('ix_equipments_date_prochaine_maintenance', table_name='equipments')
+    op.drop_index('ix_equipments_statut_type_numero_serie', table_name='equipments')
+    op.drop_index('ix_equipments_type_numero_serie', table_name='equipments')
+    op.drop_index('ix_patients_actif_nom_prenom', table_name='patients')
+    op.drop_index('ix_patients_nom_prenom', table_name='patients')
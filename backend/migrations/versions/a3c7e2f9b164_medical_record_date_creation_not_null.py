@@ -0,0 +1,32 @@
+"""Make medical_records.date_creation non-nullable
+
+Revision ID: a3c7e2f9b164
+Revises: f8b3d1a6c925
+Create Date: 2026-10-19 11:03:27.904518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c7e2f9b164'
+down_revision = 'f8b3d1a6c925'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Clé de tri de la pagination par curseur : une date NULL rendait la
+    # ligne inaccessible au-delà de la première page
+    op.execute(
+        "UPDATE medical_records SET date_creation = COALESCE(date_modification, CURRENT_TIMESTAMP) "
+        "WHERE date_creation IS NULL"
+    )
+    with op.batch_alter_table('medical_records') as batch_op:
+        batch_op.alter_column('date_creation', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('medical_records') as batch_op:
+        batch_op.alter_column('date_creation', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,57 @@
+"""Add month-end billing run and rental billing ledger tables
+
+Revision ID: a6d1e4c8b273
+Revises: f3c8d6a2b915
+Create Date: 2026-10-18 19:02:44.120537
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d1e4c8b273'
+down_revision = 'f3c8d6a2b915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('billing_runs',
+    sa.Column('periode', sa.String(length=7), nullable=False),
+    sa.Column('statut', sa.String(length=20), nullable=False),
+    sa.Column('date_debut', sa.DateTime(), nullable=True),
+    sa.Column('date_fin', sa.DateTime(), nullable=True),
+    sa.Column('date_maj', sa.DateTime(), nullable=True),
+    sa.Column('dernier_patient_id', sa.Integer(), nullable=True),
+    sa.Column('factures', sa.Integer(), nullable=False),
+    sa.Column('locations', sa.Integer(), nullable=False),
+    sa.Column('montant_ht', sa.Float(), nullable=False),
+    sa.Column('erreur', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('periode')
+    )
+    op.create_table('rental_billings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rental_id', sa.Integer(), nullable=False),
+    sa.Column('periode', sa.String(length=7), nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=False),
+    sa.Column('facture_id', sa.Integer(), nullable=False),
+    sa.Column('date_debut', sa.Date(), nullable=False),
+    sa.Column('date_fin', sa.Date(), nullable=False),
+    sa.Column('jours', sa.Integer(), nullable=False),
+    sa.Column('montant_ht', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['facture_id'], ['invoices.id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.ForeignKeyConstraint(['rental_id'], ['equipment_rentals.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('rental_id', 'periode', name='uq_rental_billings_rental_periode')
+    )
+    op.create_index('ix_rental_billings_periode_patient', 'rental_billings', ['periode', 'patient_id'], unique=False)
+    op.create_index('ix_rental_billings_facture_id', 'rental_billings', ['facture_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_rental_billings_facture_id', table_name='rental_billings')
+    op.drop_index('ix_rental_billings_periode_patient', table_name='rental_billings')
+    op.drop_table('rental_billings')
+    op.drop_table('billing_runs')
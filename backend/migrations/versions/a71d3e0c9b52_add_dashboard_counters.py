@@ -0,0 +1,30 @@
+"""Add incrementally maintained dashboard counters
+
+Revision ID: a71d3e0c9b52
+Revises: 5c2e7a9d4f18
+Create Date: 2026-10-18 15:02:44.905173
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a71d3e0c9b52'
+down_revision = '5c2e7a9d4f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Table vide : chaque compteur est calculé à sa première lecture
+    op.create_table('dashboard_counters',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.Column('valid_on', sa.Date(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('dashboard_counters')
@@ -0,0 +1,30 @@
+"""Add monthly invoice number counters
+
+Revision ID: b2f7c9e4d351
+Revises: a6d1e4c8b273
+Create Date: 2026-10-18 19:48:27.603914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2f7c9e4d351'
+down_revision = 'a6d1e4c8b273'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Compteurs créés au premier numéro de chaque mois, au-delà des numéros
+    # déjà émis
+    op.create_table('invoice_counters',
+    sa.Column('mois', sa.String(length=6), nullable=False),
+    sa.Column('dernier', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('mois')
+    )
+
+
+def downgrade():
+    op.drop_table('invoice_counters')
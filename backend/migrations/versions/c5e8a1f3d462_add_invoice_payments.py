@@ -0,0 +1,43 @@
+"""Add invoice payments ledger and paid amount
+
+Revision ID: c5e8a1f3d462
+Revises: b2f7c9e4d351
+Create Date: 2026-10-18 21:16:52.884173
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8a1f3d462'
+down_revision = 'b2f7c9e4d351'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('invoices', sa.Column('montant_regle', sa.Float(), nullable=False, server_default='0'))
+    # Factures déjà payées : réglées en totalité
+    op.execute("UPDATE invoices SET montant_regle = montant_ttc WHERE statut = 'payée'")
+    op.create_table('invoice_payments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('facture_id', sa.Integer(), nullable=False),
+    sa.Column('montant', sa.Float(), nullable=False),
+    sa.Column('date_paiement', sa.Date(), nullable=False),
+    sa.Column('methode_paiement', sa.String(length=50), nullable=True),
+    sa.Column('reference_bancaire', sa.String(length=100), nullable=True),
+    sa.Column('libelle', sa.String(length=500), nullable=True),
+    sa.Column('date_creation', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['facture_id'], ['invoices.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('reference_bancaire')
+    )
+    op.create_index('ix_invoice_payments_facture_id', 'invoice_payments', ['facture_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_invoice_payments_facture_id', table_name='invoice_payments')
+    op.drop_table('invoice_payments')
+    with op.batch_alter_table('invoices') as batch_op:
+        batch_op.drop_column('montant_regle')
@@ -0,0 +1,33 @@
+"""Add daily revenue rollup
+
+Revision ID: d4b8f1e6c203
+Revises: a71d3e0c9b52
+Create Date: 2026-10-18 16:40:13.226915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.utils.revenue_rollup import rebuild_rollup
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b8f1e6c203'
+down_revision = 'a71d3e0c9b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('revenue_daily',
+    sa.Column('jour', sa.Date(), nullable=False),
+    sa.Column('montant_ht', sa.Float(), nullable=False),
+    sa.Column('montant_ttc', sa.Float(), nullable=False),
+    sa.Column('nombre_factures', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('jour')
+    )
+    # Reprise de l'historique des factures payées
+    rebuild_rollup(op.get_bind())
+
+
+def downgrade():
+    op.drop_table('revenue_daily')
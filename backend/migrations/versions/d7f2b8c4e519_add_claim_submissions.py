@@ -0,0 +1,55 @@
+"""Add claim submissions and submitted claims ledger
+
+Revision ID: d7f2b8c4e519
+Revises: c5e8a1f3d462
+Create Date: 2026-10-18 22:04:37.512903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7f2b8c4e519'
+down_revision = 'c5e8a1f3d462'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('insurances', sa.Column('format_bordereau', sa.String(length=20), nullable=True))
+    op.create_index('ix_invoices_date_emission_assurance', 'invoices', ['date_emission', 'assurance_id'], unique=False)
+    op.create_table('claim_submissions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('assurance_id', sa.Integer(), nullable=False),
+    sa.Column('periode', sa.String(length=7), nullable=False),
+    sa.Column('format', sa.String(length=20), nullable=False),
+    sa.Column('date_creation', sa.DateTime(), nullable=True),
+    sa.Column('factures', sa.Integer(), nullable=False),
+    sa.Column('montant_ttc', sa.Float(), nullable=False),
+    sa.Column('montant_prise_en_charge', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['assurance_id'], ['insurances.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_claim_submissions_assurance_periode', 'claim_submissions', ['assurance_id', 'periode'], unique=False)
+    op.create_table('submitted_claims',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('soumission_id', sa.Integer(), nullable=False),
+    sa.Column('facture_id', sa.Integer(), nullable=False),
+    sa.Column('montant_prise_en_charge', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['facture_id'], ['invoices.id'], ),
+    sa.ForeignKeyConstraint(['soumission_id'], ['claim_submissions.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('facture_id', name='uq_submitted_claims_facture_id')
+    )
+    op.create_index('ix_submitted_claims_soumission_id', 'submitted_claims', ['soumission_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_submitted_claims_soumission_id', table_name='submitted_claims')
+    op.drop_table('submitted_claims')
+    op.drop_index('ix_claim_submissions_assurance_periode', table_name='claim_submissions')
+    op.drop_table('claim_submissions')
+    op.drop_index('ix_invoices_date_emission_assurance', table_name='invoices')
+    with op.batch_alter_table('insurances') as batch_op:
+        batch_op.drop_column('format_bordereau')
@@ -0,0 +1,30 @@
+"""Add invoice number reserve
+
+Revision ID: e4a9c3d7b182
+Revises: d7f2b8c4e519
+Create Date: 2026-10-19 08:41:12.306518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a9c3d7b182'
+down_revision = 'd7f2b8c4e519'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Numéros réservés par blocs au compteur, attribués dans la transaction
+    # de chaque appelant
+    op.create_table('invoice_number_reserve',
+    sa.Column('mois', sa.String(length=6), nullable=False),
+    sa.Column('sequence', sa.Integer(), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('mois', 'sequence')
+    )
+
+
+def downgrade():
+    op.drop_table('invoice_number_reserve')
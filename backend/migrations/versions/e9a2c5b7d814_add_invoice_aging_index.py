@@ -0,0 +1,24 @@
+"""Add a covering index for the aged-receivables report
+
+Revision ID: e9a2c5b7d814
+Revises: d4b8f1e6c203
+Create Date: 2026-10-18 17:55:31.640218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9a2c5b7d814'
+down_revision = 'd4b8f1e6c203'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_invoices_aging', 'invoices', ['statut', 'patient_id', 'date_echeance', 'assurance_id', 'montant_ttc', 'montant_prise_en_charge', 'reste_a_charge'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_invoices_aging', table_name='invoices')
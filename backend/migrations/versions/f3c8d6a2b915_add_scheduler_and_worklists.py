@@ -0,0 +1,57 @@
+"""Add scheduler lease, job state and worklist snapshot tables
+
+Revision ID: f3c8d6a2b915
+Revises: e9a2c5b7d814
+Create Date: 2026-10-18 17:41:09.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8d6a2b915'
+down_revision = 'e9a2c5b7d814'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scheduler_leases',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('owner', sa.String(length=128), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('scheduled_jobs',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('last_run_at', sa.DateTime(), nullable=True),
+    sa.Column('valid_on', sa.Date(), nullable=True),
+    sa.Column('last_attempt_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Listes vides : calculées à la demande jusqu'au premier passage du planificateur
+    op.create_table('overdue_interventions_snapshot',
+    sa.Column('intervention_id', sa.Integer(), nullable=False),
+    sa.Column('date_planifiee', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['intervention_id'], ['interventions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('intervention_id')
+    )
+    op.create_index('ix_overdue_interventions_snapshot_date_planifiee', 'overdue_interventions_snapshot', ['date_planifiee'], unique=False)
+    op.create_table('maintenance_due_snapshot',
+    sa.Column('equipment_id', sa.Integer(), nullable=False),
+    sa.Column('date_prochaine_maintenance', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['equipment_id'], ['equipments.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('equipment_id')
+    )
+    op.create_index('ix_maintenance_due_snapshot_date_prochaine_maintenance', 'maintenance_due_snapshot', ['date_prochaine_maintenance'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_maintenance_due_snapshot_date_prochaine_maintenance', table_name='maintenance_due_snapshot')
+    op.drop_table('maintenance_due_snapshot')
+    op.drop_index('ix_overdue_interventions_snapshot_date_planifiee', table_name='overdue_interventions_snapshot')
+    op.drop_table('overdue_interventions_snapshot')
+    op.drop_table('scheduled_jobs')
+    op.drop_table('scheduler_leases')
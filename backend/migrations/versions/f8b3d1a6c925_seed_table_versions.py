@@ -0,0 +1,40 @@
+"""Seed a version row for every table
+
+Revision ID: f8b3d1a6c925
+Revises: e4a9c3d7b182
+Create Date: 2026-10-19 10:12:44.581203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8b3d1a6c925'
+down_revision = 'e4a9c3d7b182'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = [
+    'billing_runs', 'claim_submissions', 'dashboard_counters', 'equipment_rentals', 'equipments',
+    'insurances', 'interventions', 'invoice_counters', 'invoice_items', 'invoice_number_reserve',
+    'invoice_payments', 'invoices', 'maintenance_due_snapshot', 'medical_records',
+    'overdue_interventions_snapshot', 'patient_insurances', 'patients', 'rental_billings',
+    'revenue_daily', 'scheduled_jobs', 'scheduler_leases', 'service_interventions', 'services',
+    'submitted_claims', 'users',
+]
+
+
+def upgrade():
+    # Les écritures ne font plus que des UPDATE : chaque table reçoit sa
+    # ligne ici (celles déjà créées à la volée sont conservées)
+    table_versions = sa.table('table_versions', sa.column('table_name', sa.String), sa.column('version', sa.BigInteger))
+    existing = {row[0] for row in op.get_bind().execute(sa.select(table_versions.c.table_name))}
+    op.bulk_insert(table_versions, [
+        {'table_name': name, 'version': 0} for name in VERSIONED_TABLES if name not in existing
+    ])
+
+
+def downgrade():
+    # Lignes sans effet pour la version précédente, qui les créait à la volée
+    pass
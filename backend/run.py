@@ -1,5 +1,6 @@
 # backend/run.py
 import os
+import click
 from dotenv import load_dotenv
 from app import create_app, db
 from app.models import User, Patient, Equipment, Intervention, MedicalRecord, Insurance, Invoice, Service, EquipmentRental
@@ -57,6 +58,11 @@ def init_db():
     # D'abord créer les tables
     db.create_all()
     
+    # Index de recherche plein texte des patients
+    from app.utils.patient_search import create_search_index
+    with db.engine.begin() as connection:
+        create_search_index(connection)
+    
     # Créer l'admin
     admin = User.query.filter_by(email='admin@oxycare.com').first()
     if not admin:
@@ -90,5 +96,242 @@ def init_db():
     db.session.commit()
     print('Base de données initialisée avec succès')
 
+@app.cli.command('rebuild-dashboard-counters')
+def rebuild_dashboard_counters():
+    """Recalculer entièrement les compteurs du tableau de bord"""
+    from app.utils.dashboard_counters import rebuild_counters
+    counters = rebuild_counters()
+    for name, value in sorted(counters.items()):
+        print(f'{name}: {value:g}')
+
+@app.cli.command('backfill-revenue')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), help='Premier jour à recalculer')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), help='Dernier jour à recalculer')
+def backfill_revenue(start, end):
+    """Recalculer le cumul journalier du chiffre d'affaires depuis les factures"""
+    from app.utils.revenue_rollup import rebuild_rollup
+    from app.utils.versioning import bump_versions
+    connection = db.session.connection()
+    days = rebuild_rollup(connection, start and start.date(), end and end.date())
+    bump_versions(connection, ['revenue_daily'])
+    db.session.commit()
+    print(f'Cumul journalier recalculé ({days} jours avec chiffre d\'affaires)')
+
+@app.cli.command('run-jobs')
+@click.option('--force', is_flag=True, help='Exécuter toutes les tâches, même non dues')
+def run_jobs(force):
+    """Exécuter une fois les tâches planifiées dues (sans planificateur en processus)"""
+    from app.utils.scheduler import run_due_jobs
+    results = run_due_jobs(force=force)
+    for name, error in results.items():
+        print(f'{name}: ' + ('OK' if error is None else f'échec\n{error}'))
+    if not results:
+        print('Aucune tâche due')
+
+@app.cli.group('billing')
+def billing():
+    """Facturation mensuelle des locations et des interventions"""
+
+@billing.command('run')
+@click.option('--period', required=True, help='Mois à facturer (AAAA-MM)')
+@click.option('--chunk-size', default=500, show_default=True, help='Patients par lot validé')
+def billing_run(period, chunk_size):
+    """Facturer les locations actives de la période (reprend une campagne interrompue)"""
+    from app.services.billing_service import BillingService
+    
+    def progress(patient_id, factures, locations):
+        print(f'  lot validé jusqu\'au patient {patient_id} : {factures} factures, {locations} locations')
+    
+    try:
+        run = BillingService.run_billing(period, chunk_size, progress=progress)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(f'Période {run.periode} {run.statut} : {run.factures} factures, '
+          f'{run.locations} locations, {run.montant_ht:.2f} € HT')
+
+@billing.command('interventions')
+@click.option('--period', required=True, help='Mois des interventions à facturer (AAAA-MM)')
+@click.option('--chunk-size', default=500, show_default=True, help='Patients par lot validé')
+def billing_interventions(period, chunk_size):
+    """Facturer les interventions terminées et non facturées de la période (une facture par patient)"""
+    from app.services.invoice_service import InvoiceService
+    
+    def progress(totals):
+        print(f"  {totals['factures']} factures, {totals['interventions']} interventions")
+    
+    try:
+        totals = InvoiceService.generate_invoices_from_interventions(period, chunk_size, progress=progress)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(f"Période {period} : {totals['factures']} factures, {totals['interventions']} interventions, "
+          f"{totals['montant_ht']:.2f} € HT")
+
+@billing.command('render')
+@click.option('--period', required=True, help='Mois facturé (AAAA-MM)')
+@click.option('--workers', type=int, help='Processus de rendu (défaut : INVOICE_PDF_WORKERS)')
+def billing_render(period, workers):
+    """Rendre les documents PDF des factures de location de la période"""
+    from app.services.billing_service import BillingService
+    
+    def progress(totals):
+        print(f"  {totals['factures']} factures : {totals['rendus']} rendues, {totals['en_cache']} inchangées")
+    
+    try:
+        totals = BillingService.render_documents(period, workers, progress=progress)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(f"Période {period} : {totals['factures']} factures, {totals['rendus']} documents rendus, "
+          f"{totals['en_cache']} inchangés, {totals['liees']} factures mises à jour")
+
+@app.cli.command('reconcile-payments')
+@click.argument('statement', type=click.File('rb'))
+@click.option('--format', 'statement_format', type=click.Choice(['csv', 'camt']), help='Format du relevé (défaut : détecté)')
+@click.option('--encoding', default='utf-8-sig', show_default=True, help='Encodage d\'un relevé CSV')
+@click.option('--dry-run', is_flag=True, help='Rapprocher sans enregistrer les règlements')
+def reconcile_payments(statement, statement_format, encoding, dry_run):
+    """Rapprocher un relevé bancaire (CSV ou CAMT.053) des factures en attente"""
+    from app.services.reconciliation_service import ReconciliationService
+    try:
+        report = ReconciliationService.reconcile_statement(
+            statement, statement_format, statement.name, encoding, dry_run
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for line in report['unmatched']:
+        print(f"  ligne {line['ligne']} non rapprochée ({line['montant']:.2f} €, {line['libelle']!r}) : {line['motif']}")
+    print(f"{report['lignes']} lignes : {report['rapprochees']} rapprochées ({report['montant_rapproche']:.2f} €), "
+          f"{report['factures_soldees']} factures soldées, {report['paiements_partiels']} paiements partiels, "
+          f"{len(report['unmatched'])} non rapprochées, {report['deja_importees']} déjà importées, "
+          f"{report['ignorees']} ignorées" + (' (simulation)' if dry_run else ''))
+
+@app.cli.group('claims')
+def claims():
+    """Bordereaux de remboursement des organismes payeurs"""
+
+@claims.command('export')
+@click.option('--insurer', 'assurance_id', type=int, required=True, help='Identifiant de l\'assurance')
+@click.option('--period', required=True, help='Mois d\'émission des factures (AAAA-MM)')
+@click.option('--format', 'claim_format', help='Format du bordereau (défaut : celui de l\'assurance)')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Fichier de sortie (défaut : sortie standard)')
+def claims_export(assurance_id, period, claim_format, output):
+    """Transmettre les factures de la période non encore transmises à l'assurance"""
+    from app.services.claim_service import ClaimService
+    try:
+        submission = ClaimService.create_submission(assurance_id, period, claim_format)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if submission is None:
+        click.echo('Aucune nouvelle facture à transmettre', err=True)
+        return
+    _, chunks = ClaimService.export_submission(submission)
+    for chunk in chunks:
+        output.write(chunk)
+    click.echo(f'Bordereau {submission.id} ({submission.format}) : {submission.factures} factures, '
+               f'{submission.montant_prise_en_charge:.2f} € de prise en charge', err=True)
+
+@claims.command('file')
+@click.argument('submission_id', type=int)
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Fichier de sortie (défaut : sortie standard)')
+def claims_file(submission_id, output):
+    """Réécrire le fichier d'un bordereau déjà créé"""
+    from app.services.claim_service import ClaimService
+    submission = ClaimService.get_submission(submission_id)
+    if submission is None:
+        raise click.ClickException('Bordereau non trouvé')
+    try:
+        _, chunks = ClaimService.export_submission(submission)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for chunk in chunks:
+        output.write(chunk)
+
+@app.cli.command('check-query-plans')
+def check_query_plans():
+    """Vérifier par EXPLAIN qu'aucune requête ne parcourt une table entière"""
+    from app.utils.query_plans import check_query_plans as run_checks
+    plan_app = create_app('query-plans')
+    plan_app.logger.getChild('sql').setLevel('WARNING')
+    with plan_app.app_context():
+        violations = run_checks(plan_app)
+    
+    for name, statement, tables, plan in violations:
+        print(f'[{name}] parcours complet de {", ".join(tables)}')
+        print(f'  {" ".join(statement.split())}')
+        for line in plan if isinstance(plan, list) and plan and isinstance(plan[0], str) else [plan]:
+            print(f'    {line}')
+    
+    if violations:
+        raise SystemExit(1)
+    print('Aucun parcours complet de table détecté')
+
+@app.cli.command('check-query-budgets')
+def check_query_budgets():
+    """Vérifier les budgets de requêtes des routes et l'absence de N+1"""
+    from app.utils.query_plans import check_query_budgets as run_checks
+    budget_app = create_app('query-plans')
+    # Journal par requête inutile ici : seuls les dépassements comptent
+    budget_app.logger.getChild('sql').setLevel('WARNING')
+    with budget_app.app_context():
+        failures = run_checks(budget_app)
+    
+    for name, message in failures:
+        print(f'[{name}] {message}')
+    
+    if failures:
+        raise SystemExit(1)
+    print('Aucun dépassement de budget de requêtes')
+
+@app.cli.command('check-serializers')
+def check_serializers():
+    """Vérifier que les sérialiseurs compilés produisent la sortie de Schema.dump"""
+    import timeit
+    from app.schemas import (
+        patients_schema, equipments_schema, interventions_schema, invoices_schema,
+        equipment_rentals_schema, medical_records_schema, services_schema
+    )
+    from app.utils.eager_loading import loader_options
+    from app.utils.fieldsets import select_schema
+    from app.utils.query_plans import seed
+    from app.utils.serializers import check_parity, serializer_for
+    
+    cases = [
+        (Patient, patients_schema, None),
+        (Patient, patients_schema, ('id', 'nom', 'prenom')),
+        (Equipment, equipments_schema, None),
+        (Intervention, interventions_schema, None),
+        (Intervention, interventions_schema, ('id', 'statut', 'patient.nom', 'services')),
+        (Invoice, invoices_schema, None),
+        (EquipmentRental, equipment_rentals_schema, None),
+        (MedicalRecord, medical_records_schema, None),
+        (Service, services_schema, None),
+    ]
+    
+    check_app = create_app('query-plans')
+    failures = 0
+    with check_app.app_context():
+        db.create_all()
+        seed()
+        for model, schema, fields in cases:
+            schema = select_schema(schema, fields)
+            objects = model.query.options(*loader_options(model, schema)).all()
+            
+            mismatches = check_parity(schema, objects)
+            failures += len(mismatches)
+            
+            # Meilleur de plusieurs passages : une seule mesure subit les
+            # pauses du ramasse-miettes, du même ordre que le temps compilé
+            reference = min(timeit.repeat(lambda: schema.dump(objects), number=1, repeat=5))
+            compiled = min(timeit.repeat(lambda: serializer_for(schema).dump(objects), number=1, repeat=5))
+            
+            status = 'OK' if not mismatches else f'{len(mismatches)} écart(s)'
+            print(f'{type(schema).__name__} {fields or "*"}: {status}, '
+                  f'{len(objects)} objets, x{reference / max(compiled, 1e-9):.1f}')
+            for expected, actual in mismatches[:3]:
+                print(f'  attendu: {expected}')
+                print(f'  obtenu:  {actual}')
+    
+    if failures:
+        raise SystemExit(1)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -22,6 +22,8 @@ export default function EquipmentPage() {
   const [equipments, setEquipments] = useState<Equipment[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const { isAuthenticated } = useAuth();
   const router = useRouter();
 
@@ -35,7 +37,8 @@ export default function EquipmentPage() {
       try {
         setLoading(true);
         const data = await apiService.get('/equipments');
-        setEquipments(data);
+        setEquipments(data.items);
+        setNextCursor(data.next_cursor);
       } catch (err: any) {
         setError(err.message || 'Erreur lors du chargement des équipements');
         console.error('Erreur:', err);
@@ -47,6 +50,22 @@ export default function EquipmentPage() {
     fetchEquipments();
   }, [isAuthenticated, router]);
 
+  // Page suivante : l'API pagine par curseur (next_cursor)
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const data = await apiService.get('/equipments', { cursor: nextCursor });
+      setEquipments((current) => [...current, ...data.items]);
+      setNextCursor(data.next_cursor);
+    } catch (err: any) {
+      setError(err.message || 'Erreur lors du chargement des équipements');
+      console.error('Erreur:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div className="flex justify-center items-center h-screen">
@@ -130,6 +149,18 @@ export default function EquipmentPage() {
                 )}
               </ul>
             </div>
+            {nextCursor && (
+              <div className="mt-4 flex justify-center">
+                <button
+                  type="button"
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="inline-flex items-center px-4 py-2 border border-gray-300 text-sm font-medium rounded-md shadow-sm text-gray-700 bg-white hover:bg-gray-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-blue-500 disabled:opacity-50"
+                >
+                  {loadingMore ? 'Chargement...' : 'Charger plus'}
+                </button>
+              </div>
+            )}
           </div>
         </div>
       </main>
@@ -21,6 +21,8 @@ export default function PatientsPage() {
   const [patients, setPatients] = useState<Patient[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const { isAuthenticated, user } = useAuth();
   const router = useRouter();
 
@@ -34,7 +36,8 @@ export default function PatientsPage() {
       try {
         setLoading(true);
         const data = await apiService.get('/patients');
-        setPatients(data);
+        setPatients(data.items);
+        setNextCursor(data.next_cursor);
       } catch (err: any) {
         setError(err.message || 'Erreur lors du chargement des patients');
         console.error('Erreur:', err);
@@ -46,6 +49,22 @@ export default function PatientsPage() {
     fetchPatients();
   }, [isAuthenticated, router]);
 
+  // Page suivante : l'API pagine par curseur (next_cursor)
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const data = await apiService.get('/patients', { cursor: nextCursor });
+      setPatients((current) => [...current, ...data.items]);
+      setNextCursor(data.next_cursor);
+    } catch (err: any) {
+      setError(err.message || 'Erreur lors du chargement des patients');
+      console.error('Erreur:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div className="flex justify-center items-center h-screen">
@@ -127,6 +146,18 @@ export default function PatientsPage() {
                 )}
               </ul>
             </div>
+            {nextCursor && (
+              <div className="mt-4 flex justify-center">
+                <button
+                  type="button"
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="inline-flex items-center px-4 py-2 border border-gray-300 text-sm font-medium rounded-md shadow-sm text-gray-700 bg-white hover:bg-gray-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-blue-500 disabled:opacity-50"
+                >
+                  {loadingMore ? 'Chargement...' : 'Charger plus'}
+                </button>
+              </div>
+            )}
           </div>
         </div>
       </main>